@@ -23,6 +23,18 @@ load_dotenv()
 BASE_DIR = Path(__file__).resolve().parent.parent
 MEDIA_ROOT = BASE_DIR / 'media'
 MEDIA_URL = os.environ.get('MEDIA_URL') or 'http://127.0.0.1:8000/media/'
+# Uploaded files are named after the hash of their content, see BookBearApi.views.serve_media
+STORAGES = {
+    'default': {'BACKEND': 'BookBearApi.storage.HashedFileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+# Seconds the media files stored before their names were hashed may be cached by the clients
+MEDIA_CACHE_MAX_AGE = int(os.getenv('MEDIA_CACHE_MAX_AGE', '3600'))
+# Internal location of MEDIA_ROOT in the front web server, e.g. '/protected-media/' for nginx, to let it send the
+# media files through X-Accel-Redirect. Empty streams them from Django.
+MEDIA_ACCEL_REDIRECT = os.getenv('MEDIA_ACCEL_REDIRECT', '')
+# Threads writing and deleting the media files in every web worker, 0 runs them in the request thread.
+STORAGE_WORKERS = int(os.getenv('STORAGE_WORKERS', '4'))
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -46,6 +58,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'BookBearApi',
     'ninja_extra',
     'dj_ninja_auth',
@@ -144,6 +157,45 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'BookBearApi.User'
 
+TEST_RUNNER = 'BookBearApi.tests.runner.TestRunner'
+
+# Per-process cache of the users authenticated by their JWT, 0 disables it.
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', '30'))
+AUTH_USER_CACHE_MAX_ENTRIES = int(os.getenv('AUTH_USER_CACHE_MAX_ENTRIES', '1024'))
+# Per-process cache of the already verified access tokens, 0 disables it.
+AUTH_TOKEN_CACHE_MAX_ENTRIES = int(os.getenv('AUTH_TOKEN_CACHE_MAX_ENTRIES', '4096'))
+
+# Read-through cache of the book, author, publisher and genre detail responses.
+# 'lru' keeps them in a per-process LRU, 'django' uses the DETAIL_CACHE_ALIAS cache of CACHES, 'dummy' disables it.
+# Invalidations of the 'lru' backend only reach the worker that made the change, the others serve the previous
+# response until DETAIL_CACHE_TIMEOUT: use a shared 'django' cache when running several workers.
+DETAIL_CACHE_BACKEND = os.getenv('DETAIL_CACHE_BACKEND', 'lru')
+DETAIL_CACHE_ALIAS = os.getenv('DETAIL_CACHE_ALIAS', 'default')
+DETAIL_CACHE_MAX_ENTRIES = int(os.getenv('DETAIL_CACHE_MAX_ENTRIES', '2048'))
+DETAIL_CACHE_TIMEOUT = int(os.getenv('DETAIL_CACHE_TIMEOUT', '300'))
+
+# Text search configuration of the PostgreSQL book search index, e.g. 'english' for stemming
+BOOK_SEARCH_CONFIG = os.getenv('BOOK_SEARCH_CONFIG', 'simple')
+
+# Seconds after which a worker reloads its /suggest index, to pick up the writes handled by other workers
+# (0 never reloads it)
+SUGGEST_INDEX_TIMEOUT = int(os.getenv('SUGGEST_INDEX_TIMEOUT', '600'))
+
+# Threads running the background jobs in every web worker, 0 leaves them to `manage.py run_jobs` workers.
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+# Attempts of a failing job before it is marked as failed
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+# Seconds before the first retry of a failing job, doubled for every following attempt
+JOB_RETRY_DELAY = int(os.getenv('JOB_RETRY_DELAY', '30'))
+# Seconds a worker has to finish a job before it is considered stopped and the job is claimed again
+JOB_LEASE_SECONDS = int(os.getenv('JOB_LEASE_SECONDS', '3600'))
+
+# New books are pushed to the feed of the followers of their authors and publisher, FEED_FANOUT_BATCH_SIZE
+# followers per job. Authors and publishers with more than FEED_FANOUT_MAX_FOLLOWERS followers are pulled by
+# their followers when reading their feed instead.
+FEED_FANOUT_BATCH_SIZE = int(os.getenv('FEED_FANOUT_BATCH_SIZE', '1000'))
+FEED_FANOUT_MAX_FOLLOWERS = int(os.getenv('FEED_FANOUT_MAX_FOLLOWERS', '10000'))
+
 # CORS setup
 CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', 'http://localhost:5173').split(',')
 CORS_ALLOW_CREDENTIALS = bool(int(os.getenv('CORS_ALLOW_CREDENTIALS', '1')))
@@ -160,11 +212,11 @@ REFRESH_TOKEN_ON_COOKIE = bool(int(os.getenv('REFRESH_TOKEN_ON_COOKIE', '0')))
 REFRESH_TOKEN_COOKIE_SAMESITE = os.getenv('REFRESH_TOKEN_COOKIE_SAMESITE', 'None')
 REFRESH_TOKEN_COOKIE_SECURE = bool(int(os.getenv('REFRESH_TOKEN_COOKIE_SECURE', '1')))
 
-if REFRESH_TOKEN_ON_COOKIE:
-    AUTH_JWT_PAIR_SCHEMA = os.getenv(
-        'AUTH_JWT_PAIR_SCHEMA',
-        'BookBearApi.schemas.custom_token_schemas.CustomTokenPairInputSchema'
-    )
+AUTH_JWT_PAIR_SCHEMA = os.getenv(
+    'AUTH_JWT_PAIR_SCHEMA',
+    'BookBearApi.schemas.custom_token_schemas.CustomTokenPairInputSchema' if REFRESH_TOKEN_ON_COOKIE
+    else 'BookBearApi.schemas.custom_token_schemas.FingerprintTokenPairInputSchema'
+)
 
 AUTH_PASSWORD_RESET_URL = os.getenv('AUTH_PASSWORD_RESET_URL', 'http://localhost:8000/reset-password')
 
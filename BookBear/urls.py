@@ -19,15 +19,13 @@ from urllib.parse import urlparse
 
 from django.conf import settings
 from django.urls import path, re_path
-from django.views.static import serve
 
 from BookBearApi.api import api
+from BookBearApi.views import serve_media
 
 media_path = urlparse(settings.MEDIA_URL).path  # e.g. "/media/"
 
 urlpatterns = [
     path('api/v1/', api.urls),
-    re_path(r'^{}(?P<path>.*)$'.format(media_path.lstrip('/')), serve, {
-        'document_root': settings.MEDIA_ROOT,
-    }),
+    re_path(r'^{}(?P<path>.*)$'.format(media_path.lstrip('/')), serve_media),
 ]
@@ -4,13 +4,15 @@ from ninja_extra import (
 
 from .async_auth import AsyncJWTAuth
 from .controllers import AsyncNinjaAuthJWTController, UserController, BookController, AdminController, \
-    PublisherController, GenreController, AuthorController, MeController
+    PublisherController, GenreController, AuthorController, MeController, SuggestController
+from .renderers import ORJSONRenderer
 
 api = NinjaExtraAPI(
     version='1.0.0',
     title='BookBear API',
     description='API para o projeto BookBear',
-    auth=AsyncJWTAuth()
+    auth=AsyncJWTAuth(),
+    renderer=ORJSONRenderer()
 )
 
 api.register_controllers(
@@ -21,5 +23,6 @@ api.register_controllers(
     PublisherController,
     GenreController,
     BookController,
+    SuggestController,
     AdminController
 )
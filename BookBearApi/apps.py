@@ -6,4 +6,6 @@ class BookbearapiConfig(AppConfig):
     name = 'BookBearApi'
 
     def ready(self):
-        pass
+        # Registers the job functions, so every process can run them
+        from . import feed, images, library_import, stats  # noqa: F401
+        from . import signals  # noqa: F401
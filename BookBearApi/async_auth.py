@@ -1,30 +1,207 @@
-from typing import Any, Type
+import copy
+import hashlib
+import time
+from typing import Any, Dict, Optional, Tuple, Type
 
-from asgiref.sync import sync_to_async
 from dj_ninja_auth.jwt import app_settings
-from dj_ninja_auth.jwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from dj_ninja_auth.jwt.exceptions import AuthenticationFailed, InvalidToken, TokenBackendError, TokenError
 from dj_ninja_auth.jwt.tokens import Token
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.base_user import AbstractBaseUser
 from django.contrib.auth.models import AnonymousUser
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from django.http import HttpRequest
+from django.utils.crypto import salted_hmac
 from django.utils.module_loading import import_string
 from ninja_extra.security import AsyncHttpBearer
 
+from .cache import LRUCacheBackend
+
+# Claim of the tokens holding the fingerprint of their user when they were issued
+FINGERPRINT_CLAIM = 'fingerprint'
+
+
+def user_fingerprint(user: AbstractBaseUser) -> str:
+    """
+    Digest of the password and the status of `user` when a token was issued: a cached user with another
+    fingerprint may be stale, e.g. changed by another worker, and is read again.
+    """
+    return salted_hmac('BookBearApi.async_auth.user_fingerprint', f'{user.password}:{user.is_active}').hexdigest()
+
+
+class AuthenticatedUserCache:
+    """
+    Short lived, bounded, per-process cache of the users authenticated by their JWT.
+
+    Entries are evicted by the User post_save/post_delete receivers, so a password change, a deactivation
+    or a profile update is seen by the next request handled by this worker. Other workers may keep their entry
+    for at most AUTH_USER_CACHE_TIMEOUT seconds, but an entry is only returned for a token carrying the
+    fingerprint of the cached user: a token issued after a password change made on another worker misses and
+    reloads the user. The fingerprint only decides whether the entry can be reused, tokens issued before a
+    password change stay valid. Callers get a copy of the cached user, so a request can change `request.user`
+    without leaking the change to other requests.
+    """
+
+    def __init__(self):
+        self._backend = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.AUTH_USER_CACHE_TIMEOUT > 0
+
+    @property
+    def backend(self) -> LRUCacheBackend:
+        if self._backend is None:
+            self._backend = LRUCacheBackend(settings.AUTH_USER_CACHE_MAX_ENTRIES, settings.AUTH_USER_CACHE_TIMEOUT)
+        return self._backend
+
+    def get(self, user_id: Any, fingerprint: Optional[str]) -> Optional[AbstractBaseUser]:
+        """
+        Return a copy of the cached user `user_id` if its fingerprint is `fingerprint`.
+
+        :param user_id: the user id claim of the token
+        :param fingerprint: the fingerprint claim of the token, tokens without one always miss
+        :return: the user, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        user = self.backend.get(str(user_id))
+        if user is None or fingerprint is None or user_fingerprint(user) != fingerprint:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return copy.copy(user)
+
+    def set(self, user_id: Any, user: AbstractBaseUser) -> None:
+        if self.enabled:
+            self.backend.set(str(user_id), copy.copy(user), settings.AUTH_USER_CACHE_TIMEOUT)
+
+    def evict(self, user_id: Any) -> None:
+        if self._backend is not None:
+            self._backend.delete(str(user_id))
+
+    def reset(self) -> None:
+        self._backend = None
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._backend) if self._backend is not None else 0,
+            'max_entries': settings.AUTH_USER_CACHE_MAX_ENTRIES,
+            'timeout': settings.AUTH_USER_CACHE_TIMEOUT,
+        }
+
+
+user_cache = AuthenticatedUserCache()
+
+
+class VerifiedTokenCache:
+    """
+    Per-process LRU of the raw tokens whose signature and claims were already verified.
+
+    Entries are keyed by the SHA-256 digest of the raw token and expire with its `exp` claim, so repeated
+    requests with the same bearer token skip the cryptographic verification.
+    """
+
+    def __init__(self):
+        self._backend = None
+
+    @property
+    def enabled(self) -> bool:
+        return settings.AUTH_TOKEN_CACHE_MAX_ENTRIES > 0
+
+    @property
+    def backend(self) -> LRUCacheBackend:
+        if self._backend is None:
+            self._backend = LRUCacheBackend(settings.AUTH_TOKEN_CACHE_MAX_ENTRIES, None)
+        return self._backend
+
+    @staticmethod
+    def _key(raw_token: Any) -> str:
+        if isinstance(raw_token, str):
+            raw_token = raw_token.encode()
+        return hashlib.sha256(raw_token).hexdigest()
+
+    def get(self, raw_token: Any) -> Optional[Token]:
+        if not self.enabled:
+            return None
+        return self.backend.get(self._key(raw_token))
+
+    def set(self, raw_token: Any, token: Token) -> None:
+        if not self.enabled:
+            return
+        timeout = token.get('exp', 0) - time.time()
+        if timeout > 0:
+            self.backend.set(self._key(raw_token), token, timeout)
+
+    def reset(self) -> None:
+        self._backend = None
+
+
+token_cache = VerifiedTokenCache()
+
+
+@receiver(setting_changed)
+def reset_user_cache(setting, **kwargs):
+    if setting.startswith('AUTH_USER_CACHE_'):
+        user_cache.reset()
+    elif setting.startswith('AUTH_TOKEN_CACHE_'):
+        token_cache.reset()
+
 
 class AsyncJWTBaseAuthentication:
+    _token_classes: Optional[Tuple[Type[Token], ...]] = None
+
     def __init__(self) -> None:
         super().__init__()
         self.user_model = get_user_model()
+        self.get_token_classes()
+
+    @classmethod
+    def get_token_classes(cls) -> Tuple[Type[Token], ...]:
+        if cls._token_classes is None:
+            cls._token_classes = tuple(import_string(token_class) for token_class in app_settings.TOKEN_CLASSES)
+        return cls._token_classes
+
+    @staticmethod
+    def verify_token(AuthToken: Type[Token], raw_token) -> Token:
+        """
+        Decode and verify the token like `AuthToken(raw_token)` without its database lookup.
+
+        Token.verify() also checks that the user exists and is active, which `get_user` does anyway, so the
+        verification left is CPU-only and runs inline instead of in a thread.
+        """
+        token = AuthToken(raw_token, verify=False)
+        try:
+            token.payload = token.get_token_backend().decode(raw_token, verify=True)
+        except TokenBackendError as e:
+            raise TokenError("Token is invalid or expired") from e
+
+        token.check_exp()
+        if app_settings.JTI_CLAIM is not None and app_settings.JTI_CLAIM not in token.payload:
+            raise TokenError("Token has no id")
+        if app_settings.TOKEN_TYPE_CLAIM is not None:
+            token.verify_token_type()
+        return token
 
     @classmethod
     async def get_validated_token(cls, raw_token) -> Type[Token]:
+        token = token_cache.get(raw_token)
+        if token is not None:
+            return token
+
         messages = []
-        for AuthToken in app_settings.TOKEN_CLASSES:
-            AuthToken = import_string(AuthToken)
+        for AuthToken in cls.get_token_classes():
             try:
-                # Wrap the synchronous call with sync_to_async
-                token = await sync_to_async(AuthToken)(raw_token)
+                token = cls.verify_token(AuthToken, raw_token)
+                token_cache.set(raw_token, token)
                 return token
             except TokenError as e:
                 messages.append(
@@ -53,6 +230,11 @@ class AsyncJWTBaseAuthentication:
                 "Token contained no recognizable user identification"
             ) from e
 
+        fingerprint = validated_token.get(FINGERPRINT_CLAIM)
+        user = user_cache.get(user_id, fingerprint)
+        if user is not None:
+            return user
+
         try:
             user = await self.user_model.objects.aget(**{app_settings.USER_ID_FIELD: user_id})
         except self.user_model.DoesNotExist as e:
@@ -61,6 +243,7 @@ class AsyncJWTBaseAuthentication:
         if not user.is_active:
             raise AuthenticationFailed("User is inactive")
 
+        user_cache.set(user_id, user)
         return user
 
     async def jwt_authenticate(self, request: HttpRequest, token: str) -> AbstractBaseUser:
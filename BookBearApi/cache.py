@@ -0,0 +1,227 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Iterable, Optional, Tuple, Type
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse
+from ninja import Schema
+
+from .renderers import dumps
+
+
+class LRUCacheBackend:
+    """
+    Per-process cache bounded to `max_entries` with least recently used eviction and an optional time to live.
+    """
+
+    def __init__(self, max_entries: int, timeout: Optional[int]):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set(self, key: str, value: Any, timeout: Optional[int]) -> None:
+        self._entries[key] = (value, time.monotonic() + timeout if timeout is not None else None)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            return self._get(key)
+
+    def set(self, key: str, value: Any, timeout: Optional[int] = None) -> None:
+        with self._lock:
+            self._set(key, value, timeout)
+
+    def add(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        with self._lock:
+            if self._get(key) is not None:
+                return False
+            self._set(key, value, timeout)
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def aget(self, key: str) -> Any:
+        return self.get(key)
+
+    async def aset(self, key: str, value: Any, timeout: Optional[int] = None) -> None:
+        self.set(key, value, timeout)
+
+    async def aadd(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        return self.add(key, value, timeout)
+
+
+class DjangoCacheBackend:
+    """
+    Adapter over a cache of the Django cache framework, e.g. Redis or Memcached shared by every worker.
+    """
+
+    def __init__(self, alias: str, timeout: Optional[int]):
+        self.cache = caches[alias]
+        self.timeout = timeout
+
+    def get(self, key: str) -> Any:
+        return self.cache.get(key)
+
+    def set(self, key: str, value: Any, timeout: Optional[int] = None) -> None:
+        self.cache.set(key, value, timeout)
+
+    def add(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        return self.cache.add(key, value, timeout)
+
+    def delete(self, key: str) -> None:
+        self.cache.delete(key)
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+    async def aget(self, key: str) -> Any:
+        return await self.cache.aget(key)
+
+    async def aset(self, key: str, value: Any, timeout: Optional[int] = None) -> None:
+        await self.cache.aset(key, value, timeout)
+
+    async def aadd(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        return await self.cache.aadd(key, value, timeout)
+
+
+class DummyCacheBackend:
+    """
+    Backend that stores nothing, every read goes to the database.
+    """
+    timeout = None
+
+    def get(self, key: str) -> Any:
+        return None
+
+    def set(self, key: str, value: Any, timeout: Optional[int] = None) -> None:
+        pass
+
+    def add(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        return True
+
+    def delete(self, key: str) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+    async def aget(self, key: str) -> Any:
+        return None
+
+    async def aset(self, key: str, value: Any, timeout: Optional[int] = None) -> None:
+        pass
+
+    async def aadd(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        return True
+
+
+class DetailCache:
+    """
+    Versioned read-through cache of serialized detail responses.
+
+    Every object has a version token and its response is stored under `detail:<resource>:<pk>:<version>`.
+    Invalidating an object replaces its token, so a response rendered from data read before the
+    invalidation can only be written under the old token and is never served again.
+    """
+
+    def __init__(self):
+        self._backend = None
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            name = settings.DETAIL_CACHE_BACKEND
+            if name == 'lru':
+                self._backend = LRUCacheBackend(settings.DETAIL_CACHE_MAX_ENTRIES, settings.DETAIL_CACHE_TIMEOUT)
+            elif name == 'django':
+                self._backend = DjangoCacheBackend(settings.DETAIL_CACHE_ALIAS, settings.DETAIL_CACHE_TIMEOUT)
+            elif name == 'dummy':
+                self._backend = DummyCacheBackend()
+            else:
+                raise ValueError(f"Unknown DETAIL_CACHE_BACKEND '{name}'")
+        return self._backend
+
+    @property
+    def enabled(self) -> bool:
+        return not isinstance(self.backend, DummyCacheBackend)
+
+    def reset(self) -> None:
+        self._backend = None
+
+    @staticmethod
+    def _version_key(resource: str, pk: Any) -> str:
+        return f'detail:{resource}:{pk}:version'
+
+    def invalidate(self, keys: Iterable[Tuple[str, Any]]) -> None:
+        """
+        Invalidate the cached responses of the given `(resource, pk)` pairs.
+        """
+        backend = self.backend
+        for resource, pk in keys:
+            backend.set(self._version_key(resource, pk), uuid.uuid4().hex)
+
+    async def _aversion(self, resource: str, pk: Any) -> str:
+        backend = self.backend
+        version_key = self._version_key(resource, pk)
+        version = await backend.aget(version_key)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not await backend.aadd(version_key, version):
+                version = await backend.aget(version_key) or version
+        return version
+
+    async def aresponse(self, resource: str, pk: Any, schema: Type[Schema],
+                        loader: Callable[[], Awaitable[Any]]) -> HttpResponse:
+        """
+        Return the JSON response of `schema` for the object, rendering it from `loader()` on a cache miss.
+        """
+        backend = self.backend
+        key = f'detail:{resource}:{pk}:{await self._aversion(resource, pk)}'
+        content = await backend.aget(key)
+        if content is None:
+            instance = await loader()
+            content = await sync_to_async(self.render)(schema, instance)
+            await backend.aset(key, content, backend.timeout)
+        return HttpResponse(content, content_type='application/json; charset=utf-8')
+
+    @staticmethod
+    def render(schema: Type[Schema], instance: Any) -> bytes:
+        return dumps(schema.from_orm(instance).model_dump())
+
+
+detail_cache = DetailCache()
+
+
+@receiver(setting_changed)
+def reset_detail_cache(setting, **kwargs):
+    if setting.startswith('DETAIL_CACHE_'):
+        detail_cache.reset()
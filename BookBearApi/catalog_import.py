@@ -0,0 +1,217 @@
+import csv
+import os
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Type, Union
+
+from django.db import models, transaction
+from pydantic import ValidationError
+
+from .models import Author, Book, Genre, Publisher
+from .schemas.import_schema import ImportBookSchema
+from .search import get_search_index
+from .signals import touch_details
+from .suggest import suggestion_index
+from .titles import title_key
+
+FORMATS = ('ndjson', 'csv')
+FORMAT_EXTENSIONS = {'.ndjson': 'ndjson', '.jsonl': 'ndjson', '.csv': 'csv'}
+# Separator of the CSV cells holding several values, e.g. "Author 1|Author 2"
+CSV_LIST_SEPARATOR = '|'
+
+
+def guess_format(filename: Optional[str]) -> Optional[str]:
+    """
+    Return the import format matching the extension of `filename`, if any.
+    """
+    return FORMAT_EXTENSIONS.get(os.path.splitext(filename or '')[1].lower())
+
+
+def invalid_utf8_line(lines: Iterable[bytes]) -> Optional[int]:
+    """
+    Return the number of the first of `lines` that is not valid UTF-8, if any, so that an upload can be rejected
+    before any of its batches is committed.
+    """
+    for line_number, line in enumerate(lines, start=1):
+        try:
+            line.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            return line_number
+    return None
+
+
+def read_rows(lines: Iterable[str], file_format: str) -> Iterator[Tuple[int, Union[str, Dict[str, Any]]]]:
+    """
+    Yield the line number and the raw content of every row, reading `lines` lazily.
+
+    NDJSON rows are yielded as the JSON text of the line, CSV rows as a dict whose `authors` and `genres`
+    columns are split on CSV_LIST_SEPARATOR. The optional `author_birth_dates` CSV column holds the birth
+    dates of the authors in the same order.
+    """
+    if file_format == 'ndjson':
+        for line_number, line in enumerate(lines, start=1):
+            if line.strip():
+                yield line_number, line
+    elif file_format == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, _csv_row(row)
+    else:
+        raise ValueError(f"Unknown import format '{file_format}'")
+
+
+def _split(value: Optional[str]) -> List[str]:
+    return [item.strip() for item in (value or '').split(CSV_LIST_SEPARATOR) if item.strip()]
+
+
+def _csv_row(row: Dict[Optional[str], Any]) -> Dict[str, Any]:
+    row = {key: value for key, value in row.items() if key and value not in (None, '')}
+    authors = _split(row.pop('authors', None))
+    # Birth dates are matched to the authors by position, so empty cells are kept
+    birth_dates = [item.strip() for item in (row.pop('author_birth_dates', None) or '').split(CSV_LIST_SEPARATOR)]
+    row['authors'] = [
+        {'name': name, 'birth_date': birth_dates[index] if index < len(birth_dates) and birth_dates[index] else None}
+        for index, name in enumerate(authors)
+    ]
+    row['genres'] = _split(row.get('genres'))
+    return row
+
+
+def _error_message(error: ValidationError) -> str:
+    return '; '.join(
+        f"{'.'.join(str(location) for location in detail['loc'])}: {detail['msg']}" if detail['loc']
+        else detail['msg']
+        for detail in error.errors()
+    )
+
+
+@dataclass
+class CatalogImportResult:
+    rows: int = 0
+    imported_books: int = 0
+    created_authors: int = 0
+    created_publishers: int = 0
+    created_genres: int = 0
+    error_count: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+
+
+class CatalogImporter:
+    """
+    Import books from NDJSON or CSV rows in batches of `batch_size`.
+
+    Authors, publishers and genres are matched by their unique name and created when missing, books and
+    their author/genre links are inserted with bulk_create, and every batch is committed in its own
+    transaction. Invalid rows are skipped and reported with their line number, keeping the first
+    `max_errors` messages. `progress` is called with the running result after every batch.
+    """
+
+    def __init__(self, batch_size: int = 500, max_errors: int = 100,
+                 progress: Optional[Callable[[CatalogImportResult], None]] = None):
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.progress = progress
+
+    def run(self, lines: Iterable[str], file_format: str) -> CatalogImportResult:
+        result = CatalogImportResult()
+        batch: List[Tuple[int, ImportBookSchema]] = []
+        for line, raw in read_rows(lines, file_format):
+            result.rows += 1
+            try:
+                if isinstance(raw, str):
+                    batch.append((line, ImportBookSchema.model_validate_json(raw)))
+                else:
+                    batch.append((line, ImportBookSchema.model_validate(raw)))
+            except ValidationError as e:
+                self.add_error(result, line, _error_message(e))
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch, result)
+                batch = []
+        if batch:
+            self.import_batch(batch, result)
+        return result
+
+    def add_error(self, result: CatalogImportResult, line: int, message: str) -> None:
+        result.error_count += 1
+        if len(result.errors) < self.max_errors:
+            result.errors.append({'line': line, 'message': message})
+
+    def import_batch(self, batch: List[Tuple[int, ImportBookSchema]], result: CatalogImportResult) -> None:
+        with transaction.atomic():
+            self._import_batch(batch, result)
+        if self.progress is not None:
+            self.progress(result)
+
+    def _import_batch(self, batch: List[Tuple[int, ImportBookSchema]], result: CatalogImportResult) -> None:
+        if not batch:
+            return
+        authors = dict(
+            Author.objects.filter(name__in={author.name for _, row in batch for author in row.authors})
+            .values_list('name', 'pk')
+        )
+        birth_dates = {}
+        for _, row in batch:
+            for author in row.authors:
+                if author.name not in authors and author.birth_date is not None:
+                    birth_dates.setdefault(author.name, author.birth_date)
+
+        rows = []
+        for line, row in batch:
+            unknown = [author.name for author in row.authors
+                       if author.name not in authors and author.name not in birth_dates]
+            if unknown:
+                self.add_error(result, line, f"Unknown authors without a birth_date: {', '.join(unknown)}")
+            else:
+                rows.append(row)
+        if not rows:
+            return
+
+        new_authors = {author.name for row in rows for author in row.authors if author.name not in authors}
+        authors.update(self._create(Author, new_authors, lambda name: Author(name=name, birth_date=birth_dates[name])))
+        result.created_authors += len(new_authors)
+        publishers, created = self._resolve(Publisher, {row.publisher for row in rows if row.publisher})
+        result.created_publishers += created
+        genres, created = self._resolve(Genre, {genre for row in rows for genre in row.genres})
+        result.created_genres += created
+
+        books = Book.objects.bulk_create([
+            Book(title=row.title, title_key=title_key(row.title), isbn=row.isbn, publication_date=row.publication_date,
+                 synopsis=row.synopsis, age_rating=row.age_rating, publisher_id=publishers.get(row.publisher))
+            for row in rows
+        ])
+        Book.authors.through.objects.bulk_create([
+            Book.authors.through(book_id=book.pk, author_id=authors[name])
+            for book, row in zip(books, rows)
+            for name in dict.fromkeys(author.name for author in row.authors)
+        ])
+        Book.genres.through.objects.bulk_create([
+            Book.genres.through(book_id=book.pk, genre_id=genres[name])
+            for book, row in zip(books, rows)
+            for name in dict.fromkeys(row.genres)
+        ])
+        get_search_index().update(book.pk for book in books)
+        result.imported_books += len(books)
+
+        # bulk_create sends no signals, the details listing the books of these objects are touched here
+        keys = {('author', pk) for pk in authors.values()}
+        keys.update(('publisher', pk) for pk in publishers.values())
+        keys.update(('genre', pk) for pk in genres.values())
+        touch_details(keys)
+        # Cheaper to reload than to insert a whole batch into the sorted lists
+        transaction.on_commit(suggestion_index.reset)
+
+    def _resolve(self, model: Type[models.Model], names: Set[str]) -> Tuple[Dict[str, int], int]:
+        """
+        Return the ids of the objects named `names` and the number of missing ones created.
+        """
+        ids = dict(model.objects.filter(name__in=names).values_list('name', 'pk'))
+        missing = names - ids.keys()
+        ids.update(self._create(model, missing, lambda name: model(name=name)))
+        return ids, len(missing)
+
+    @staticmethod
+    def _create(model: Type[models.Model], names: Set[str], build: Callable[[str], models.Model]) -> Dict[str, int]:
+        if not names:
+            return {}
+        # Objects created concurrently by another import are ignored and read back below
+        model.objects.bulk_create([build(name) for name in names], ignore_conflicts=True)
+        return dict(model.objects.filter(name__in=names).values_list('name', 'pk'))
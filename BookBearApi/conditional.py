@@ -0,0 +1,48 @@
+from datetime import datetime
+from typing import Awaitable, Callable, Optional, Sequence, Tuple
+
+from django.db.models import Count, Max, QuerySet
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+async def avalidators(queryset: QuerySet, related: Sequence[str] = ()) -> Tuple[Optional[str], Optional[datetime]]:
+    """
+    Return the ETag and Last-Modified of a response rendering the objects of `queryset`, from their latest
+    `updated_at` and their number, in one aggregate query, or None if there is no object.
+
+    Objects are touched whenever something their rows show changes, see BookBearApi.signals.touch_details, and
+    the count tells an object leaving the queryset apart. The `updated_at` of the `related` lookups are read too,
+    for the responses embedding related objects, e.g. the books of an author detail: a change of a book then
+    only touches the book and leaves the lists not showing it, such as the list of genres, unchanged.
+    """
+    aggregate = await queryset.order_by().aaggregate(
+        Max('updated_at'), *(Max(f'{lookup}__updated_at') for lookup in related), count=Count('pk', distinct=bool(related))
+    )
+    count = aggregate.pop('count')
+    dates = [date for date in aggregate.values() if date is not None]
+    if not dates:
+        return None, None
+    last_modified = max(dates)
+    return f'"{count:x}-{int(last_modified.timestamp() * 1_000_000):x}"', last_modified
+
+
+async def aconditional_response(request: HttpRequest, queryset: QuerySet,
+                                render: Callable[[], Awaitable[HttpResponse]],
+                                related: Sequence[str] = ()) -> HttpResponse:
+    """
+    Answer a request carrying the validators of the current objects of `queryset` and of their `related` objects
+    in `If-None-Match` or `If-Modified-Since` with a 304, without rendering. Otherwise return `render()` with its
+    ETag and Last-Modified. Empty querysets are always rendered, e.g. as a 404 for a missing detail.
+    """
+    etag, last_modified = await avalidators(queryset, related)
+    if etag is None:
+        return await render()
+    timestamp = int(last_modified.timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = await render()
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(timestamp)
+    return response
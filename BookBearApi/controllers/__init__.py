@@ -5,4 +5,5 @@ from .book_controller import BookController
 from .genre_controller import GenreController
 from .me_controller import MeController
 from .publisher_controller import PublisherController
+from .suggest_controller import SuggestController
 from .user_controller import UserController
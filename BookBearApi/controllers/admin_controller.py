@@ -1,4 +1,5 @@
 from http import HTTPStatus
+from typing import Optional
 
 from asgiref.sync import sync_to_async
 from django.db import IntegrityError
@@ -11,12 +12,17 @@ from ninja_extra import (
     permissions, route
 )
 
-from ..exceptions import NameAlreadyExistsException
+from ..async_auth import user_cache
+from ..catalog_import import CatalogImporter, FORMATS, guess_format, invalid_utf8_line
+from ..exceptions import InvalidImportEncodingException, InvalidImportFormatException, NameAlreadyExistsException
+from ..export import ndjson_response
+from ..feed import publish_book
+from ..images import areplace_image
 
-from BookBearApi.models import Book, Genre, Author, Publisher
+from BookBearApi.models import Book, Genre, Author, Publisher, User, UserBook
 from BookBearApi.schemas import BookSchema, CreateBookSchema, AuthorSchema, CreateAuthorSchema, \
     PublisherSchema, GenreSchema, CreateGenreSchema, UpdateBookSchema, UpdateAuthorSchema, CreatePublisherSchema, \
-    UpdatePublisherSchema
+    UpdatePublisherSchema, UserCacheStatsSchema, CatalogImportSchema, UserBookSchema, BookExportSchema
 
 
 @api_controller('/admin', tags=['admin'], permissions=[permissions.IsAdminUser])
@@ -30,8 +36,7 @@ class AdminController(ControllerBase):
         :return: BookSchema
         """
         publisher = await aget_object_or_404(Publisher, id=payload.publisher)
-        book = await Book.objects.acreate(cover=cover,
-                                          publisher=publisher,
+        book = await Book.objects.acreate(publisher=publisher,
                                           **payload.dict(exclude_unset=True,
                                                          exclude={'authors', 'genres', 'publisher'}))
         if payload.authors:
@@ -40,6 +45,9 @@ class AdminController(ControllerBase):
         if payload.genres:
             genres = [genre async for genre in Genre.objects.filter(id__in=payload.genres).all()]
             await book.genres.aadd(*genres)
+        if cover is not None:
+            await areplace_image(book, 'cover', cover)
+        await sync_to_async(publish_book)(book.pk)
         return HTTPStatus.CREATED, book
 
     @route.patch('/book/{int:book_id}', response=BookSchema)
@@ -80,9 +88,7 @@ class AdminController(ControllerBase):
         :return: BookSchema
         """
         book = await aget_object_or_404(Book, id=book_id)
-        await sync_to_async(book.cover.delete)()
-        book.cover = cover
-        await book.asave()
+        await areplace_image(book, 'cover', cover)
         return book
 
     @route.delete('/book/{int:book_id}/cover', response=BookSchema)
@@ -93,9 +99,7 @@ class AdminController(ControllerBase):
         :return: BookSchema
         """
         book = await aget_object_or_404(Book, id=book_id)
-        await sync_to_async(book.cover.delete)()
-        book.cover = None
-        await book.asave()
+        await areplace_image(book, 'cover', None)
         return book
 
     @route.delete('/book/{int:book_id}', response={204: None})
@@ -106,7 +110,6 @@ class AdminController(ControllerBase):
         :return: BookSchema
         """
         book = await aget_object_or_404(Book, id=book_id)
-        await sync_to_async(book.cover.delete)()
         await book.adelete()
         return HTTPStatus.NO_CONTENT, None
 
@@ -119,9 +122,11 @@ class AdminController(ControllerBase):
         :return: AuthorSchema
         """
         try:
-            author = await Author.objects.acreate(avatar=avatar, **payload.dict(exclude_unset=True))
+            author = await Author.objects.acreate(**payload.dict(exclude_unset=True))
         except IntegrityError:
             raise NameAlreadyExistsException(detail=f"Author with name '{payload.name}' already exists.")
+        if avatar is not None:
+            await areplace_image(author, 'avatar', avatar)
         return HTTPStatus.CREATED, author
 
     @route.patch('/author/{int:author_id}', response=AuthorSchema)
@@ -147,9 +152,7 @@ class AdminController(ControllerBase):
         :return: AuthorSchema
         """
         author = await aget_object_or_404(Author, id=author_id)
-        await sync_to_async(author.avatar.delete)()
-        author.avatar = avatar
-        await author.asave()
+        await areplace_image(author, 'avatar', avatar)
         return author
 
     @route.delete('/author/{int:author_id}/avatar', response=AuthorSchema)
@@ -160,9 +163,7 @@ class AdminController(ControllerBase):
         :return: AuthorSchema
         """
         author = await aget_object_or_404(Author, id=author_id)
-        await sync_to_async(author.avatar.delete)()
-        author.avatar = None
-        await author.asave()
+        await areplace_image(author, 'avatar', None)
         return author
 
     @route.delete('/author/{int:author_id}', response={204: None})
@@ -173,7 +174,6 @@ class AdminController(ControllerBase):
         :return: AuthorSchema
         """
         author = await aget_object_or_404(Author, id=author_id)
-        await sync_to_async(author.avatar.delete)()
         await author.adelete()
         return HTTPStatus.NO_CONTENT, None
 
@@ -186,9 +186,11 @@ class AdminController(ControllerBase):
         :return: PublisherSchema
         """
         try:
-            publisher = await Publisher.objects.acreate(logo=logo, **payload.dict(exclude_unset=True))
+            publisher = await Publisher.objects.acreate(**payload.dict(exclude_unset=True))
         except IntegrityError:
             raise NameAlreadyExistsException(detail=f"Publisher with name '{payload.name}' already exists.")
+        if logo is not None:
+            await areplace_image(publisher, 'logo', logo)
         return HTTPStatus.CREATED, publisher
 
     @route.patch('/publisher/{int:publisher_id}', response=PublisherSchema)
@@ -214,9 +216,7 @@ class AdminController(ControllerBase):
         :return: PublisherSchema
         """
         publisher = await aget_object_or_404(Publisher, id=publisher_id)
-        await sync_to_async(publisher.logo.delete)()
-        publisher.logo = logo
-        await publisher.asave()
+        await areplace_image(publisher, 'logo', logo)
         return publisher
 
     @route.delete('/publisher/{int:publisher_id}/logo', response=PublisherSchema)
@@ -227,9 +227,7 @@ class AdminController(ControllerBase):
         :return: PublisherSchema
         """
         publisher = await aget_object_or_404(Publisher, id=publisher_id)
-        await sync_to_async(publisher.logo.delete)()
-        publisher.logo = None
-        await publisher.asave()
+        await areplace_image(publisher, 'logo', None)
         return publisher
 
     @route.delete('/publisher/{int:publisher_id}', response={204: None})
@@ -240,7 +238,6 @@ class AdminController(ControllerBase):
         :return: PublisherSchema
         """
         publisher = await aget_object_or_404(Publisher, id=publisher_id)
-        await sync_to_async(publisher.logo.delete)()
         await publisher.adelete()
         return HTTPStatus.NO_CONTENT, None
 
@@ -281,3 +278,49 @@ class AdminController(ControllerBase):
         genre = await aget_object_or_404(Genre, id=genre_id)
         await genre.adelete()
         return HTTPStatus.NO_CONTENT, None
+
+    @route.get('/stats/user-cache', response=UserCacheStatsSchema)
+    async def get_user_cache_stats(self):
+        """
+        Get the hit/miss counters of the authenticated user cache of this worker.
+        :return: UserCacheStatsSchema
+        """
+        return user_cache.stats()
+
+    @route.post('/import/catalog', response=CatalogImportSchema)
+    async def import_catalog(self, file: File[UploadedFile], file_format: Optional[str] = None):
+        """
+        Import books, authors, publishers and genres from a NDJSON or CSV file.
+        :param file: File[UploadedFile]
+        :param file_format: ndjson or csv, guessed from the file extension by default
+        :return: CatalogImportSchema
+        """
+        file_format = file_format or guess_format(file.name)
+        if file_format not in FORMATS:
+            raise InvalidImportFormatException()
+        line = await sync_to_async(invalid_utf8_line)(file)
+        if line is not None:
+            raise InvalidImportEncodingException(f'Line {line} is not valid UTF-8.')
+        file.seek(0)
+        # The upload is read line by line, large files are spooled to disk by Django
+        lines = (line.decode('utf-8-sig') for line in file)
+        return await sync_to_async(CatalogImporter().run)(lines, file_format)
+
+    @route.get('/export/books')
+    async def export_books(self):
+        """
+        Stream the whole catalog as NDJSON, one BookExportSchema per line.
+        :return: StreamingHttpResponse
+        """
+        return ndjson_response(Book.objects.order_by('pk'), BookExportSchema, 'books.ndjson')
+
+    @route.get('/export/user/{int:user_id}/books')
+    async def export_user_books(self, user_id: int):
+        """
+        Stream the library of a user as NDJSON, one UserBookSchema per line.
+        :param user_id: int
+        :return: StreamingHttpResponse
+        """
+        user = await aget_object_or_404(User, id=user_id)
+        return ndjson_response(UserBook.objects.filter(user=user).order_by('pk'), UserBookSchema,
+                               f'user-{user.id}-books.ndjson')
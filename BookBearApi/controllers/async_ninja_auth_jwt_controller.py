@@ -21,6 +21,7 @@ from ..exceptions import EmailAlreadyExistsException
 
 from BookBearApi.models import User
 from BookBearApi.schemas import TokenRefreshOutputCookieSchema, UserSchema, CreateUserSchema
+from BookBearApi.users import aget_user
 
 load_dotenv()
 schema = SchemaControl()
@@ -48,7 +49,7 @@ class AsyncJWTAuthenticationController(ControllerBase):
         credentials.post_validate_schema()
         await django_alogin(self.context.request, credentials._user)
         kwargs = {
-            "user": credentials._user,
+            "user": await aget_user(credentials._user.pk),
             "access": credentials._access,
             "refresh": credentials._refresh if not settings.REFRESH_TOKEN_ON_COOKIE else "On Cookie",
         }
@@ -101,7 +102,7 @@ class AsyncJWTAuthenticationController(ControllerBase):
         Returns:
             JSON: The current user's details
         """
-        return self.context.request.user
+        return await aget_user(self.context.request.user.id)
 
 
 class AsyncPasswordResetController(ControllerBase):
@@ -254,7 +255,7 @@ class AsyncNinjaAuthJWTController(
             )
         except IntegrityError:
             raise EmailAlreadyExistsException()
-        return HTTPStatus.CREATED, user
+        return HTTPStatus.CREATED, await aget_user(user.id)
 
 
 class RefreshTokenNotOnCookieException(APIException):
@@ -9,8 +9,11 @@ from ninja_extra import (
     route, permissions
 )
 
+from BookBearApi.cache import detail_cache
+from BookBearApi.conditional import aconditional_response
 from BookBearApi.models import Author
-from BookBearApi.schemas import AuthorSchema, FilterAuthorSchema, AsyncPageNumberPagination, AuthorRelationshipSchema
+from BookBearApi.schemas import AuthorSchema, FilterAuthorSchema, AsyncPageNumberPagination, AuthorRelationshipSchema, \
+    eager_load
 
 
 @api_controller('/author', tags=['author'], permissions=[permissions.AllowAny], auth=None)
@@ -22,7 +25,7 @@ class AuthorController(ControllerBase):
         Get a list of authors.
         :return: List[AuthorSchema]
         """
-        return [author async for author in filters.filter(Author.objects.all())]
+        return eager_load(filters.filter(Author.objects.all()), AuthorRelationshipSchema)
 
     @route.get('/{int:author_id}', response=AuthorSchema)
     async def get_book(self, author_id: int):
@@ -31,4 +34,11 @@ class AuthorController(ControllerBase):
         :param author_id: int
         :return: AuthorSchema
         """
-        return await aget_object_or_404(Author, id=author_id)
+        return await aconditional_response(
+            self.context.request, Author.objects.filter(pk=author_id),
+            lambda: detail_cache.aresponse(
+                'author', author_id, AuthorSchema,
+                lambda: aget_object_or_404(eager_load(Author.objects.all(), AuthorSchema), id=author_id)
+            ),
+            related=('books',),
+        )
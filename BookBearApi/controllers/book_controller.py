@@ -1,5 +1,7 @@
 from typing import List
 
+from django.db.models import Q, Value
+from django.db.models.functions import Coalesce
 from django.shortcuts import aget_object_or_404
 from ninja import Query
 from ninja.pagination import paginate
@@ -10,21 +12,66 @@ from ninja_extra import (
 )
 from ninja_extra.ordering import ordering, Ordering
 
-from BookBearApi.models import Book
-from BookBearApi.schemas import BookSchema, FilterBookSchema, AsyncPageNumberPagination, BookRelationshipSchema
+from BookBearApi.cache import detail_cache
+from BookBearApi.conditional import aconditional_response
+from BookBearApi.models import Book, UserBook
+from BookBearApi.recommendations import similar_books
+from BookBearApi.search import get_search_index
+from BookBearApi.schemas import BookSchema, FilterBookSchema, AsyncPageNumberPagination, BookRelationshipSchema, \
+    ReviewBookSchema, ReviewOrder, eager_load, paginate_values
 
 
 @api_controller('/book', tags=['book'], permissions=[permissions.AllowAny], auth=None)
 class BookController(ControllerBase):
     @route.get('/', response=List[BookRelationshipSchema])
-    @paginate(AsyncPageNumberPagination)
+    @paginate_values(BookRelationshipSchema, conditional=True)
     @ordering(Ordering, ordering_fields=['id', 'title', 'score'])
     async def get_books(self, filters: FilterBookSchema = Query(...)):
         """
         Get a list of books.
         :return: List[BookSchema]
         """
-        return [book async for book in filters.filter(Book.objects.all())]
+        return filters.filter(Book.objects.all())
+
+    @route.get('/search', response=List[BookRelationshipSchema])
+    @paginate_values(BookRelationshipSchema)
+    async def search_books(self, q: str = Query(..., min_length=1, max_length=250)):
+        """
+        Search books by title, synopsis, author and publisher names, best matches first.
+        :param q: str
+        :return: List[BookRelationshipSchema]
+        """
+        return get_search_index().search(Book.objects.all(), q)
+
+    @route.get('/{int:book_id}/similar', response=List[BookRelationshipSchema])
+    @paginate_values(BookRelationshipSchema)
+    async def get_similar_books(self, book_id: int):
+        """
+        Get the books most often read and liked by the readers of a book, most similar first.
+        :param book_id: int
+        :return: List[BookRelationshipSchema]
+        """
+        return similar_books(book_id)
+
+    @route.get('/{int:book_id}/reviews', response=List[ReviewBookSchema])
+    @paginate(AsyncPageNumberPagination)
+    async def get_book_reviews(
+            self, book_id: int,
+            order: ReviewOrder = Query(ReviewOrder.RECENT, description='Most recent or best rated reviews first')
+    ):
+        """
+        Get the ratings and reviews of a book.
+        :param book_id: int
+        :param order: ReviewOrder
+        :return: List[ReviewBookSchema]
+        """
+        reviews = UserBook.objects.filter(Q(rating__isnull=False) | ~Q(review=''), book_id=book_id)
+        if order == ReviewOrder.RATING:
+            # Reviews without a rating last, the cursor cannot compare NULLs
+            reviews = reviews.annotate(rated=Coalesce('rating', Value(-1.0))).order_by('-rated', '-date_added', '-pk')
+        else:
+            reviews = reviews.order_by('-date_added', '-pk')
+        return eager_load(reviews, ReviewBookSchema)
 
     @route.get('/{int:book_id}', response=BookSchema)
     async def get_book(self, book_id: int):
@@ -33,4 +80,10 @@ class BookController(ControllerBase):
         :param book_id: int
         :return: BookSchema
         """
-        return await aget_object_or_404(Book, id=book_id)
+        return await aconditional_response(
+            self.context.request, Book.objects.filter(pk=book_id),
+            lambda: detail_cache.aresponse(
+                'book', book_id, BookSchema,
+                lambda: aget_object_or_404(eager_load(Book.objects.all(), BookSchema), id=book_id)
+            )
+        )
@@ -2,27 +2,28 @@ from typing import List
 
 from django.shortcuts import aget_object_or_404
 from ninja import Query
-from ninja.pagination import paginate
 from ninja_extra import (
     api_controller,
     ControllerBase,
     route, permissions
 )
 
+from BookBearApi.cache import detail_cache
+from BookBearApi.conditional import aconditional_response
 from BookBearApi.models import Genre
-from BookBearApi.schemas import GenreSchema, FilterGenreSchema, AsyncPageNumberPagination, GenreRelationshipSchema
+from BookBearApi.schemas import GenreSchema, FilterGenreSchema, GenreRelationshipSchema, eager_load, paginate_values
 
 
 @api_controller('/genre', tags=['genre'], permissions=[permissions.AllowAny], auth=None)
 class GenreController(ControllerBase):
     @route.get('/', response=List[GenreRelationshipSchema])
-    @paginate(AsyncPageNumberPagination)
+    @paginate_values(GenreRelationshipSchema, conditional=True)
     async def get_genres(self, filters: FilterGenreSchema = Query(...)):
         """
         Get a list of all genres.
         :return: List[GenreSchema]
         """
-        return [genre async for genre in filters.filter(Genre.objects.all())]
+        return filters.filter(Genre.objects.all())
 
     @route.get('/{int:genre_id}', response=GenreSchema)
     async def get_genre(self, genre_id: int):
@@ -31,4 +32,11 @@ class GenreController(ControllerBase):
         :param genre_id: int
         :return: GenreSchema
         """
-        return await aget_object_or_404(Genre, id=genre_id)
+        return await aconditional_response(
+            self.context.request, Genre.objects.filter(pk=genre_id),
+            lambda: detail_cache.aresponse(
+                'genre', genre_id, GenreSchema,
+                lambda: aget_object_or_404(eager_load(Genre.objects.all(), GenreSchema), id=genre_id)
+            ),
+            related=('books',),
+        )
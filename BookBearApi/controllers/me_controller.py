@@ -1,18 +1,32 @@
 from http import HTTPStatus
 from typing import List
 
-from asgiref.sync import sync_to_async
+from django.db import IntegrityError
 from django.shortcuts import aget_object_or_404
-from ninja import File
+from ninja import File, Query
 from ninja.files import UploadedFile
+from ninja.pagination import paginate
 from ninja_extra import (
     api_controller,
     ControllerBase,
     permissions, route
 )
+from ninja_extra.ordering import ordering, Ordering
 
-from BookBearApi.models import User, Book, UserBook, Genre, Author, Publisher
-from BookBearApi.schemas import UserSchema, UpdateUserSchema, UserBookSchema, CreateUserBookSchema, UpdateUserBookSchema
+from BookBearApi.exceptions import InvalidLibraryBatchException, InvalidLibraryImportException
+from BookBearApi.export import ndjson_response
+from BookBearApi.feed import afeed_books
+from BookBearApi.images import areplace_image
+from BookBearApi.library import aapply_library_batch
+from BookBearApi.library_import import astart_library_import
+from BookBearApi.models import Book, UserBook, Genre, Author, Publisher, LibraryImport
+from BookBearApi.recommendations import popular_books, recommended_books
+from BookBearApi.schemas import UserSchema, UpdateUserSchema, UserBookSchema, CreateUserBookSchema, \
+    UpdateUserBookSchema, UserStatsSchema, AsyncCursorPagination, AsyncPageNumberPagination, BookRelationshipSchema, \
+    UserBookBatchSchema, UserBookBatchResultSchema, LibraryImportSchema, AuthorRelationshipSchema, \
+    PublisherRelationshipSchema, GenreRelationshipSchema, FilterUserBookSchema, eager_load, paginate_values
+from BookBearApi.stats import aget_user_stats
+from BookBearApi.users import aget_user
 
 
 @api_controller('/me', tags=['me'], permissions=[permissions.IsAuthenticated])
@@ -23,7 +37,7 @@ class MeController(ControllerBase):
         Get the current user.
         :return: UserSchema
         """
-        return self.context.request.user
+        return await aget_user(self.context.request.user.id)
 
     @route.patch('/', response=UserSchema)
     async def update_me(self, payload: UpdateUserSchema):
@@ -36,23 +50,19 @@ class MeController(ControllerBase):
         for attr, value in payload.dict(exclude_unset=True).items():
             setattr(user, attr, value)
         await user.asave()
-        return user
+        return await aget_user(user.id)
 
     @route.post('/avatar', response=UserSchema)
     async def upload_avatar(self, avatar: File[UploadedFile]):
         user = self.context.request.user
-        await sync_to_async(user.avatar.delete)()
-        user.avatar = avatar
-        await user.asave()
-        return user
+        await areplace_image(user, 'avatar', avatar)
+        return await aget_user(user.id)
 
     @route.delete('/avatar', response=UserSchema)
     async def delete_avatar(self):
         user = self.context.request.user
-        await sync_to_async(user.avatar.delete)()
-        user.avatar = None
-        await user.asave()
-        return user
+        await areplace_image(user, 'avatar', None)
+        return await aget_user(user.id)
 
     @route.delete('/', response={204: None})
     async def delete_me(self):
@@ -64,14 +74,129 @@ class MeController(ControllerBase):
         await user.adelete()
         return HTTPStatus.NO_CONTENT, None
 
-    @route.get('/books', response=List[UserBookSchema])
-    async def get_user_books(self):
+    @route.get('/stats', response=UserStatsSchema)
+    async def get_stats(self):
+        """
+        Get the reading statistics of the current user.
+        :return: UserStatsSchema
+        """
+        return await aget_user_stats(self.context.request.user.id)
+
+    @route.get('/recommendations', response=List[BookRelationshipSchema])
+    @paginate_values(BookRelationshipSchema)
+    async def get_recommendations(self):
+        """
+        Get the books recommended to the current user, best first. Users without recommendations yet get the best
+        scored books.
+        :return: List[BookRelationshipSchema]
+        """
+        user_id = self.context.request.user.id
+        books = recommended_books(user_id)
+        if not await books.aexists():
+            return popular_books(user_id)
+        return books
+
+    @route.get('/feed', response=List[BookRelationshipSchema])
+    @paginate_values(BookRelationshipSchema, AsyncCursorPagination)
+    async def get_feed(self):
         """
-        Get the books of the current user.
+        Get the new books of the authors and publishers followed by the current user, newest first.
         :return: List[BookRelationshipSchema]
         """
-        user = await aget_object_or_404(User, id=self.context.request.user.id)
-        return [user_book async for user_book in user.reviewed_books.all()]
+        return await afeed_books(self.context.request.user.id)
+
+    @route.get('/books', response=List[UserBookSchema])
+    @paginate(AsyncPageNumberPagination)
+    @ordering(Ordering, ordering_fields=['situation', 'date_added'])
+    async def get_user_books(self, filters: FilterUserBookSchema = Query(...)):
+        """
+        Get the books of the current user, by situation and date added unless ordered otherwise.
+        :return: List[UserBookSchema]
+        """
+        # The default order reads the (user, situation, date_added) index
+        user_books = UserBook.objects.filter(user_id=self.context.request.user.id).order_by(
+            'situation', 'date_added', 'pk'
+        )
+        return eager_load(filters.filter(user_books), UserBookSchema)
+
+    @route.get('/authors', response=List[AuthorRelationshipSchema])
+    @paginate(AsyncPageNumberPagination)
+    async def get_user_authors(self):
+        """
+        Get the authors followed by the current user.
+        :return: List[AuthorRelationshipSchema]
+        """
+        authors = Author.objects.filter(followers=self.context.request.user.id).order_by('name')
+        return eager_load(authors, AuthorRelationshipSchema)
+
+    @route.get('/publishers', response=List[PublisherRelationshipSchema])
+    @paginate(AsyncPageNumberPagination)
+    async def get_user_publishers(self):
+        """
+        Get the publishers followed by the current user.
+        :return: List[PublisherRelationshipSchema]
+        """
+        publishers = Publisher.objects.filter(followers=self.context.request.user.id).order_by('name')
+        return eager_load(publishers, PublisherRelationshipSchema)
+
+    @route.get('/genres', response=List[GenreRelationshipSchema])
+    @paginate(AsyncPageNumberPagination)
+    async def get_user_genres(self):
+        """
+        Get the favorite genres of the current user.
+        :return: List[GenreRelationshipSchema]
+        """
+        genres = Genre.objects.filter(users=self.context.request.user.id).order_by('name')
+        return eager_load(genres, GenreRelationshipSchema)
+
+    @route.get('/books/export')
+    async def export_user_books(self):
+        """
+        Stream the books of the current user as NDJSON, one UserBookSchema per line.
+        :return: StreamingHttpResponse
+        """
+        user_books = UserBook.objects.filter(user_id=self.context.request.user.id).order_by('pk')
+        return ndjson_response(user_books, UserBookSchema, 'books.ndjson')
+
+    @route.post('/books/batch', response=UserBookBatchResultSchema)
+    async def batch_user_books(self, payload: UserBookBatchSchema):
+        """
+        Add, update and delete books of the current user in a single transaction. The batch is rejected as a
+        whole if any of its operations is invalid.
+        :param payload: UserBookBatchSchema
+        :return: UserBookBatchResultSchema
+        """
+        operations = [operation.dict(exclude_unset=True) for operation in payload.operations]
+        try:
+            return await aapply_library_batch(self.context.request.user.id, operations)
+        except IntegrityError:
+            # A concurrent request added one of the books after the batch was checked
+            raise InvalidLibraryBatchException(detail='The library changed while applying the batch, retry it.')
+
+    @route.post('/import', response={202: LibraryImportSchema})
+    async def import_library(self, file: File[UploadedFile]):
+        """
+        Import a Goodreads or StoryGraph CSV export into the library of the current user. The import runs in the
+        background, its progress is read from GET /me/import/{import_id}.
+        :param file: File[UploadedFile]
+        :return: LibraryImportSchema
+        """
+        try:
+            library_import = await astart_library_import(self.context.request.user.id, file)
+        except ValueError as e:
+            raise InvalidLibraryImportException(detail=str(e))
+        return HTTPStatus.ACCEPTED, library_import
+
+    @route.get('/import/{int:import_id}', response=LibraryImportSchema)
+    async def get_library_import(self, import_id: int):
+        """
+        Get the progress of an import of the current user.
+        :param import_id: int
+        :return: LibraryImportSchema
+        """
+        return await aget_object_or_404(
+            LibraryImport.objects.select_related('job'), id=import_id, user_id=self.context.request.user.id
+        )
 
     @route.post('/books/{int:book_id}', response=UserBookSchema)
     async def add_user_book(self, book_id: int, payload: CreateUserBookSchema):
@@ -123,7 +248,7 @@ class MeController(ControllerBase):
         user = self.context.request.user
         genre = await aget_object_or_404(Genre, id=genre_id)
         await genre.users.aadd(user)
-        return user
+        return await aget_user(user.id)
 
     @route.delete('/genres/{int:genre_id}', response=UserSchema)
     async def remove_user_genre(self, genre_id: int):
@@ -135,7 +260,7 @@ class MeController(ControllerBase):
         user = self.context.request.user
         genre = await aget_object_or_404(Genre, id=genre_id)
         await genre.users.aremove(user)
-        return user
+        return await aget_user(user.id)
 
     @route.post('/authors/{int:author_id}', response=UserSchema)
     async def add_user_author(self, author_id: int):
@@ -147,7 +272,7 @@ class MeController(ControllerBase):
         user = self.context.request.user
         author = await aget_object_or_404(Author, id=author_id)
         await author.followers.aadd(user)
-        return user
+        return await aget_user(user.id)
 
     @route.delete('/authors/{int:author_id}', response=UserSchema)
     async def remove_user_author(self, author_id: int):
@@ -159,7 +284,7 @@ class MeController(ControllerBase):
         user = self.context.request.user
         author = await aget_object_or_404(Author, id=author_id)
         await author.followers.aremove(user)
-        return user
+        return await aget_user(user.id)
 
     @route.post('/publishers/{int:publisher_id}', response=UserSchema)
     async def add_user_publisher(self, publisher_id: int):
@@ -171,7 +296,7 @@ class MeController(ControllerBase):
         user = self.context.request.user
         publisher = await aget_object_or_404(Publisher, id=publisher_id)
         await publisher.followers.aadd(user)
-        return user
+        return await aget_user(user.id)
 
     @route.delete('/publishers/{int:publisher_id}', response=UserSchema)
     async def remove_user_publisher(self, publisher_id: int):
@@ -183,4 +308,4 @@ class MeController(ControllerBase):
         user = self.context.request.user
         publisher = await aget_object_or_404(Publisher, id=publisher_id)
         await publisher.followers.aremove(user)
-        return user
+        return await aget_user(user.id)
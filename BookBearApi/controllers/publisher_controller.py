@@ -9,9 +9,11 @@ from ninja_extra import (
     route, permissions
 )
 
+from BookBearApi.cache import detail_cache
+from BookBearApi.conditional import aconditional_response
 from BookBearApi.models import Publisher
 from BookBearApi.schemas import PublisherSchema, FilterPublisherSchema, AsyncPageNumberPagination, \
-    PublisherRelationshipSchema
+    PublisherRelationshipSchema, eager_load
 
 
 @api_controller('/publisher', tags=['publisher'], permissions=[permissions.AllowAny], auth=None)
@@ -23,7 +25,7 @@ class PublisherController(ControllerBase):
         Get a list of publishers.
         :return: List[PublisherSchema]
         """
-        return [publisher async for publisher in filters.filter(Publisher.objects.all())]
+        return eager_load(filters.filter(Publisher.objects.all()), PublisherRelationshipSchema)
 
     @route.get('/{int:publisher_id}', response=PublisherSchema)
     async def get_publisher(self, publisher_id: int):
@@ -32,4 +34,11 @@ class PublisherController(ControllerBase):
         :param publisher_id: int
         :return: PublisherSchema
         """
-        return await aget_object_or_404(Publisher, id=publisher_id)
+        return await aconditional_response(
+            self.context.request, Publisher.objects.filter(pk=publisher_id),
+            lambda: detail_cache.aresponse(
+                'publisher', publisher_id, PublisherSchema,
+                lambda: aget_object_or_404(eager_load(Publisher.objects.all(), PublisherSchema), id=publisher_id)
+            ),
+            related=('books',),
+        )
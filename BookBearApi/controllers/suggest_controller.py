@@ -0,0 +1,27 @@
+from typing import List
+
+from ninja import Query
+from ninja_extra import (
+    api_controller,
+    ControllerBase,
+    route, permissions
+)
+
+from BookBearApi.schemas import SuggestionSchema, SuggestionKind
+from BookBearApi.suggest import suggestion_index
+
+
+@api_controller('/suggest', tags=['suggest'], permissions=[permissions.AllowAny], auth=None)
+class SuggestController(ControllerBase):
+    @route.get('/', response=List[SuggestionSchema])
+    async def suggest(self, q: str = Query(..., min_length=1, max_length=100),
+                      kinds: List[SuggestionKind] = Query(None), limit: int = Query(10, ge=1, le=50)):
+        """
+        Suggest authors, publishers, genres and book titles whose name or one of its words starts with the query.
+        :param q: str
+        :param kinds: List[SuggestionKind], every kind by default
+        :param limit: int
+        :return: List[SuggestionSchema]
+        """
+        await suggestion_index.aload_if_expired()
+        return suggestion_index.suggest(q, kinds, limit)
@@ -1,6 +1,6 @@
 from typing import List
 
-from django.shortcuts import aget_object_or_404
+from django.http import Http404
 from ninja import Query
 from ninja.pagination import paginate
 from ninja_extra import (
@@ -10,8 +10,11 @@ from ninja_extra import (
 )
 from ninja_extra.ordering import ordering, Ordering
 
-from BookBearApi.models import User
-from BookBearApi.schemas import UserSchema, FilterUserSchema, AsyncPageNumberPagination, UserRelationshipSchema
+from BookBearApi.models import User, UserBook
+from BookBearApi.schemas import UserSchema, FilterUserSchema, AsyncPageNumberPagination, UserRelationshipSchema, \
+    UserStatsSchema, UserBookSchema, FilterUserBookSchema, eager_load
+from BookBearApi.stats import aget_user_stats
+from BookBearApi.users import aget_user
 
 
 @api_controller('/user', tags=['user'], permissions=[permissions.AllowAny], auth=None)
@@ -24,7 +27,7 @@ class UserController(ControllerBase):
         Get a list of users.
         :return: List[UserSchema]
         """
-        return [user async for user in filters.filter(User.objects.all())]
+        return eager_load(filters.filter(User.objects.all()), UserRelationshipSchema)
 
     @route.get('/{int:user_id}', response=UserSchema)
     async def get_user(self, user_id: int):
@@ -33,4 +36,29 @@ class UserController(ControllerBase):
         :param user_id: int
         :return: UserSchema
         """
-        return await aget_object_or_404(User, id=user_id)
\ No newline at end of file
+        return await aget_user(user_id)
+
+    @route.get('/{int:user_id}/books', response=List[UserBookSchema])
+    @paginate(AsyncPageNumberPagination)
+    @ordering(Ordering, ordering_fields=['situation', 'date_added'])
+    async def get_user_books(self, user_id: int, filters: FilterUserBookSchema = Query(...)):
+        """
+        Get the books of a user, by situation and date added unless ordered otherwise.
+        :param user_id: int
+        :return: List[UserBookSchema]
+        """
+        # The default order reads the (user, situation, date_added) index
+        user_books = UserBook.objects.filter(user_id=user_id).order_by('situation', 'date_added', 'pk')
+        return eager_load(filters.filter(user_books), UserBookSchema)
+
+    @route.get('/{int:user_id}/stats', response=UserStatsSchema)
+    async def get_user_stats(self, user_id: int):
+        """
+        Get the reading statistics of a user.
+        :param user_id: int
+        :return: UserStatsSchema
+        """
+        stats = await aget_user_stats(user_id)
+        if stats is None:
+            raise Http404
+        return stats
@@ -11,4 +11,29 @@ class EmailAlreadyExistsException(APIException):
 class NameAlreadyExistsException(APIException):
     status_code = HTTPStatus.CONFLICT
     default_detail = "Name already exists in the system."
-    default_code = "name_already_exists"
\ No newline at end of file
+    default_code = "name_already_exists"
+
+class InvalidCursorException(APIException):
+    status_code = HTTPStatus.BAD_REQUEST
+    default_detail = "Invalid pagination cursor."
+    default_code = "invalid_cursor"
+
+class InvalidImportFormatException(APIException):
+    status_code = HTTPStatus.BAD_REQUEST
+    default_detail = "Unsupported import format, use ndjson or csv."
+    default_code = "invalid_import_format"
+
+class InvalidImportEncodingException(APIException):
+    status_code = HTTPStatus.BAD_REQUEST
+    default_detail = "Imports must be encoded in UTF-8."
+    default_code = "invalid_import_encoding"
+
+class InvalidLibraryBatchException(APIException):
+    status_code = HTTPStatus.BAD_REQUEST
+    default_detail = "Invalid library batch."
+    default_code = "invalid_library_batch"
+
+class InvalidLibraryImportException(APIException):
+    status_code = HTTPStatus.BAD_REQUEST
+    default_detail = "Unsupported export, upload the CSV export of Goodreads or StoryGraph."
+    default_code = "invalid_library_import"
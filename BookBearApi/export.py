@@ -0,0 +1,57 @@
+from typing import AsyncIterator, Iterator, Type
+
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from ninja import Schema
+
+from .schemas import eager_load
+
+# Rows fetched per database round trip, prefetches included
+EXPORT_CHUNK_SIZE = 2000
+# Rendered lines are sent in blocks of about this many bytes instead of one by one
+EXPORT_BUFFER_SIZE = 64 * 1024
+
+
+def _render(schema: Type[Schema], instance) -> bytes:
+    return schema.from_orm(instance).model_dump_json().encode() + b'\n'
+
+
+def export_ndjson(queryset: QuerySet, schema: Type[Schema], chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Yield `queryset` as NDJSON lines shaped like `schema`, keeping at most `chunk_size` rows in memory.
+
+    Rows are read with iterator(), which uses a server-side cursor on PostgreSQL, and the relations the schema
+    renders are prefetched chunk by chunk.
+    """
+    buffer = bytearray()
+    for instance in eager_load(queryset, schema).iterator(chunk_size=chunk_size):
+        buffer += _render(schema, instance)
+        if len(buffer) >= EXPORT_BUFFER_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+async def aexport_ndjson(queryset: QuerySet, schema: Type[Schema],
+                         chunk_size: int = EXPORT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """
+    Asynchronous version of `export_ndjson`, reading the rows with aiterator().
+    """
+    buffer = bytearray()
+    async for instance in eager_load(queryset, schema).aiterator(chunk_size=chunk_size):
+        buffer += _render(schema, instance)
+        if len(buffer) >= EXPORT_BUFFER_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def ndjson_response(queryset: QuerySet, schema: Type[Schema], filename: str) -> StreamingHttpResponse:
+    """
+    Stream `queryset` as a NDJSON attachment.
+    """
+    response = StreamingHttpResponse(aexport_ndjson(queryset, schema), content_type='application/x-ndjson')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
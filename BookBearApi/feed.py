@@ -0,0 +1,92 @@
+from typing import Dict, List
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+
+from .jobs import enqueue, job
+from .models import Book, FeedEntry, FeedSource, Job, User
+
+# Follow relation of the users for every kind of feed source
+FOLLOWS = {
+    'author': (User.followed_authors.through, 'author_id'),
+    'publisher': (User.followed_publishers.through, 'publisher_id'),
+}
+
+
+def publish_book(book_id: int) -> Job:
+    """
+    Queue the delivery of a new book to the feeds of the followers of its authors and publisher.
+    """
+    return enqueue('feed.publish', book_id=book_id)
+
+
+def _followers(sources: Dict[str, List[int]]) -> QuerySet:
+    condition = Q()
+    for kind, pks in sources.items():
+        through, column = FOLLOWS[kind]
+        condition |= Q(pk__in=through.objects.filter(**{f'{column}__in': pks}).values('user_id'))
+    return User.objects.filter(condition)
+
+
+@job('feed.publish')
+def fan_out_book(current: Job, book_id: int) -> None:
+    """
+    Split the followers of the sources of the book into batches of FEED_FANOUT_BATCH_SIZE users, each delivered
+    by its own job. Sources with more than FEED_FANOUT_MAX_FOLLOWERS followers are recorded as FeedSource instead.
+    """
+    publisher_id = Book.objects.filter(pk=book_id).values_list('publisher_id', flat=True).first()
+    sources = {
+        'author': list(Book.authors.through.objects.filter(book_id=book_id).values_list('author_id', flat=True)),
+        'publisher': [publisher_id] if publisher_id is not None else [],
+    }
+    pushed = {'author': [], 'publisher': []}
+    for kind, pks in sources.items():
+        through, column = FOLLOWS[kind]
+        for pk in pks:
+            if through.objects.filter(**{column: pk}).count() > settings.FEED_FANOUT_MAX_FOLLOWERS:
+                FeedSource.objects.get_or_create(book_id=book_id, **{column: pk})
+            else:
+                pushed[kind].append(pk)
+    if not any(pushed.values()):
+        return
+
+    batch_size = settings.FEED_FANOUT_BATCH_SIZE
+    user_ids = _followers(pushed).order_by('pk').values_list('pk', flat=True)
+    first_user = None
+    for index, user_id in enumerate(user_ids.iterator(chunk_size=batch_size)):
+        if index % batch_size == 0:
+            if first_user is not None:
+                enqueue('feed.deliver', book_id=book_id, sources=pushed, first_user=first_user, last_user=previous)
+            first_user = user_id
+        previous = user_id
+    if first_user is not None:
+        enqueue('feed.deliver', book_id=book_id, sources=pushed, first_user=first_user, last_user=previous)
+
+
+@job('feed.deliver')
+def deliver_book(current: Job, book_id: int, sources: Dict[str, List[int]], first_user: int, last_user: int) -> None:
+    """
+    Push the book to the feeds of the followers of `sources` whose id is between first_user and last_user.
+    """
+    if not Book.objects.filter(pk=book_id).exists():
+        return
+    user_ids = _followers(sources).filter(pk__gte=first_user, pk__lte=last_user).values_list('pk', flat=True)
+    FeedEntry.objects.bulk_create(
+        [FeedEntry(user_id=user_id, book_id=book_id) for user_id in user_ids], ignore_conflicts=True
+    )
+
+
+async def afeed_books(user_id: int) -> QuerySet:
+    """
+    Return the books of the feed of the user, newest first: the books pushed to it and the books of the followed
+    sources that are pulled on read.
+    """
+    pulled = FeedSource.objects.filter(
+        Q(author_id__in=User.followed_authors.through.objects.filter(user_id=user_id).values('author_id'))
+        | Q(publisher_id__in=User.followed_publishers.through.objects.filter(user_id=user_id).values('publisher_id'))
+    )
+    if not await pulled.aexists():
+        # Most users follow no pulled source, their pages are a range of the (user, book) index of FeedEntry
+        return Book.objects.filter(feed_entries__user_id=user_id).order_by('-pk')
+    pushed = FeedEntry.objects.filter(user_id=user_id).values('book_id')
+    return Book.objects.filter(Q(pk__in=pushed) | Q(pk__in=pulled.values('book_id'))).order_by('-pk')
@@ -0,0 +1,255 @@
+import logging
+import os
+from datetime import timedelta
+from io import BytesIO
+from typing import Dict, List, Optional
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.db import models, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .jobs import enqueue, job
+from .models import Author, Book, Job, Publisher, User
+from .storage import asave_file, delete_files, delete_on_commit, name_hash
+
+logger = logging.getLogger(__name__)
+
+# Longest side in pixels of every rendition, smaller images are not upscaled
+RENDITION_SIZES = {
+    'thumb': 160,
+    'medium': 480,
+    'large': 1200,
+}
+# Pillow format and save options of every rendition format
+RENDITION_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+# Rendition stored in the `<field>_thumb` column and shown in the relationship schemas
+THUMB = ('thumb', 'webp')
+# Image fields with renditions
+IMAGE_FIELDS = ((Author, 'avatar'), (Publisher, 'logo'), (Book, 'cover'), (User, 'avatar'))
+
+
+def _renditions_field(field: str) -> str:
+    return f'{field}_renditions'
+
+
+def _thumb_field(field: str) -> str:
+    return f'{field}_thumb'
+
+
+def _rendition_names(renditions: Dict[str, Dict[str, str]]) -> List[str]:
+    return [path for formats in renditions.values() for path in formats.values()]
+
+
+def render(image: Image.Image, size: int, file_format: str) -> bytes:
+    """
+    Encode `image` resized to fit in a `size` pixels square.
+
+    Only the pixels are written: EXIF, ICC profiles and other metadata are dropped once the EXIF orientation
+    has been applied.
+    """
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((size, size), Image.Resampling.LANCZOS)
+    pillow_format, options = RENDITION_FORMATS[file_format]
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    if pillow_format == 'JPEG' and has_alpha:
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        image = image.convert('RGBA')
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+    output = BytesIO()
+    image.save(output, pillow_format, **options)
+    return output.getvalue()
+
+
+def queue_renditions(instance: models.Model, field: str) -> Optional[Job]:
+    """
+    Queue the rendering of the image `field` of a saved `instance`, if it has one.
+    """
+    image = getattr(instance, field)
+    if not image:
+        return None
+    return enqueue('images.render', model=instance._meta.label, pk=instance.pk, field=field, path=image.name)
+
+
+def delete_renditions(instance: models.Model, field: str) -> None:
+    """
+    Delete the rendition files of the image `field` of `instance` once the transaction commits and forget them,
+    without saving it.
+    """
+    renditions = getattr(instance, _renditions_field(field))
+    if instance.pk is not None:
+        # The instance may predate the rendering job, e.g. a cached request.user
+        stored = type(instance).objects.filter(pk=instance.pk).values_list(_renditions_field(field), flat=True)
+        renditions = stored.first() or renditions
+    delete_on_commit(instance._meta.get_field(field).storage, _rendition_names(renditions))
+    setattr(instance, _renditions_field(field), {})
+    setattr(instance, _thumb_field(field), None)
+
+
+def delete_image(instance: models.Model, field: str) -> None:
+    """
+    Delete the image `field` of `instance` and its renditions from the storage once the transaction commits,
+    without saving it.
+    """
+    image = getattr(instance, field)
+    delete_on_commit(image.storage, [image.name])
+    setattr(instance, field, None)
+    delete_renditions(instance, field)
+
+
+def _upload_name(instance: models.Model, field: str, upload) -> str:
+    return instance._meta.get_field(field).generate_filename(instance, upload.name)
+
+
+def set_image(instance: models.Model, field: str, name: Optional[str]) -> None:
+    """
+    Save `name`, a file already stored, or None as the image `field` of `instance` and queue its rendering. The
+    previous image and its renditions are deleted once the change commits.
+    """
+    with transaction.atomic():
+        delete_image(instance, field)
+        setattr(instance, field, name)
+        instance.save()
+        queue_renditions(instance, field)
+
+
+def replace_image(instance: models.Model, field: str, upload) -> None:
+    """
+    Store `upload`, or nothing if None, as the image `field` of `instance` in place of the current one, save
+    the instance and queue the rendering of the new image.
+    """
+    storage = instance._meta.get_field(field).storage
+    name = None
+    if upload is not None:
+        name = storage.save(_upload_name(instance, field, upload), upload, instance._meta.get_field(field).max_length)
+    try:
+        set_image(instance, field, name)
+    except BaseException:
+        delete_files(storage, [name])
+        raise
+
+
+async def areplace_image(instance: models.Model, field: str, upload) -> None:
+    """
+    Async replace_image: the upload is written by the storage thread pool before the instance is saved, and
+    removed again if the save fails.
+    """
+    storage = instance._meta.get_field(field).storage
+    name = None
+    if upload is not None:
+        name = await asave_file(
+            storage, _upload_name(instance, field, upload), upload, instance._meta.get_field(field).max_length
+        )
+    try:
+        await sync_to_async(set_image)(instance, field, name)
+    except BaseException:
+        delete_files(storage, [name])
+        raise
+
+
+def rehash_image(instance: models.Model, field: str) -> bool:
+    """
+    Store the image `field` of `instance` again under the hash of its content if it was stored before the names
+    were hashed, save the instance and queue the rendering of its renditions. Return whether it was renamed.
+    """
+    image = getattr(instance, field)
+    if not image or name_hash(image.name) is not None:
+        return False
+    try:
+        with image.storage.open(image.name) as file:
+            name = image.storage.save(image.name, file, max_length=image.field.max_length)
+    except FileNotFoundError:
+        logger.warning('Cannot rehash missing %s %s', instance._meta.label, image.name)
+        return False
+    set_image(instance, field, name)
+    return True
+
+
+def sweep_media(min_age: timedelta) -> List[str]:
+    """
+    Delete the files of the image directories that no image field or rendition refers to and that were last
+    modified more than `min_age` ago, returning their names.
+
+    Uploads are written before the rows referring to them and renditions before they are recorded: `min_age`
+    keeps the sweep away from the files of the changes in progress.
+    """
+    referenced = set()
+    directories = {}
+    for model, field in IMAGE_FIELDS:
+        columns = (field, _thumb_field(field), _renditions_field(field))
+        for image, thumb, renditions in model.objects.values_list(*columns).iterator(chunk_size=2000):
+            referenced.update((image, thumb, *_rendition_names(renditions)))
+        for column in columns[:2]:
+            model_field = model._meta.get_field(column)
+            directories[model_field.upload_to] = model_field.storage
+
+    deleted = []
+    cutoff = timezone.now() - min_age
+    for directory, storage in directories.items():
+        try:
+            names = storage.listdir(directory)[1]
+        except FileNotFoundError:
+            continue
+        for filename in names:
+            name = f'{directory}/{filename}'
+            if name not in referenced and storage.get_modified_time(name) < cutoff:
+                storage.delete(name)
+                deleted.append(name)
+    return deleted
+
+
+@job('images.render')
+def render_image(current: Job, model: str, pk: int, field: str, path: str) -> None:
+    """
+    Store every RENDITION_SIZES x RENDITION_FORMATS rendition of the image at `path` and record them on the
+    instance, unless the image was replaced in the meantime.
+    """
+    model_class = apps.get_model(model)
+    instance = model_class.objects.filter(pk=pk).first()
+    if instance is None or getattr(instance, field).name != path:
+        return
+    storage = instance._meta.get_field(field).storage
+    try:
+        with storage.open(path) as file, Image.open(file) as image:
+            image.load()
+            encoded = {
+                size_name: {file_format: render(image, size, file_format) for file_format in RENDITION_FORMATS}
+                for size_name, size in RENDITION_SIZES.items()
+            }
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        # Retrying cannot fix an unreadable upload
+        logger.warning('Cannot render %s %s: %s', model, path, e)
+        return
+
+    directory, filename = os.path.split(path)
+    stem = os.path.splitext(filename)[0]
+    if name_hash(filename) is not None:
+        # The renditions are named after their own content
+        stem = stem.rsplit('.', 1)[0]
+    renditions: Dict[str, Dict[str, str]] = {
+        size_name: {
+            file_format: storage.save(f'{directory}/renditions/{stem}_{size_name}.{file_format}', ContentFile(data))
+            for file_format, data in formats.items()
+        }
+        for size_name, formats in encoded.items()
+    }
+
+    with transaction.atomic():
+        instance = model_class.objects.select_for_update().filter(pk=pk).first()
+        if instance is None or getattr(instance, field).name != path:
+            obsolete = renditions
+        else:
+            obsolete = getattr(instance, _renditions_field(field))
+            setattr(instance, _renditions_field(field), renditions)
+            setattr(instance, _thumb_field(field), renditions[THUMB[0]][THUMB[1]])
+            # Saved through the model, so the cached details showing the image are invalidated
+            instance.save(update_fields=[_renditions_field(field), _thumb_field(field)])
+        delete_on_commit(storage, _rendition_names(obsolete))
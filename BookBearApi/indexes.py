@@ -0,0 +1,16 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.db.models import Index
+
+
+class SearchVectorIndex(GinIndex):
+    """
+    GIN index of a search vector on PostgreSQL.
+
+    The other databases have no GIN indexes and get a plain index of the column instead, which stays empty there:
+    their full-text index is kept apart by BookBearApi.search.
+    """
+
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return Index.create_sql(self, model, schema_editor, using=using, **kwargs)
+        return super().create_sql(model, schema_editor, using=using, **kwargs)
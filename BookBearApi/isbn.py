@@ -0,0 +1,40 @@
+import re
+from typing import Optional
+
+
+def _isbn13_check_digit(digits: str) -> str:
+    total = sum(int(digit) * (3 if index % 2 else 1) for index, digit in enumerate(digits[:12]))
+    return str((10 - total % 10) % 10)
+
+
+def _is_valid_isbn10(digits: str) -> bool:
+    if not (digits[:9].isdigit() and (digits[9].isdigit() or digits[9] == 'X')):
+        return False
+    values = [int(digit) for digit in digits[:9]] + [10 if digits[9] == 'X' else int(digits[9])]
+    return sum((10 - index) * value for index, value in enumerate(values)) % 11 == 0
+
+
+def normalize_isbn(value: Optional[str]) -> Optional[str]:
+    """
+    Return the ISBN-13 of an ISBN-10 or ISBN-13, written with or without hyphens, spaces or the `="..."` quoting
+    of spreadsheet exports, or None if `value` is not a valid ISBN.
+    """
+    digits = re.sub(r'[^0-9X]', '', (value or '').upper())
+    if len(digits) == 10 and _is_valid_isbn10(digits):
+        digits = '978' + digits[:9]
+        return digits + _isbn13_check_digit(digits)
+    if len(digits) == 13 and digits.isdigit() and _isbn13_check_digit(digits) == digits[12]:
+        return digits
+    return None
+
+
+def clean_isbn(value: str) -> str:
+    """
+    Validator of the ISBN fields of the schemas: normalize `value`, which may be blank.
+    """
+    if not value.strip():
+        return ''
+    isbn = normalize_isbn(value)
+    if isbn is None:
+        raise ValueError('Invalid ISBN')
+    return isbn
@@ -0,0 +1,148 @@
+import logging
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, Callable, Dict, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Job functions by name, called with the Job and its payload as keyword arguments
+JOBS: Dict[str, Callable[..., Any]] = {}
+
+
+def job(name: str) -> Callable:
+    """
+    Register the decorated function as the job `name`.
+    """
+    def decorator(function: Callable) -> Callable:
+        JOBS[name] = function
+        return function
+    return decorator
+
+
+def enqueue(name: str, **payload: Any) -> Job:
+    """
+    Queue the job `name` with a JSON serializable `payload`.
+
+    The job is stored in the current transaction, so it only runs if the transaction commits, and the workers
+    are woken up once it does.
+    """
+    if name not in JOBS:
+        raise ValueError(f"Unknown job '{name}'")
+    queued = Job.objects.create(name=name, payload=payload)
+    transaction.on_commit(job_workers.wake)
+    return queued
+
+
+def _claimable(now) -> Q:
+    """
+    Pending jobs whose retry delay is over, and running jobs whose worker did not finish them within
+    JOB_LEASE_SECONDS, e.g. because its process was stopped.
+    """
+    expired_lease = now - timedelta(seconds=settings.JOB_LEASE_SECONDS)
+    return Q(status=Job.PENDING, available_at__lte=now) | Q(status=Job.RUNNING, started_at__lt=expired_lease)
+
+
+def claim_next_job() -> Optional[Job]:
+    """
+    Mark the oldest claimable job as running and return it, None if there is none.
+
+    Running jobs whose lease expired are claimed again, unless they used all their attempts: those are marked as
+    failed instead, so a job stopping its worker every time is not run forever.
+    """
+    while True:
+        now = timezone.now()
+        row = Job.objects.filter(_claimable(now)).order_by('pk').values_list('pk', 'status', 'attempts').first()
+        if row is None:
+            return None
+        pk, status, attempts = row
+        # Another worker may claim the same job in between, only one of the updates matches
+        claimable = Job.objects.filter(_claimable(now), pk=pk, status=status, attempts=attempts)
+        if status == Job.RUNNING and attempts >= settings.JOB_MAX_ATTEMPTS:
+            claimable.update(status=Job.FAILED, error='The lease of the job expired before it finished.',
+                             finished_at=now)
+            continue
+        claimed = claimable.update(status=Job.RUNNING, started_at=now, attempts=F('attempts') + 1)
+        if claimed:
+            return Job.objects.get(pk=pk)
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """
+    Return how long a job that failed `attempts` times waits before its next attempt, doubling every time.
+    """
+    return timedelta(seconds=settings.JOB_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def run_job(claimed: Job) -> None:
+    # Only the worker holding the lease updates the job, a worker that outlived it was replaced
+    lease = Job.objects.filter(pk=claimed.pk, status=Job.RUNNING, started_at=claimed.started_at)
+    try:
+        JOBS[claimed.name](claimed, **claimed.payload)
+    except Exception:
+        logger.exception('Job %s (%s) failed', claimed.pk, claimed.name)
+        retry = claimed.attempts < settings.JOB_MAX_ATTEMPTS
+        now = timezone.now()
+        lease.update(
+            status=Job.PENDING if retry else Job.FAILED,
+            error=traceback.format_exc(),
+            available_at=now + retry_delay(claimed.attempts) if retry else F('available_at'),
+            finished_at=None if retry else now,
+        )
+    else:
+        lease.update(status=Job.DONE, error='', finished_at=timezone.now())
+
+
+def run_pending_jobs(limit: Optional[int] = None) -> int:
+    """
+    Run the pending jobs one after the other until there is none left or `limit` ran, returning their number.
+    """
+    count = 0
+    while limit is None or count < limit:
+        claimed = claim_next_job()
+        if claimed is None:
+            break
+        run_job(claimed)
+        count += 1
+    return count
+
+
+class JobWorkers:
+    """
+    Per-process pool of JOB_WORKERS threads draining the job queue when woken up after a job is queued.
+
+    Jobs are stored in the database, so the ones queued while JOB_WORKERS is 0 and the failed attempts waiting
+    for their retry are run by the next wake up after they become available, or by `manage.py run_jobs`. The
+    jobs left running by a stopped process are claimed again once their lease of JOB_LEASE_SECONDS expires.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def wake(self) -> None:
+        if settings.JOB_WORKERS <= 0:
+            return
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=settings.JOB_WORKERS, thread_name_prefix='job')
+        self._executor.submit(self._drain)
+
+    @staticmethod
+    def _drain() -> None:
+        close_old_connections()
+        try:
+            run_pending_jobs()
+        finally:
+            connection.close()
+
+
+job_workers = JobWorkers()
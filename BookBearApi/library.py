@@ -0,0 +1,103 @@
+from typing import Any, Dict, List
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import FilteredRelation, Q
+
+from .exceptions import InvalidLibraryBatchException
+from .models import Book, UserBook, UserStats
+from .signals import book_keys, touch_details
+from .stats import rebuild_user_stats
+
+CREATE = 'create'
+UPDATE = 'update'
+DELETE = 'delete'
+ENTRY_FIELDS = ('situation', 'rating', 'review')
+
+
+def _library_entries(user_id: int, book_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Return the existing books among `book_ids` with the library entry of the user for each of them, or None,
+    in a single query.
+    """
+    rows = Book.objects.filter(pk__in=set(book_ids)).annotate(
+        entry=FilteredRelation('reviews', condition=Q(reviews__user_id=user_id))
+    ).values_list('pk', 'entry__id', *(f'entry__{field}' for field in ENTRY_FIELDS))
+    return {
+        book_id: dict(zip(('pk', *ENTRY_FIELDS), entry)) if entry[0] is not None else None
+        for book_id, *entry in rows
+    }
+
+
+def _validate(operations: List[Dict[str, Any]], entries: Dict[int, Dict[str, Any]]) -> None:
+    errors = {}
+    seen = set()
+    for index, operation in enumerate(operations):
+        book_id = operation['book']
+        if book_id in seen:
+            error = 'Book already changed by a previous operation of the batch.'
+        elif book_id not in entries:
+            error = 'Book not found.'
+        elif operation['op'] == CREATE and entries[book_id] is not None:
+            error = 'Book already in the library.'
+        elif operation['op'] != CREATE and entries[book_id] is None:
+            error = 'Book not in the library.'
+        else:
+            error = None
+        seen.add(book_id)
+        if error is not None:
+            errors[str(index)] = [error]
+    if errors:
+        raise InvalidLibraryBatchException(
+            detail={'detail': InvalidLibraryBatchException.default_detail, 'operations': errors}
+        )
+
+
+def apply_library_batch(user_id: int, operations: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Apply a list of create, update and delete operations to the library of the user in a single transaction, and
+    return the number of entries created, updated and deleted.
+
+    Every operation is a dict with `op`, `book` and the entry fields to set. The whole batch is checked against
+    the books and the library in one query and rejected with InvalidLibraryBatchException if any operation is
+    invalid. The created and updated entries are then written in bulk without the UserBook signals: the rating
+    totals of their books are recomputed once per book, and the cached details and statistics refreshed once for
+    the batch. The deleted entries go through the UserBook signals like any other deletion.
+    """
+    with transaction.atomic():
+        entries = _library_entries(user_id, [operation['book'] for operation in operations])
+        _validate(operations, entries)
+
+        created, updated, deleted = [], [], []
+        rated_books = set()
+        for operation in operations:
+            book_id = operation['book']
+            fields = {field: operation[field] for field in ENTRY_FIELDS if field in operation}
+            entry = entries[book_id]
+            if operation['op'] == CREATE:
+                created.append(UserBook(user_id=user_id, book_id=book_id, **fields))
+                changed = fields.get('rating') is not None
+            elif operation['op'] == UPDATE:
+                updated.append(UserBook(user_id=user_id, book_id=book_id, **{**entry, **fields}))
+                changed = 'rating' in fields and fields['rating'] != entry['rating']
+            else:
+                deleted.append(entry['pk'])
+                changed = False
+            if changed:
+                rated_books.add(book_id)
+
+        UserBook.objects.bulk_create(created, batch_size=500)
+        UserBook.objects.bulk_update(updated, ENTRY_FIELDS, batch_size=500)
+        # The post_delete receivers remove the ratings of the deleted entries and touch their books
+        UserBook.objects.filter(pk__in=deleted).delete()
+        if rated_books:
+            Book.objects.filter(pk__in=rated_books).rebuild_ratings()
+
+        touch_details(book_keys(rated_books))
+        # Statistics never built are built from the library on first read
+        if UserStats.objects.filter(user_id=user_id).exists():
+            rebuild_user_stats([user_id])
+    return {'created': len(created), 'updated': len(updated), 'deleted': len(deleted)}
+
+
+aapply_library_batch = sync_to_async(apply_library_batch)
@@ -0,0 +1,288 @@
+import csv
+import io
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.utils import timezone
+
+from .isbn import normalize_isbn
+from .jobs import enqueue, job
+from .library import CREATE, UPDATE, apply_library_batch
+from .models import Book, Job, LibraryImport, UserBook
+from .titles import text_key, title_keys
+
+# Largest accepted export, about 20k books of Goodreads with reviews
+MAX_IMPORT_SIZE = 10 * 1024 * 1024
+# Columns telling the source of an export apart
+SOURCE_COLUMNS = {
+    LibraryImport.GOODREADS: 'Exclusive Shelf',
+    LibraryImport.STORYGRAPH: 'Read Status',
+}
+# Situation of the books per Goodreads exclusive shelf and StoryGraph read status, other shelves are pending
+SITUATIONS = {
+    'read': UserBook.COMPLETED,
+    'currently-reading': UserBook.READING,
+    'to-read': UserBook.PENDING,
+    'did-not-finish': UserBook.ABANDONED,
+    'paused': UserBook.STOPPED,
+}
+IDS_PER_QUERY = 500
+
+
+def detect_source(fieldnames: Optional[List[str]]) -> Optional[str]:
+    """
+    Return the service the CSV export with the columns `fieldnames` comes from, if supported.
+    """
+    for source, column in SOURCE_COLUMNS.items():
+        if column in (fieldnames or ()):
+            return source
+    return None
+
+
+@dataclass
+class LibraryRow:
+    line: int
+    title: str
+    authors: List[str]
+    isbns: List[str]
+    situation: str
+    rating: Optional[float] = None
+    review: str = ''
+
+
+def _split_authors(*values: Optional[str]) -> List[str]:
+    return [name.strip() for value in values for name in (value or '').split(',') if name.strip()]
+
+
+def _rating(value: Optional[str]) -> Optional[float]:
+    try:
+        rating = float(value) if value else None
+    except ValueError:
+        raise ValueError(f"Invalid rating '{value}'")
+    if rating is not None and not 0 <= rating <= 5:
+        raise ValueError(f'Rating {value} is not between 0 and 5')
+    # Goodreads exports the books without a rating with 0 stars
+    return rating or None
+
+
+def read_library_rows(content: str, source: str) -> Iterator[Tuple[int, Union[LibraryRow, str]]]:
+    """
+    Yield the line number and the parsed row of every book of a Goodreads or StoryGraph CSV export, or the error
+    message of the rows that cannot be read.
+    """
+    reader = csv.DictReader(io.StringIO(content))
+    for row in reader:
+        row = {key: (value or '').strip() for key, value in row.items() if key}
+        if source == LibraryImport.GOODREADS:
+            authors = _split_authors(row.get('Author'), row.get('Additional Authors'))
+            isbns = [row.get('ISBN13'), row.get('ISBN')]
+            status, rating, review = row.get('Exclusive Shelf'), row.get('My Rating'), row.get('My Review')
+        else:
+            authors = _split_authors(row.get('Authors'))
+            isbns = [row.get('ISBN/UID')]
+            status, rating, review = row.get('Read Status'), row.get('Star Rating'), row.get('Review')
+        if not row.get('Title'):
+            yield reader.line_num, 'Missing title'
+            continue
+        try:
+            rating = _rating(rating)
+        except ValueError as e:
+            yield reader.line_num, str(e)
+            continue
+        yield reader.line_num, LibraryRow(
+            line=reader.line_num,
+            title=row['Title'],
+            authors=authors,
+            isbns=[isbn for isbn in map(normalize_isbn, isbns) if isbn],
+            situation=SITUATIONS.get(status, UserBook.PENDING),
+            rating=rating,
+            review=review or '',
+        )
+
+
+class BookLookup:
+    """
+    In-memory index of the catalog books an import may refer to, by ISBN and by title and author.
+
+    It is built before matching the rows, in a few queries for the whole file: the books with the ISBNs of the
+    rows, the books with the title keys of the rows, read through the Book.title_key index, and the authors of
+    those.
+    """
+
+    def __init__(self):
+        self.by_isbn: Dict[str, int] = {}
+        # Title key -> book id -> author keys
+        self.by_title: Dict[str, Dict[int, Set[str]]] = defaultdict(dict)
+
+    @classmethod
+    def build(cls, rows: Iterable[LibraryRow]) -> 'BookLookup':
+        lookup = cls()
+        rows = list(rows)
+        isbns = sorted({isbn for row in rows for isbn in row.isbns})
+        for start in range(0, len(isbns), IDS_PER_QUERY):
+            chunk = isbns[start:start + IDS_PER_QUERY]
+            lookup.by_isbn.update(Book.objects.filter(isbn__in=chunk).values_list('isbn', 'pk'))
+
+        # Books are stored with the key of their title without the series, the rows are matched with both keys
+        wanted = sorted({key for row in rows for key in title_keys(row.title)})
+        titles: Dict[int, str] = {}
+        for start in range(0, len(wanted), IDS_PER_QUERY):
+            chunk = wanted[start:start + IDS_PER_QUERY]
+            titles.update(Book.objects.filter(title_key__in=chunk).values_list('pk', 'title_key'))
+        book_ids = sorted(titles)
+        authors = defaultdict(set)
+        for start in range(0, len(book_ids), IDS_PER_QUERY):
+            chunk = book_ids[start:start + IDS_PER_QUERY]
+            relations = Book.authors.through.objects.filter(book_id__in=chunk).values_list('book_id', 'author__name')
+            for book_id, name in relations:
+                authors[book_id].add(text_key(name))
+        for pk, key in titles.items():
+            lookup.by_title[key][pk] = authors[pk]
+        return lookup
+
+    def match(self, row: LibraryRow) -> Optional[int]:
+        """
+        Return the id of the book of a row: the book with one of its ISBNs, else the book with its title and one
+        of its authors, or the only book with its title if the row has no author.
+        """
+        for isbn in row.isbns:
+            if isbn in self.by_isbn:
+                return self.by_isbn[isbn]
+        author_keys = {text_key(name) for name in row.authors}
+        candidates = {}
+        for key in title_keys(row.title):
+            candidates.update(self.by_title.get(key, {}))
+        for pk, authors in sorted(candidates.items()):
+            if authors & author_keys:
+                return pk
+        if not author_keys and len(candidates) == 1:
+            return next(iter(candidates))
+        return None
+
+
+@dataclass
+class LibraryImportResult:
+    processed_rows: int = 0
+    imported_books: int = 0
+    unmatched_rows: int = 0
+    error_count: int = 0
+    errors: List[Dict] = field(default_factory=list)
+
+
+class LibraryImporter:
+    """
+    Import a Goodreads or StoryGraph export into the library of a user.
+
+    The rows are matched to the catalog with a BookLookup and applied by batches of `batch_size` books with
+    `apply_library_batch`: new books are added and the books already in the library updated.
+    """
+
+    def __init__(self, user_id: int, batch_size: int = 500, max_errors: int = 100,
+                 progress: Optional[Callable[[LibraryImportResult], None]] = None):
+        self.user_id = user_id
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.progress = progress
+
+    def run(self, content: str, source: str) -> LibraryImportResult:
+        result = LibraryImportResult()
+        rows = []
+        for line, row in read_library_rows(content, source):
+            if isinstance(row, str):
+                result.processed_rows += 1
+                self.add_error(result, line, row)
+            else:
+                rows.append(row)
+
+        lookup = BookLookup.build(rows)
+        for start in range(0, len(rows), self.batch_size):
+            self.import_batch(rows[start:start + self.batch_size], lookup, result)
+            if self.progress is not None:
+                self.progress(result)
+        return result
+
+    def add_error(self, result: LibraryImportResult, line: int, message: str) -> None:
+        result.error_count += 1
+        if len(result.errors) < self.max_errors:
+            result.errors.append({'line': line, 'message': message})
+
+    def import_batch(self, rows: List[LibraryRow], lookup: BookLookup, result: LibraryImportResult) -> None:
+        matched: Dict[int, LibraryRow] = {}
+        for row in rows:
+            result.processed_rows += 1
+            book_id = lookup.match(row)
+            if book_id is None:
+                result.unmatched_rows += 1
+                self.add_error(result, row.line, f"No book matching '{row.title}'")
+            else:
+                # A book listed twice keeps its last row
+                matched[book_id] = row
+        if not matched:
+            return
+
+        with transaction.atomic():
+            in_library = set(
+                UserBook.objects.filter(user_id=self.user_id, book_id__in=matched).values_list('book_id', flat=True)
+            )
+            operations = []
+            for book_id, row in matched.items():
+                operation = {'op': UPDATE if book_id in in_library else CREATE, 'book': book_id,
+                             'situation': row.situation}
+                # Ratings and reviews missing from the export are kept
+                if row.rating is not None:
+                    operation['rating'] = row.rating
+                if row.review:
+                    operation['review'] = row.review
+                operations.append(operation)
+            apply_library_batch(self.user_id, operations)
+        result.imported_books += len(matched)
+
+
+def start_library_import(user_id: int, upload) -> LibraryImport:
+    """
+    Store an export file uploaded by the user and queue its import.
+
+    Raises ValueError if the file is too large or is not a CSV export of a supported service.
+    """
+    if upload.size > MAX_IMPORT_SIZE:
+        raise ValueError(f'Exports are limited to {MAX_IMPORT_SIZE // (1024 * 1024)} MB.')
+    try:
+        content = upload.read().decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise ValueError('Exports must be encoded in UTF-8.')
+    reader = csv.DictReader(io.StringIO(content))
+    source = detect_source(reader.fieldnames)
+    if source is None:
+        raise ValueError('Unsupported export, upload the CSV export of Goodreads or StoryGraph.')
+    total_rows = sum(1 for _ in reader)
+    with transaction.atomic():
+        library_import = LibraryImport.objects.create(
+            user_id=user_id, source=source, content=content, total_rows=total_rows
+        )
+        library_import.job = enqueue('library.import', import_id=library_import.pk)
+        library_import.save(update_fields=['job'])
+    return library_import
+
+
+astart_library_import = sync_to_async(start_library_import)
+
+
+@job('library.import')
+def import_library(current: Job, import_id: int) -> None:
+    """
+    Import an export stored by start_library_import, recording the progress on its LibraryImport after every
+    batch. Running it again after a failure applies the export again, which gives the same library.
+    """
+    library_import = LibraryImport.objects.filter(pk=import_id, finished_at__isnull=True).first()
+    if library_import is None:
+        return
+
+    def progress(result: LibraryImportResult) -> None:
+        LibraryImport.objects.filter(pk=import_id).update(**vars(result))
+
+    importer = LibraryImporter(library_import.user_id, progress=progress)
+    result = importer.run(library_import.content, library_import.source)
+    LibraryImport.objects.filter(pk=import_id).update(**vars(result), content='', finished_at=timezone.now())
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from BookBearApi.export import EXPORT_CHUNK_SIZE, export_ndjson
+from BookBearApi.models import Book, User, UserBook
+from BookBearApi.schemas import BookExportSchema, UserBookSchema
+
+
+class Command(BaseCommand):
+    help = 'Export the catalog, or the library of a user, as NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', help='File written (default: standard output).')
+        parser.add_argument('--user', type=int, help='Export the library of this user id instead of the catalog.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+            help=f'Number of rows fetched per query (default: {EXPORT_CHUNK_SIZE}).'
+        )
+
+    def handle(self, *args, output, user, chunk_size, **options):
+        if user is None:
+            queryset, schema = Book.objects.order_by('pk'), BookExportSchema
+        elif User.objects.filter(pk=user).exists():
+            queryset, schema = UserBook.objects.filter(user_id=user).order_by('pk'), UserBookSchema
+        else:
+            raise CommandError(f'User {user} does not exist.')
+
+        stream = open(output, 'wb') if output else None
+        try:
+            for block in export_ndjson(queryset, schema, chunk_size):
+                if stream is not None:
+                    stream.write(block)
+                else:
+                    self.stdout.write(block.decode(), ending='')
+        finally:
+            if stream is not None:
+                stream.close()
+        if output:
+            self.stdout.write(self.style.SUCCESS(f"Exported to '{output}'."))
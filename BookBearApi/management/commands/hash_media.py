@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from BookBearApi.images import IMAGE_FIELDS, rehash_image
+
+
+class Command(BaseCommand):
+    help = (
+        'Rename the images stored before their names were hashed after the hash of their content, so they are '
+        'served as immutable, and queue their renditions again.'
+    )
+
+    def handle(self, *args, **options):
+        renamed = 0
+        for model, field in IMAGE_FIELDS:
+            instances = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True}).order_by('pk')
+            for instance in instances.iterator():
+                renamed += rehash_image(instance, field)
+
+        self.stdout.write(self.style.SUCCESS(f'Renamed {renamed} images.'))
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from BookBearApi.catalog_import import CatalogImporter, FORMATS, guess_format
+
+
+class Command(BaseCommand):
+    help = 'Import books, authors, publishers and genres from a NDJSON or CSV file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import, one book per line or per CSV row.')
+        parser.add_argument(
+            '--format', choices=FORMATS, dest='file_format',
+            help='Format of the file (default: guessed from its extension).'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of rows imported per transaction (default: 500).'
+        )
+        parser.add_argument(
+            '--max-errors', type=int, default=100,
+            help='Number of row errors reported (default: 100).'
+        )
+
+    def handle(self, *args, path, file_format, batch_size, max_errors, **options):
+        file_format = file_format or guess_format(path)
+        if file_format is None:
+            raise CommandError(f"Cannot guess the format of '{path}', use --format.")
+
+        importer = CatalogImporter(batch_size=batch_size, max_errors=max_errors, progress=self.report_progress)
+        try:
+            with open(path, encoding='utf-8-sig', newline='') as lines:
+                result = importer.run(lines, file_format)
+        except OSError as e:
+            raise CommandError(f"Cannot read '{path}': {e}") from e
+        except UnicodeDecodeError as e:
+            raise CommandError(f"'{path}' is not encoded in UTF-8: {e}") from e
+
+        for error in result.errors:
+            self.stderr.write(f"Line {error['line']}: {error['message']}")
+        if result.error_count > len(result.errors):
+            self.stderr.write(f'... and {result.error_count - len(result.errors)} more errors.')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.imported_books} books ({result.created_authors} new authors, '
+            f'{result.created_publishers} new publishers, {result.created_genres} new genres), '
+            f'{result.error_count} rows skipped.'
+        ))
+
+    def report_progress(self, result):
+        self.stdout.write(f'Read {result.rows} rows, imported {result.imported_books} books...')
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+
+from BookBearApi.models import Book
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the rating totals, histogram and score of every book from its reviews.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help='Number of book ids updated per statement (default: 10000).'
+        )
+
+    def handle(self, *args, batch_size, **options):
+        bounds = Book.objects.aggregate(first=Min('pk'), last=Max('pk'))
+        if bounds['first'] is None:
+            self.stdout.write('No books to rebuild.')
+            return
+
+        updated = 0
+        for start in range(bounds['first'], bounds['last'] + 1, batch_size):
+            with transaction.atomic():
+                updated += Book.objects.filter(pk__gte=start, pk__lt=start + batch_size).rebuild_ratings()
+            self.stdout.write(f'Rebuilt {updated} books...')
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the score of {updated} books.'))
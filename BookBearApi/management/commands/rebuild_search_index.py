@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from BookBearApi.search import get_search_index
+
+
+class Command(BaseCommand):
+    help = 'Create the book search index if needed and reindex every book.'
+
+    def handle(self, *args, **options):
+        index = get_search_index()
+        with transaction.atomic():
+            index.install()
+            indexed = index.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} books.'))
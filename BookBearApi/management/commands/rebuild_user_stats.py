@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from BookBearApi.models import User
+from BookBearApi.stats import rebuild_user_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the reading statistics of every user from their library.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of users rebuilt per transaction (default: 1000).'
+        )
+
+    def handle(self, *args, batch_size, **options):
+        user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+        rebuilt = 0
+        for start in range(0, len(user_ids), batch_size):
+            rebuilt += rebuild_user_stats(user_ids[start:start + batch_size])
+            self.stdout.write(f'Rebuilt {rebuilt} users...')
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the statistics of {rebuilt} users.'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from BookBearApi.recommendations import CoRatings, Recommender
+
+
+class Command(BaseCommand):
+    help = 'Recompute the similar books of every book and the recommendations of every user.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Number of users refreshed per transaction, ten times as many books (default: 100).'
+        )
+        parser.add_argument(
+            '--users-only', action='store_true',
+            help='Keep the stored book similarities and only refresh the user recommendations.'
+        )
+
+    def handle(self, *args, batch_size, users_only, **options):
+        recommender = Recommender(batch_size=batch_size)
+        if not users_only:
+            self.stdout.write('Loading the ratings...')
+            matrix = CoRatings.load()
+            self.stdout.write(f'Loaded the libraries of {matrix.users} users.')
+            books = recommender.refresh_similarities(matrix)
+            self.stdout.write(f'Refreshed the similar books of {books} books.')
+        users = recommender.refresh_users()
+        self.stdout.write(self.style.SUCCESS(f'Refreshed the recommendations of {users} users.'))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from BookBearApi.jobs import run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = 'Run the queued background jobs, waiting for new ones unless --once is given.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit once the queue is empty.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Seconds between two polls of an empty queue (default: 1).'
+        )
+
+    def handle(self, *args, once, interval, **options):
+        total = 0
+        while True:
+            count = run_pending_jobs()
+            total += count
+            if count:
+                self.stdout.write(f'Ran {total} jobs...')
+            elif once:
+                break
+            else:
+                time.sleep(interval)
+
+        self.stdout.write(self.style.SUCCESS(f'Ran {total} jobs.'))
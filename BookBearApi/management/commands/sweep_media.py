@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from BookBearApi.images import sweep_media
+
+
+class Command(BaseCommand):
+    help = 'Delete the orphaned files of the image directories of MEDIA_ROOT, e.g. left behind by failed requests.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age', type=int, default=24,
+            help='Hours since the last modification of the files to delete, sparing the uploads in progress '
+                 '(default: 24).'
+        )
+
+    def handle(self, *args, min_age, **options):
+        deleted = sweep_media(timedelta(hours=min_age))
+        self.stdout.write(self.style.SUCCESS(f'Deleted {len(deleted)} orphaned files.'))
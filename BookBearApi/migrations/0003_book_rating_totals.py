@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-18 11:32
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def rebuild_rating_totals(apps, schema_editor):
+    Book = apps.get_model('BookBearApi', 'Book')
+    UserBook = apps.get_model('BookBearApi', 'UserBook')
+    reviews = UserBook.objects.filter(book=OuterRef('pk'), rating__isnull=False).order_by().values('book')
+    Book.objects.update(
+        rating_sum=Coalesce(Subquery(reviews.annotate(total=Sum('rating')).values('total')), Value(0.0)),
+        rating_count=Coalesce(Subquery(reviews.annotate(total=Count('pk')).values('total')), Value(0)),
+        # The score derives from the totals from now on, refresh the scores left stale before them
+        score=Coalesce(Subquery(reviews.annotate(average=Avg('rating')).values('average')), Value(0.0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('BookBearApi', '0002_alter_book_publisher'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_sum',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.RunPython(rebuild_rating_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2 on 2026-10-18 14:05
+
+import BookBearApi.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+
+def fill_search_index(apps, schema_editor):
+    Book = apps.get_model('BookBearApi', 'Book')
+    Author = apps.get_model('BookBearApi', 'Author')
+    Publisher = apps.get_model('BookBearApi', 'Publisher')
+    quote = schema_editor.quote_name
+    book, author, publisher = (quote(model._meta.db_table) for model in (Book, Author, Publisher))
+    book_authors = quote(Book.authors.through._meta.db_table)
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        # The GIN index of search_vector is added by the AddIndex operation below
+        schema_editor.execute(
+            f'''
+            UPDATE {book} AS b SET {quote("search_vector")} =
+                setweight(to_tsvector(%(config)s::regconfig, b.title), 'A')
+                || setweight(to_tsvector(%(config)s::regconfig, coalesce((
+                    SELECT string_agg(a.name, ' ') FROM {book_authors} ba
+                    JOIN {author} a ON a.id = ba.author_id WHERE ba.book_id = b.id
+                ), '')), 'B')
+                || setweight(to_tsvector(%(config)s::regconfig, coalesce((
+                    SELECT p.name FROM {publisher} p WHERE p.id = b.publisher_id
+                ), '')), 'B')
+                || setweight(to_tsvector(%(config)s::regconfig, b.synopsis), 'C')
+            ''',
+            {'config': settings.BOOK_SEARCH_CONFIG},
+        )
+    elif vendor == 'sqlite':
+        fts = quote('BookBearApi_book_fts')
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {fts} '
+            f"USING fts5(title, synopsis, authors, publisher, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f'''
+            INSERT INTO {fts} (rowid, title, synopsis, authors, publisher)
+            SELECT b.id, b.title, b.synopsis, coalesce((
+                SELECT group_concat(a.name, ' ') FROM {book_authors} ba
+                JOIN {author} a ON a.id = ba.author_id WHERE ba.book_id = b.id
+            ), ''), coalesce(p.name, '')
+            FROM {book} b LEFT JOIN {publisher} p ON p.id = b.publisher_id
+            '''
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {schema_editor.quote_name("BookBearApi_book_fts")}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('BookBearApi', '0003_book_rating_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_search_index, drop_search_index),
+        migrations.AddIndex(
+            model_name='book',
+            index=BookBearApi.indexes.SearchVectorIndex(fields=['search_vector'], name='book_search_vector_gin'),
+        ),
+    ]
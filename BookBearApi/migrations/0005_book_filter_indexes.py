@@ -0,0 +1,55 @@
+# Generated by Django 5.2 on 2026-10-18 14:40
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+# Text columns filtered with icontains, istartswith and trigram similarity, compared as UPPER(column::text)
+TRIGRAM_INDEXES = (
+    ('book_title_trgm_idx', 'BookBearApi_book', 'title'),
+    ('author_name_trgm_idx', 'BookBearApi_author', 'name'),
+    ('publisher_name_trgm_idx', 'BookBearApi_publisher', 'name'),
+    ('genre_name_trgm_idx', 'BookBearApi_genre', 'name'),
+    ('user_username_trgm_idx', 'BookBearApi_user', 'username'),
+)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote = schema_editor.quote_name
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {quote(name)} ON {quote(table)} '
+            f'USING gin ((UPPER({quote(column)}::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(name)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('BookBearApi', '0004_book_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['score'], name='book_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['publication_date'], name='book_publication_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['age_rating'], name='book_age_rating_idx'),
+        ),
+    ]
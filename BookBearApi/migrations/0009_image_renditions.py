@@ -0,0 +1,53 @@
+# Generated by Django 5.2 on 2026-10-18 12:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('BookBearApi', '0008_jobs_and_feed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='author',
+            name='avatar_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='author',
+            name='avatar_thumb',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='authors/renditions'),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='cover_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='cover_thumb',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='covers/renditions'),
+        ),
+        migrations.AddField(
+            model_name='publisher',
+            name='logo_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='publisher',
+            name='logo_thumb',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='publishers/renditions'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='avatar_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='avatar_thumb',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='avatars/renditions'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2 on 2026-10-18 12:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('BookBearApi', '0009_image_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LibraryImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('goodreads', 'Goodreads'), ('storygraph', 'StoryGraph')], max_length=20)),
+                ('content', models.TextField(blank=True)),
+                ('total_rows', models.PositiveIntegerField(default=0)),
+                ('processed_rows', models.PositiveIntegerField(default=0)),
+                ('imported_books', models.PositiveIntegerField(default=0)),
+                ('unmatched_rows', models.PositiveIntegerField(default=0)),
+                ('error_count', models.PositiveIntegerField(default=0)),
+                ('errors', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='isbn',
+            field=models.CharField(blank=True, default='', max_length=13),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['isbn'], name='book_isbn_idx'),
+        ),
+        migrations.AddField(
+            model_name='libraryimport',
+            name='job',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='BookBearApi.job'),
+        ),
+        migrations.AddField(
+            model_name='libraryimport',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='library_imports', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
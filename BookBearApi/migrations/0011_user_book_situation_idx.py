@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 12:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('BookBearApi', '0010_book_isbn_library_import'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userbook',
+            index=models.Index(fields=['user', 'situation', 'date_added'], name='user_book_situation_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2 on 2026-10-18 12:27
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def rebuild_rating_histograms(apps, schema_editor):
+    Book = apps.get_model('BookBearApi', 'Book')
+    UserBook = apps.get_model('BookBearApi', 'UserBook')
+    reviews = UserBook.objects.filter(book=OuterRef('pk'), rating__isnull=False).order_by().values('book')
+    buckets = {
+        1: Q(rating__lt=1.5),
+        2: Q(rating__gte=1.5, rating__lt=2.5),
+        3: Q(rating__gte=2.5, rating__lt=3.5),
+        4: Q(rating__gte=3.5, rating__lt=4.5),
+        5: Q(rating__gte=4.5),
+    }
+    Book.objects.update(**{
+        f'rating_{bucket}': Coalesce(
+            Subquery(reviews.filter(condition).annotate(total=Count('pk')).values('total')), Value(0)
+        )
+        for bucket, condition in buckets.items()
+    })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('BookBearApi', '0011_user_book_situation_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='rating_1',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_2',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_3',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_4',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='rating_5',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='userbook',
+            index=models.Index(fields=['book', 'date_added'], name='user_book_date_added_idx'),
+        ),
+        migrations.RunPython(rebuild_rating_histograms, migrations.RunPython.noop),
+    ]
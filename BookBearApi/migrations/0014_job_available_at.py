@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 13:04
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('BookBearApi', '0013_catalog_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='available_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2 on 2026-10-18 13:27
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+
+def fill_title_keys(apps, schema_editor):
+    # Same folding as BookBearApi.titles.title_key when this migration was written
+    series = re.compile(r'\s*\([^()]*#[^()]*\)\s*$')
+    Book = apps.get_model('BookBearApi', 'Book')
+    books = []
+    for book in Book.objects.only('pk', 'title').iterator(chunk_size=2000):
+        title = unicodedata.normalize('NFKD', series.sub('', book.title)).encode('ascii', 'ignore').decode()
+        book.title_key = ' '.join(re.sub(r'[^\w\s]', ' ', title.casefold()).split())
+        books.append(book)
+        if len(books) == 2000:
+            Book.objects.bulk_update(books, ['title_key'])
+            books = []
+    Book.objects.bulk_update(books, ['title_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('BookBearApi', '0014_job_available_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='title_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=250),
+        ),
+        migrations.RunPython(fill_title_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['title_key'], name='book_title_key_idx'),
+        ),
+    ]
@@ -1,21 +1,90 @@
+from typing import Dict, Optional
+
 from django.contrib.auth.models import AbstractUser, PermissionsMixin
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import Avg, Case, Count, ExpressionWrapper, F, FloatField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .indexes import SearchVectorIndex
+from .ratings import RATING_BUCKETS, bucket_condition
 
 
 # Create your models here.
 class Author(models.Model):
     avatar = models.ImageField(upload_to='authors', blank=True, null=True)
+    # Resized copies of avatar, generated in the background by BookBearApi.images
+    avatar_thumb = models.ImageField(upload_to='authors/renditions', blank=True, null=True, editable=False)
+    avatar_renditions = models.JSONField(default=dict, blank=True, editable=False)
     name = models.CharField(max_length=250, unique=True)
     birth_date = models.DateField()
+    # Last change of the author or of its books, its detail also reads the updated_at of the books, see
+    # BookBearApi.signals.touch_details
+    updated_at = models.DateTimeField(auto_now=True)
 
 
 class Publisher(models.Model):
     logo = models.ImageField(upload_to='publishers', blank=True, null=True)
+    # Resized copies of logo, generated in the background by BookBearApi.images
+    logo_thumb = models.ImageField(upload_to='publishers/renditions', blank=True, null=True, editable=False)
+    logo_renditions = models.JSONField(default=dict, blank=True, editable=False)
     name = models.CharField(max_length=250, unique=True)
+    # Last change of the publisher or of its books, its detail also reads the updated_at of the books, see
+    # BookBearApi.signals.touch_details
+    updated_at = models.DateTimeField(auto_now=True)
 
 
 class Genre(models.Model):
     name = models.CharField(max_length=250, unique=True)
+    # Last change of the genre or of its books, its detail also reads the updated_at of the books, see
+    # BookBearApi.signals.touch_details
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class BookQuerySet(models.QuerySet):
+    def add_ratings(self, rating_sum: float, rating_count: int, histogram: Optional[Dict[int, int]] = None) -> int:
+        """
+        Atomically add `rating_sum`/`rating_count` to the rating totals of the books and refresh their score.
+        `histogram` maps the rating buckets to the number of ratings added to them.
+        """
+        new_sum = F('rating_sum') + rating_sum
+        new_count = F('rating_count') + rating_count
+        buckets = {
+            f'rating_{bucket}': F(f'rating_{bucket}') + count for bucket, count in (histogram or {}).items() if count
+        }
+        return self.update(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            score=Case(
+                When(rating_count__gt=-rating_count,
+                     then=ExpressionWrapper(new_sum / new_count, output_field=FloatField())),
+                default=Value(0.0),
+            ),
+            **buckets,
+        )
+
+    def rebuild_ratings(self) -> int:
+        """
+        Recompute the rating totals, histogram and score of the books from their reviews in a single UPDATE.
+        """
+        reviews = UserBook.objects.filter(book=OuterRef('pk'), rating__isnull=False).order_by().values('book')
+        rating_sum = Coalesce(Subquery(reviews.annotate(total=Sum('rating')).values('total')), Value(0.0))
+        rating_count = Coalesce(Subquery(reviews.annotate(total=Count('pk')).values('total')), Value(0))
+        return self.update(
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            score=Coalesce(
+                Subquery(reviews.annotate(average=Avg('rating')).values('average')), Value(0.0)
+            ),
+            **{
+                f'rating_{bucket}': Coalesce(
+                    Subquery(reviews.filter(bucket_condition(bucket)).annotate(total=Count('pk')).values('total')),
+                    Value(0)
+                )
+                for bucket in RATING_BUCKETS
+            },
+        )
 
 
 class Book(models.Model):
@@ -32,17 +101,54 @@ class Book(models.Model):
     }
 
     title = models.CharField(max_length=250)
+    # Folded title without its series, set by BookBearApi.signals from BookBearApi.titles.title_key to match imports
+    title_key = models.CharField(max_length=250, blank=True, default='', editable=False)
+    # ISBN-13, normalized by BookBearApi.isbn.normalize_isbn
+    isbn = models.CharField(max_length=13, blank=True, default='')
     publication_date = models.DateField()
     synopsis = models.TextField(blank=True)
+    # score is the average rating, kept in sync with rating_sum / rating_count by BookQuerySet.add_ratings
     score = models.FloatField(default=0.0)
+    rating_sum = models.FloatField(default=0.0)
+    rating_count = models.PositiveIntegerField(default=0)
+    # Ratings histogram, a rating counts in the bucket of its nearest integer between 1 and 5
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
     age_rating = models.CharField(max_length=2, choices=AGE_RATING_CHOICES, default=EVERYONE)
 
     cover = models.ImageField(upload_to='covers', blank=True, null=True)
+    # Resized copies of cover, generated in the background by BookBearApi.images
+    cover_thumb = models.ImageField(upload_to='covers/renditions', blank=True, null=True, editable=False)
+    cover_renditions = models.JSONField(default=dict, blank=True, editable=False)
 
     publisher = models.ForeignKey(Publisher, on_delete=models.SET_NULL, blank=True, null=True, related_name='books')
     authors = models.ManyToManyField(Author, related_name='books')
     genres = models.ManyToManyField(Genre, related_name='books')
 
+    # Full-text document maintained by BookBearApi.search, only used on PostgreSQL where it is GIN indexed
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Last change of the book, its ratings or its publisher, authors and genres, see
+    # BookBearApi.signals.touch_details
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = BookQuerySet.as_manager()
+
+    class Meta:
+        # publisher_id is indexed as a foreign key, name and title trigram indexes are created on PostgreSQL only
+        # by migration 0005
+        indexes = [
+            models.Index(fields=['score'], name='book_score_idx'),
+            models.Index(fields=['publication_date'], name='book_publication_date_idx'),
+            models.Index(fields=['age_rating'], name='book_age_rating_idx'),
+            models.Index(fields=['isbn'], name='book_isbn_idx'),
+            models.Index(fields=['updated_at'], name='book_updated_at_idx'),
+            models.Index(fields=['title_key'], name='book_title_key_idx'),
+            SearchVectorIndex(fields=['search_vector'], name='book_search_vector_gin'),
+        ]
+
 
 class User(AbstractUser, PermissionsMixin):
     # Gender choices
@@ -70,6 +176,9 @@ class User(AbstractUser, PermissionsMixin):
     gender = models.CharField(max_length=2, choices=GENDER_CHOICES, default=NOT_SPECIFIED)
 
     avatar = models.ImageField(upload_to='avatars', blank=True, null=True)
+    # Resized copies of avatar, generated in the background by BookBearApi.images
+    avatar_thumb = models.ImageField(upload_to='avatars/renditions', blank=True, null=True, editable=False)
+    avatar_renditions = models.JSONField(default=dict, blank=True, editable=False)
 
     followed_authors = models.ManyToManyField(Author, related_name='followers', blank=True)
     followed_publishers = models.ManyToManyField(Publisher, related_name='followers', blank=True)
@@ -107,3 +216,168 @@ class UserBook(models.Model):
 
     class Meta:
         unique_together = ('user', 'book')
+        indexes = [
+            # Libraries filtered by situation and ordered by date added, e.g. GET /me/books?situation=R
+            models.Index(fields=['user', 'situation', 'date_added'], name='user_book_situation_idx'),
+            # Reviews of a book, most recent first, e.g. GET /book/{id}/reviews
+            models.Index(fields=['book', 'date_added'], name='user_book_date_added_idx'),
+        ]
+
+
+class UserStats(models.Model):
+    """
+    Reading statistics of a user, maintained by BookBearApi.stats on every change of their library.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    # Number of books per UserBook situation
+    reading = models.PositiveIntegerField(default=0)
+    stopped = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    pending = models.PositiveIntegerField(default=0)
+    abandoned = models.PositiveIntegerField(default=0)
+    # Ratings histogram, a rating counts in the bucket of its nearest integer between 1 and 5
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.FloatField(default=0.0)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+    # [{'id': ..., 'count': ...}] of the genres and authors with the most books in the library
+    top_genres = models.JSONField(default=list)
+    top_authors = models.JSONField(default=list)
+
+
+class UserGenreCount(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    genre = models.ForeignKey(Genre, on_delete=models.CASCADE, related_name='+')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'genre')
+
+
+class UserAuthorCount(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    author = models.ForeignKey(Author, on_delete=models.CASCADE, related_name='+')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'author')
+
+
+class BookSimilarity(models.Model):
+    """
+    Nearest neighbours of a book by co-ratings, refreshed by BookBearApi.recommendations.
+    """
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='similarities')
+    similar_book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='similar_to')
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ('book', 'similar_book')
+        indexes = [
+            models.Index(fields=['book', '-score'], name='book_similarity_score_idx'),
+        ]
+
+
+class UserRecommendation(models.Model):
+    """
+    Books recommended to a user, refreshed by BookBearApi.recommendations.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recommendations')
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='recommendations')
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ('user', 'book')
+        indexes = [
+            models.Index(fields=['user', '-score'], name='user_recommendation_score_idx'),
+        ]
+
+
+class Job(models.Model):
+    """
+    Background job queued by BookBearApi.jobs.enqueue and run by the job workers.
+    """
+    PENDING = 'P'
+    RUNNING = 'R'
+    DONE = 'D'
+    FAILED = 'F'
+    STATUS_CHOICES = {
+        PENDING: 'Pending',
+        RUNNING: 'Running',
+        DONE: 'Done',
+        FAILED: 'Failed',
+    }
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=1, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Claimable from then on, later than the creation for the retries of a failing job
+    available_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='job_status_idx'),
+        ]
+
+
+class FeedEntry(models.Model):
+    """
+    Book pushed to the feed of a user following one of its authors or its publisher.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='feed_entries')
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='feed_entries')
+
+    class Meta:
+        # Also the index of the feed pages, read backwards from the newest book
+        unique_together = ('user', 'book')
+
+
+class FeedSource(models.Model):
+    """
+    Book of an author or publisher with too many followers to push it, pulled by their followers on read.
+    """
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='+')
+    author = models.ForeignKey(Author, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    publisher = models.ForeignKey(Publisher, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['author', 'book'], name='feed_source_author_idx'),
+            models.Index(fields=['publisher', 'book'], name='feed_source_publisher_idx'),
+        ]
+
+
+class LibraryImport(models.Model):
+    """
+    Library export of another service uploaded by a user, imported by the `library.import` job of
+    BookBearApi.library_import.
+    """
+    GOODREADS = 'goodreads'
+    STORYGRAPH = 'storygraph'
+    SOURCE_CHOICES = {
+        GOODREADS: 'Goodreads',
+        STORYGRAPH: 'StoryGraph',
+    }
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='library_imports')
+    job = models.ForeignKey(Job, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    # CSV file, emptied once imported
+    content = models.TextField(blank=True)
+    total_rows = models.PositiveIntegerField(default=0)
+    processed_rows = models.PositiveIntegerField(default=0)
+    imported_books = models.PositiveIntegerField(default=0)
+    unmatched_rows = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    # [{'line': ..., 'message': ...}] of the first rows that could not be imported
+    errors = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
@@ -0,0 +1,28 @@
+import math
+from typing import Optional
+
+from django.db.models import Q
+
+# Buckets of the rating histograms of the books and of the user statistics
+RATING_BUCKETS = range(1, 6)
+
+
+def rating_bucket(rating: Optional[float]) -> Optional[int]:
+    """
+    Return the histogram bucket of `rating`: its nearest integer, halves rounded up, clamped to 1-5.
+    """
+    if rating is None:
+        return None
+    return min(5, max(1, math.floor(rating + 0.5)))
+
+
+def bucket_condition(bucket: int) -> Q:
+    """
+    Return the Q matching the library entries rated in `bucket`.
+    """
+    condition = Q(rating__isnull=False)
+    if bucket > 1:
+        condition &= Q(rating__gte=bucket - 0.5)
+    if bucket < 5:
+        condition &= Q(rating__lt=bucket + 0.5)
+    return condition
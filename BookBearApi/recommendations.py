@@ -0,0 +1,320 @@
+import heapq
+from array import array
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, QuerySet
+from scipy.sparse import csr_matrix
+
+from .models import Book, BookSimilarity, User, UserBook, UserRecommendation
+
+# Neighbours stored per book and recommendations stored per user
+SIMILAR_BOOKS = 50
+RECOMMENDED_BOOKS = 50
+# A similarity from n common readers is scaled by n / (n + SIMILARITY_SHRINKAGE), damping pairs of rare books
+SIMILARITY_SHRINKAGE = 10
+# Cells of the dense book x book blocks computed at once, 32 MB per block of doubles
+SIMILARITY_BLOCK_CELLS = 2 ** 22
+# Preference of the library entries without a rating, rated entries use rating / 5
+IMPLICIT_PREFERENCES = {
+    UserBook.READING: 0.7,
+    UserBook.STOPPED: 0.3,
+    UserBook.COMPLETED: 0.8,
+    UserBook.PENDING: 0.5,
+    UserBook.ABANDONED: 0.1,
+}
+# Added to the co-rating score of a candidate per followed author or publisher and favorite genre of the book,
+# and times its score / 5
+SIGNAL_WEIGHTS = {'genre': 0.3, 'author': 0.5, 'publisher': 0.2}
+POPULARITY_WEIGHT = 0.05
+# Best scored books of every followed author or publisher and favorite genre taken as candidates
+SIGNAL_CANDIDATES = 50
+# Co-rating candidates kept per user before blending in the signals
+MAX_CANDIDATES = 500
+# Ids per IN clause
+CHUNK_SIZE = 500
+
+
+def preference(situation: str, rating: Optional[float]) -> float:
+    """
+    Return how much a user likes a book of their library, between 0 and 1.
+    """
+    if rating is not None:
+        return min(max(rating, 0.0), 5.0) / 5
+    return IMPLICIT_PREFERENCES[situation]
+
+
+def _chunks(ids: Iterable[int]) -> Iterator[List[int]]:
+    ids = sorted(set(ids))
+    for start in range(0, len(ids), CHUNK_SIZE):
+        yield ids[start:start + CHUNK_SIZE]
+
+
+def _top(values: np.ndarray, limit: int) -> np.ndarray:
+    """
+    Return the indexes of the `limit` largest `values`, largest first.
+    """
+    if len(values) > limit:
+        indexes = np.argpartition(-values, limit - 1)[:limit]
+    else:
+        indexes = np.arange(len(values))
+    return indexes[np.argsort(-values[indexes], kind='stable')]
+
+
+class CoRatings:
+    """
+    Sparse user x book preference matrix X, in CSR form.
+
+    Book similarities are the cosine of the columns of X, shrunk by their number of common readers: the rows of
+    X.T @ X and of its binary counterpart are computed for a block of books at a time, so every reader of every
+    book is taken into account while the memory stays bounded by SIMILARITY_BLOCK_CELLS.
+    """
+
+    def __init__(self, user_ids: np.ndarray, book_ids: np.ndarray, preferences: csr_matrix):
+        self.user_ids = user_ids
+        self.book_ids = book_ids
+        self.preferences = preferences
+        self.columns = {book_id: column for column, book_id in enumerate(book_ids.tolist())}
+        # Book x user matrices, whose rows are the readers of a book
+        self._readers = preferences.T.tocsr()
+        self._read = self._readers.copy()
+        self._read.data = np.ones_like(self._read.data)
+        self._pattern = self._read.T.tocsr()
+        self._norms = np.sqrt(np.asarray(self._readers.multiply(self._readers).sum(axis=1)).ravel())
+
+    @classmethod
+    def load(cls, chunk_size: int = 10000) -> 'CoRatings':
+        users, books, values = array('q'), array('q'), array('d')
+        entries = UserBook.objects.values_list('user_id', 'book_id', 'situation', 'rating')
+        for user_id, book_id, situation, rating in entries.iterator(chunk_size=chunk_size):
+            users.append(user_id)
+            books.append(book_id)
+            values.append(preference(situation, rating))
+        return cls.from_entries(np.frombuffer(users, dtype=np.int64), np.frombuffer(books, dtype=np.int64),
+                                np.frombuffer(values, dtype=np.float64))
+
+    @classmethod
+    def from_entries(cls, users: np.ndarray, books: np.ndarray, values: np.ndarray) -> 'CoRatings':
+        """
+        Build the matrix from the parallel arrays of the user id, book id and preference of every library entry.
+        """
+        user_ids, rows = np.unique(users, return_inverse=True)
+        book_ids, columns = np.unique(books, return_inverse=True)
+        preferences = csr_matrix((values, (rows, columns)), shape=(len(user_ids), len(book_ids)))
+        return cls(user_ids, book_ids, preferences)
+
+    @property
+    def users(self) -> int:
+        return len(self.user_ids)
+
+    def neighbours(self, book_ids: Sequence[int], limit: int = SIMILAR_BOOKS) -> Dict[int, List[Tuple[float, int]]]:
+        """
+        Return the (similarity, book id) of the `limit` books most similar to each of `book_ids`, most similar
+        first. Books without readers are left out.
+        """
+        rows = np.array([self.columns[book_id] for book_id in book_ids if book_id in self.columns], dtype=np.int64)
+        block = max(1, SIMILARITY_BLOCK_CELLS // max(1, len(self.book_ids)))
+        neighbours = {}
+        for start in range(0, len(rows), block):
+            chunk = rows[start:start + block]
+            products = (self._readers[chunk] @ self.preferences).toarray()
+            common = (self._read[chunk] @ self._pattern).toarray()
+            norms = self._norms[chunk, None] * self._norms[None, :]
+            similarities = np.divide(products, norms, out=np.zeros_like(products), where=norms > 0)
+            similarities *= common / (common + SIMILARITY_SHRINKAGE)
+            similarities[np.arange(len(chunk)), chunk] = 0
+            for row, column in zip(similarities, chunk.tolist()):
+                top = _top(row, limit)
+                top = top[row[top] > 0]
+                neighbours[int(self.book_ids[column])] = list(zip(row[top].tolist(), self.book_ids[top].tolist()))
+        return neighbours
+
+    def similar_books(self, book_id: int, limit: int = SIMILAR_BOOKS) -> List[Tuple[float, int]]:
+        """
+        Return the (similarity, book id) of the `limit` books most similar to `book_id`, most similar first.
+        """
+        return self.neighbours([book_id], limit).get(book_id, [])
+
+
+class Recommender:
+    """
+    Refresh the precomputed BookSimilarity and UserRecommendation rows.
+
+    The books of a user are scored by the similarities of the books in their library, weighted by how much they
+    liked them, plus SIGNAL_WEIGHTS for every followed author or publisher and favorite genre of the book and a
+    small popularity prior. Books of the library are never recommended.
+    """
+
+    def __init__(self, batch_size: int = 100):
+        self.batch_size = batch_size
+        self._signal_books: Dict[Tuple[str, int], List[int]] = {}
+
+    def refresh_similarities(self, matrix: Optional[CoRatings] = None) -> int:
+        """
+        Recompute the neighbours of every book, returning the number of books with neighbours.
+        """
+        matrix = matrix or CoRatings.load()
+        refreshed = 0
+        book_ids = list(Book.objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(book_ids), self.batch_size * 10):
+            batch = book_ids[start:start + self.batch_size * 10]
+            rows = [
+                BookSimilarity(book_id=book_id, similar_book_id=other, score=score)
+                for book_id, similar in matrix.neighbours(batch).items()
+                for score, other in similar
+            ]
+            with transaction.atomic():
+                BookSimilarity.objects.filter(book_id__in=batch).delete()
+                BookSimilarity.objects.bulk_create(rows, batch_size=1000)
+            refreshed += len({row.book_id for row in rows})
+        return refreshed
+
+    def refresh_users(self, user_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Recompute the recommendations of the given users, every user if omitted, returning their number.
+        """
+        if user_ids is None:
+            user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+        user_ids = list(user_ids)
+        for start in range(0, len(user_ids), self.batch_size):
+            batch = user_ids[start:start + self.batch_size]
+            recommendations = self.recommend(batch)
+            with transaction.atomic():
+                UserRecommendation.objects.filter(user_id__in=batch).delete()
+                UserRecommendation.objects.bulk_create([
+                    UserRecommendation(user_id=user_id, book_id=book_id, score=score)
+                    for user_id, books in recommendations.items()
+                    for score, book_id in books
+                ], batch_size=1000)
+        return len(user_ids)
+
+    def recommend(self, user_ids: List[int]) -> Dict[int, List[Tuple[float, int]]]:
+        """
+        Return the (score, book id) of the RECOMMENDED_BOOKS best books for each of the users.
+        """
+        libraries: Dict[int, Dict[int, float]] = defaultdict(dict)
+        entries = UserBook.objects.filter(user_id__in=user_ids).values_list('user_id', 'book_id', 'situation', 'rating')
+        for user_id, book_id, situation, rating in entries:
+            libraries[user_id][book_id] = preference(situation, rating)
+        follows = self._follows(user_ids)
+
+        # Users x library books times library books x similar books, the co-rating score of every candidate
+        book_ids = sorted({book_id for library in libraries.values() for book_id in library})
+        columns = {book_id: column for column, book_id in enumerate(book_ids)}
+        sources, others, similarities = array('q'), array('q'), array('d')
+        for chunk in _chunks(book_ids):
+            rows = BookSimilarity.objects.filter(book_id__in=chunk).values_list('book_id', 'similar_book_id', 'score')
+            for book_id, other, score in rows:
+                sources.append(columns[book_id])
+                others.append(other)
+                similarities.append(score)
+        other_ids, other_columns = np.unique(np.frombuffer(others, dtype=np.int64), return_inverse=True)
+        similarity = csr_matrix(
+            (np.frombuffer(similarities, dtype=np.float64), (np.frombuffer(sources, dtype=np.int64), other_columns)),
+            shape=(len(book_ids), len(other_ids)),
+        )
+        preferences = csr_matrix(
+            (
+                [value for user_id in user_ids for value in libraries[user_id].values()],
+                (
+                    [row for row, user_id in enumerate(user_ids) for _ in libraries[user_id]],
+                    [columns[book_id] for user_id in user_ids for book_id in libraries[user_id]],
+                ),
+            ),
+            shape=(len(user_ids), len(book_ids)),
+        )
+        scores = (preferences @ similarity).tocsr()
+
+        candidates: Dict[int, Dict[int, float]] = {}
+        for row, user_id in enumerate(user_ids):
+            library = libraries[user_id]
+            cells = slice(scores.indptr[row], scores.indptr[row + 1])
+            ids, values = other_ids[scores.indices[cells]], scores.data[cells]
+            unread = ~np.isin(ids, np.fromiter(library, dtype=np.int64, count=len(library)))
+            ids, values = ids[unread], values[unread]
+            best = _top(values, MAX_CANDIDATES)
+            top = dict(zip(ids[best].tolist(), values[best].tolist()))
+            for kind, pks in follows[user_id].items():
+                for pk in pks:
+                    for book_id in self._books_of(kind, pk):
+                        if book_id not in library:
+                            top.setdefault(book_id, 0.0)
+            candidates[user_id] = top
+
+        features = self._features(book_id for top in candidates.values() for book_id in top)
+        recommendations = {}
+        for user_id, top in candidates.items():
+            user_follows = follows[user_id]
+            scored = []
+            for book_id, score in top.items():
+                book = features.get(book_id)
+                if book is None:
+                    continue
+                score += POPULARITY_WEIGHT * min(book['score'], 5.0) / 5
+                for kind, weight in SIGNAL_WEIGHTS.items():
+                    score += weight * len(book[kind] & user_follows[kind])
+                scored.append((score, book_id))
+            recommendations[user_id] = heapq.nlargest(RECOMMENDED_BOOKS, scored)
+        return recommendations
+
+    @staticmethod
+    def _follows(user_ids: List[int]) -> Dict[int, Dict[str, Set[int]]]:
+        follows = defaultdict(lambda: {kind: set() for kind in SIGNAL_WEIGHTS})
+        relations = (
+            ('genre', User.favorite_genres.through, 'genre_id'),
+            ('author', User.followed_authors.through, 'author_id'),
+            ('publisher', User.followed_publishers.through, 'publisher_id'),
+        )
+        for kind, through, column in relations:
+            for user_id, pk in through.objects.filter(user_id__in=user_ids).values_list('user_id', column):
+                follows[user_id][kind].add(pk)
+        return follows
+
+    def _books_of(self, kind: str, pk: int) -> List[int]:
+        """
+        Return the best scored books of an author, publisher or genre, cached for the whole refresh.
+        """
+        key = (kind, pk)
+        if key not in self._signal_books:
+            self._signal_books[key] = list(
+                Book.objects.filter(**{'publisher_id' if kind == 'publisher' else f'{kind}s': pk})
+                .order_by('-score', 'pk').values_list('pk', flat=True)[:SIGNAL_CANDIDATES]
+            )
+        return self._signal_books[key]
+
+    @staticmethod
+    def _features(book_ids: Iterable[int]) -> Dict[int, Dict]:
+        features = {}
+        for chunk in _chunks(book_ids):
+            for pk, score, publisher_id in Book.objects.filter(pk__in=chunk).values_list('pk', 'score', 'publisher_id'):
+                features[pk] = {'score': score, 'genre': set(), 'author': set(), 'publisher': {publisher_id}}
+            for kind, through in (('genre', Book.genres.through), ('author', Book.authors.through)):
+                for book_id, pk in through.objects.filter(book_id__in=chunk).values_list('book_id', f'{kind}_id'):
+                    features[book_id][kind].add(pk)
+        return features
+
+
+def recommended_books(user_id: int) -> QuerySet:
+    """
+    Return the books recommended to the user, best first, without the books added to their library since.
+    """
+    in_library = UserBook.objects.filter(user_id=user_id, book_id=OuterRef('pk'))
+    return Book.objects.filter(recommendations__user_id=user_id).exclude(Exists(in_library)).annotate(
+        recommendation_score=F('recommendations__score')
+    ).order_by('-recommendation_score', 'pk')
+
+
+def popular_books(user_id: int) -> QuerySet:
+    """
+    Return the best scored books outside the library of the user, for users without recommendations yet.
+    """
+    in_library = UserBook.objects.filter(user_id=user_id, book_id=OuterRef('pk'))
+    return Book.objects.exclude(Exists(in_library)).order_by('-score', 'pk')
+
+
+def similar_books(book_id: int) -> QuerySet:
+    return Book.objects.filter(similar_to__book_id=book_id).annotate(
+        similarity=F('similar_to__score')
+    ).order_by('-similarity', 'pk')
@@ -0,0 +1,27 @@
+from typing import Any
+
+import orjson
+from django.http import HttpRequest
+from ninja.renderers import BaseRenderer
+from ninja.responses import NinjaJSONEncoder
+
+# Dates and datetimes are passed to NinjaJSONEncoder so they keep the format of the json renderer, dict keys such
+# as the buckets of a rating histogram may be integers
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+_encoder = NinjaJSONEncoder()
+
+
+def dumps(data: Any) -> bytes:
+    """
+    Encode `data` as JSON with orjson, falling back on NinjaJSONEncoder for the types orjson does not know
+    (decimals, lazy translations, pydantic models, ...).
+    """
+    return orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = 'application/json'
+
+    def render(self, request: HttpRequest, data: Any, *, response_status: int) -> Any:
+        return dumps(data)
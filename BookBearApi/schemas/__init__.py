@@ -1,8 +1,13 @@
 from .author_schema import *
 from .book_schema import *
+from .cache_schema import *
 from .custom_token_schemas import *
+from .eager_loading import eager_load
 from .genre_schema import *
-from .pagination_schema import AsyncPageNumberPagination
+from .import_schema import *
+from .pagination_schema import AsyncCursorPagination, AsyncPageNumberPagination, paginate_values
 from .publisher_schema import *
 from .relationship_schema import *
+from .stats_schema import *
+from .suggest_schema import *
 from .user_schema import *
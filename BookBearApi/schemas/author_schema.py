@@ -1,15 +1,20 @@
 from typing import Optional, List
 
-from ninja import FilterSchema, ModelSchema
+from django.db.models import Q
+from ninja import ModelSchema
 from pydantic import Field
 
 from BookBearApi.models import Author
 from BookBearApi.schemas.relationship_schema import BookRelationshipSchema
+from BookBearApi.schemas.rendition_schema import RenditionUrls
+from BookBearApi.schemas.text_filter import TextFilterSchema
 from BookBearApi.schemas.validators_mixin import UniqueNameMixin
 
 
 class AuthorSchema(ModelSchema):
     avatar: Optional[str] = None
+    avatar_thumb: Optional[str] = None
+    avatar_renditions: RenditionUrls = None
     books: List['BookRelationshipSchema'] = None
 
     class Meta:
@@ -30,8 +35,10 @@ class UpdateAuthorSchema(ModelSchema):
         fields_optional = '__all__'
 
 
-class FilterAuthorSchema(FilterSchema):
+class FilterAuthorSchema(TextFilterSchema):
     name: Optional[str] = Field(
-        None, description='Filter by authors name',
-        q='name__icontains'
+        None, description='Filter by authors name'
     )
+
+    def filter_name(self, value: Optional[str]) -> Q:
+        return self.text_filter('name', value)
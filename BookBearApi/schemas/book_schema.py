@@ -1,30 +1,59 @@
-from typing import Optional, List
+from datetime import date
+from enum import Enum
+from typing import Annotated, Dict, Optional, List
 
-from ninja import FilterSchema, ModelSchema
-from pydantic import Field
+from django.db.models import Q
+from ninja import ModelSchema
+from pydantic import AfterValidator, Field, computed_field
 
+from BookBearApi.isbn import clean_isbn
 from BookBearApi.models import Book
+from BookBearApi.ratings import RATING_BUCKETS
 from BookBearApi.schemas.relationship_schema import AuthorRelationshipSchema, GenreRelationshipSchema, \
     PublisherRelationshipSchema
+from BookBearApi.schemas.rendition_schema import RenditionUrls
+from BookBearApi.schemas.text_filter import TextFilterSchema
 from BookBearApi.schemas.user_schema import ReviewBookSchema
 
+# ISBN-10 or ISBN-13 stored as its normalized ISBN-13, blank clears it
+Isbn = Annotated[str, AfterValidator(clean_isbn)]
+
 
 class BookSchema(ModelSchema):
     authors: List[AuthorRelationshipSchema] = None
     genres: List[GenreRelationshipSchema] = None
     publisher: Optional[PublisherRelationshipSchema] = None
-    reviews: List['ReviewBookSchema'] = None
 
     cover: Optional[str] = None
+    cover_thumb: Optional[str] = None
+    cover_renditions: RenditionUrls = None
+
+    # Read from the histogram columns of the book, rendered as rating_histogram; the reviews are paginated from
+    # /book/{id}/reviews
+    rating_1: int = Field(0, exclude=True)
+    rating_2: int = Field(0, exclude=True)
+    rating_3: int = Field(0, exclude=True)
+    rating_4: int = Field(0, exclude=True)
+    rating_5: int = Field(0, exclude=True)
 
     class Meta:
         model = Book
-        fields = ('id', 'title', 'publication_date', 'synopsis', 'score', 'age_rating', 'publisher', 'authors',
-                  'genres')
+        fields = ('id', 'title', 'isbn', 'publication_date', 'synopsis', 'score', 'rating_count', 'age_rating',
+                  'publisher', 'authors', 'genres')
+
+    @computed_field
+    @property
+    def rating_histogram(self) -> Dict[int, int]:
+        return {bucket: getattr(self, f'rating_{bucket}') for bucket in RATING_BUCKETS}
+
+
+class BookExportSchema(BookSchema):
+    reviews: List[ReviewBookSchema] = None
 
 
 class CreateBookSchema(ModelSchema):
     publisher: Optional[int] = None
+    isbn: Isbn = ''
 
     class Meta:
         model = Book
@@ -34,6 +63,7 @@ class CreateBookSchema(ModelSchema):
 
 class UpdateBookSchema(ModelSchema):
     publisher: Optional[int] = None
+    isbn: Isbn = None
 
     class Meta:
         model = Book
@@ -41,38 +71,78 @@ class UpdateBookSchema(ModelSchema):
         fields_optional = '__all__'
 
 
-class FilterBookSchema(FilterSchema):
+class ReviewOrder(str, Enum):
+    RECENT = 'recent'
+    RATING = 'rating'
+
+
+class FilterBookSchema(TextFilterSchema):
     title: Optional[str] = Field(
-        None, description='Filter books by title',
-        q='title__icontains'
+        None, description='Filter books by title'
+    )
+
+    publication_date: Optional[date] = Field(
+        None, description='Filter books published on this date'
+    )
+
+    publication_year: Optional[int] = Field(
+        None, description='Filter books published in this year',
+        q='publication_date__year'
     )
 
-    publication_date: Optional[str] = Field(
-        None, description='Filter books by publication date',
-        q='publication_date__icontains'
+    published_after: Optional[date] = Field(
+        None, description='Filter books published on or after this date',
+        q='publication_date__gte'
+    )
+
+    published_before: Optional[date] = Field(
+        None, description='Filter books published on or before this date',
+        q='publication_date__lte'
     )
 
     score: Optional[float] = Field(
-        None, description='Filter books by score',
-        q='score__icontains'
+        None, description='Filter books by score'
+    )
+
+    min_score: Optional[float] = Field(
+        None, description='Filter books with at least this score',
+        q='score__gte'
+    )
+
+    max_score: Optional[float] = Field(
+        None, description='Filter books with at most this score',
+        q='score__lte'
     )
 
     age_rating: Optional[str] = Field(
-        None, description='Filter books by age rating',
-        q='age_rating__icontains'
+        None, description='Filter books by age rating'
     )
 
     publisher: Optional[str] = Field(
-        None, description='Filter books by publisher',
-        q='publisher__name__icontains'
+        None, description='Filter books by publisher'
     )
 
     authors: Optional[str] = Field(
-        None, description='Filter books by author',
-        q='authors__name__icontains'
+        None, description='Filter books by author'
     )
 
     genres: Optional[str] = Field(
-        None, description='Filter books by genre',
-        q='genres__name__icontains'
+        None, description='Filter books by genre'
     )
+
+    def filter_title(self, value: Optional[str]) -> Q:
+        return self.text_filter('title', value)
+
+    def filter_publisher(self, value: Optional[str]) -> Q:
+        return self.text_filter('publisher__name', value)
+
+    def filter_authors(self, value: Optional[str]) -> Q:
+        # A semi-join instead of a join, which would repeat the books having several matching authors
+        if value is None:
+            return Q()
+        return Q(pk__in=Book.authors.through.objects.filter(self.text_filter('author__name', value)).values('book_id'))
+
+    def filter_genres(self, value: Optional[str]) -> Q:
+        if value is None:
+            return Q()
+        return Q(pk__in=Book.genres.through.objects.filter(self.text_filter('genre__name', value)).values('book_id'))
@@ -0,0 +1,9 @@
+from ninja import Schema
+
+
+class UserCacheStatsSchema(Schema):
+    hits: int
+    misses: int
+    size: int
+    max_entries: int
+    timeout: int
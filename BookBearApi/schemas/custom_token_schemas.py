@@ -1,15 +1,34 @@
 from typing import Optional, Type, cast, Dict
 
 from dj_ninja_auth.jwt import app_settings
-from dj_ninja_auth.jwt.schema import JWTTokenInputSchemaMixin
+from dj_ninja_auth.jwt.schema import JWTTokenInputSchemaMixin, TokenPairInputSchema
 from dj_ninja_auth.jwt.tokens import RefreshToken
 from dj_ninja_auth.schema import SuccessMessageMixin, LoginInputSchema
 from django.contrib.auth.models import update_last_login, AbstractUser
 from ninja import Schema
 
+from BookBearApi.async_auth import FINGERPRINT_CLAIM, user_fingerprint
 from BookBearApi.schemas.user_schema import UserSchema
 
 
+def get_token_pair(user: AbstractUser) -> Dict:
+    """
+    Issue a refresh and an access token for `user`, both carrying the fingerprint of the user that tells
+    AsyncJWTBaseAuthentication.get_user whether its cached user can be reused. The access tokens obtained later
+    with the refresh token copy it.
+    """
+    refresh = RefreshToken.for_user(user)
+    refresh = cast(RefreshToken, refresh)
+    refresh[FINGERPRINT_CLAIM] = user_fingerprint(user)
+    return {"refresh": str(refresh), "access": str(refresh.access_token)}
+
+
+class FingerprintTokenPairInputSchema(TokenPairInputSchema):
+    @classmethod
+    def get_token(cls, user: AbstractUser) -> Dict:
+        return get_token_pair(user)
+
+
 class TokenRefreshOutputCookieSchema(Schema):
     access: str
 
@@ -59,9 +78,4 @@ class CustomTokenPairOutputSchema(CustomLoginOutputSchema):
 class CustomTokenPairInputSchema(CustomTokenInputSchemaBase):
     @classmethod
     def get_token(cls, user: AbstractUser) -> Dict:
-        values = {}
-        refresh = RefreshToken.for_user(user)
-        refresh = cast(RefreshToken, refresh)
-        values["refresh"] = str(refresh)
-        values["access"] = str(refresh.access_token)
-        return values
+        return get_token_pair(user)
@@ -0,0 +1,112 @@
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, ForwardRef, List, Optional, Tuple, Type, get_args
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models import Prefetch, QuerySet
+from pydantic import BaseModel
+
+
+@dataclass(frozen=True)
+class LoadingPlan:
+    """
+    The select_related/prefetch_related/only() calls needed to serialize a schema from a model.
+    """
+    select_related: Tuple[str, ...] = ()
+    prefetch_related: Tuple[Tuple[str, Type[models.Model], 'LoadingPlan'], ...] = ()
+    only: Optional[Tuple[str, ...]] = ()
+
+    def apply(self, queryset: QuerySet) -> QuerySet:
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*[
+                Prefetch(lookup, queryset=plan.apply(model._default_manager.all()))
+                for lookup, model, plan in self.prefetch_related
+            ])
+        if self.only is not None:
+            queryset = queryset.only(*self.only)
+        return queryset
+
+
+def eager_load(queryset: QuerySet, schema: Type[BaseModel]) -> QuerySet:
+    """
+    Apply to `queryset` the eager loading needed to serialize its rows with `schema` without N+1 queries.
+    """
+    return build_loading_plan(queryset.model, schema).apply(queryset)
+
+
+@lru_cache(maxsize=None)
+def build_loading_plan(model: Type[models.Model], schema: Type[BaseModel]) -> LoadingPlan:
+    """
+    Walk the fields of a ninja schema and map them onto the relations of `model`.
+
+    Forward foreign keys and one-to-ones rendered with a nested schema are joined with select_related,
+    many-to-many and reverse relations become a Prefetch with its own nested plan, and the concrete columns
+    the schema reads are kept with only(). Levels whose schema exposes attributes that are not model fields
+    (properties, resolvers) are loaded without only() so those attributes keep working.
+    """
+    select_related: List[str] = []
+    prefetch_related: List[Tuple[str, Type[models.Model], LoadingPlan]] = []
+    only: Optional[List[str]] = [] if not getattr(schema, '_ninja_resolvers', None) else None
+
+    for name, schema_field in schema.model_fields.items():
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            only = None
+            continue
+
+        nested = _nested_schema(schema, schema_field.annotation)
+
+        if not model_field.is_relation:
+            if only is not None:
+                only.append(model_field.name)
+        elif model_field.many_to_one or (model_field.one_to_one and model_field.concrete):
+            if only is not None:
+                only.append(model_field.name)
+            if nested is None:
+                continue
+            plan = build_loading_plan(model_field.related_model, nested)
+            select_related.append(name)
+            select_related.extend(f'{name}__{lookup}' for lookup in plan.select_related)
+            prefetch_related.extend(
+                (f'{name}__{lookup}', related_model, related_plan)
+                for lookup, related_model, related_plan in plan.prefetch_related
+            )
+            if only is not None and plan.only is not None:
+                only.extend(f'{name}__{column}' for column in plan.only)
+            elif plan.only is None:
+                only = None
+        else:
+            plan = build_loading_plan(model_field.related_model, nested) if nested else LoadingPlan(only=('pk',))
+            if plan.only is not None and not model_field.many_to_many:
+                # Reverse foreign keys are matched back to their parent through the foreign key column.
+                plan = LoadingPlan(plan.select_related, plan.prefetch_related,
+                                   plan.only + (model_field.field.name,))
+            prefetch_related.append((name, model_field.related_model, plan))
+
+    return LoadingPlan(
+        select_related=tuple(select_related),
+        prefetch_related=tuple(prefetch_related),
+        only=tuple(only) if only is not None else None,
+    )
+
+
+def _nested_schema(schema: Type[BaseModel], annotation: Any) -> Optional[Type[BaseModel]]:
+    """
+    Find the schema class inside annotations such as Optional[Schema], List[Schema] or List['Schema'].
+    """
+    if isinstance(annotation, str):
+        annotation = ForwardRef(annotation)
+    if isinstance(annotation, ForwardRef):
+        annotation = getattr(sys.modules[schema.__module__], annotation.__forward_arg__, None)
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    for argument in get_args(annotation):
+        nested = _nested_schema(schema, argument)
+        if nested is not None:
+            return nested
+    return None
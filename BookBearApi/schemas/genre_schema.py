@@ -1,10 +1,12 @@
 from typing import List, Optional
 
-from ninja import FilterSchema, ModelSchema
+from django.db.models import Q
+from ninja import ModelSchema
 from pydantic import Field
 
 from BookBearApi.models import Genre
 from BookBearApi.schemas.relationship_schema import BookRelationshipSchema
+from BookBearApi.schemas.text_filter import TextFilterSchema
 from BookBearApi.schemas.validators_mixin import UniqueNameMixin
 
 
@@ -29,8 +31,10 @@ class UpdateGenreSchema(ModelSchema):
         fields_optional = 'name'
 
 
-class FilterGenreSchema(FilterSchema):
+class FilterGenreSchema(TextFilterSchema):
     name: Optional[str] = Field(
-        None, description='Filter by genres name',
-        q='name__icontains'
+        None, description='Filter by genres name'
     )
+
+    def filter_name(self, value: Optional[str]) -> Q:
+        return self.text_filter('name', value)
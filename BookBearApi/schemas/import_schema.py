@@ -0,0 +1,76 @@
+from datetime import date
+from typing import List, Optional
+
+from ninja import ModelSchema, Schema
+from pydantic import Field, field_validator
+
+from BookBearApi.models import Book, Job, LibraryImport
+from BookBearApi.schemas.book_schema import Isbn
+
+
+class ImportAuthorSchema(Schema):
+    name: str = Field(..., min_length=1, max_length=250)
+    # Only needed when the author does not exist yet
+    birth_date: Optional[date] = None
+
+
+class ImportBookSchema(Schema):
+    title: str = Field(..., min_length=1, max_length=250)
+    isbn: Isbn = ''
+    publication_date: date
+    synopsis: str = ''
+    age_rating: str = Book.EVERYONE
+    publisher: Optional[str] = Field(None, min_length=1, max_length=250)
+    authors: List[ImportAuthorSchema] = []
+    genres: List[str] = []
+
+    @field_validator('age_rating')
+    @classmethod
+    def validate_age_rating(cls, value: str) -> str:
+        if value not in Book.AGE_RATING_CHOICES:
+            raise ValueError(f"Age rating must be one of {', '.join(Book.AGE_RATING_CHOICES)}")
+        return value
+
+    @field_validator('authors', mode='before')
+    @classmethod
+    def validate_authors(cls, value):
+        return [{'name': author} if isinstance(author, str) else author for author in value or []]
+
+    @field_validator('genres')
+    @classmethod
+    def validate_genres(cls, value: List[str]) -> List[str]:
+        for genre in value:
+            if not 0 < len(genre) <= 250:
+                raise ValueError('Genre names must have between 1 and 250 characters')
+        return value
+
+
+class ImportErrorSchema(Schema):
+    line: int
+    message: str
+
+
+class CatalogImportSchema(Schema):
+    rows: int
+    imported_books: int
+    created_authors: int
+    created_publishers: int
+    created_genres: int
+    error_count: int
+    errors: List[ImportErrorSchema]
+
+
+class LibraryImportSchema(ModelSchema):
+    status: str
+    errors: List[ImportErrorSchema]
+
+    class Meta:
+        model = LibraryImport
+        fields = ('id', 'source', 'total_rows', 'processed_rows', 'imported_books', 'unmatched_rows', 'error_count',
+                  'created_at', 'finished_at')
+
+    @staticmethod
+    def resolve_status(obj: LibraryImport) -> str:
+        if obj.finished_at is not None:
+            return Job.DONE
+        return obj.job.status if obj.job is not None else Job.FAILED
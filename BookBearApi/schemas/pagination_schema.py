@@ -1,32 +1,239 @@
-from typing import Any
+from functools import partial, wraps
+from typing import Any, Callable, List, Optional, Tuple, Type
 
-from django.db.models import QuerySet
-from ninja import Field, Schema
-from ninja.pagination import AsyncPaginationBase
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, QuerySet
+from django.http import HttpResponse
+from ninja import Field, ModelSchema, Schema
+from ninja.pagination import AsyncPaginationBase, make_response_paginated
+from ninja.utils import contribute_operation_args, contribute_operation_callback
+from pydantic import BaseModel
+
+from BookBearApi.conditional import aconditional_response
+from BookBearApi.exceptions import InvalidCursorException
+from BookBearApi.renderers import dumps
+from .values_loading import aload_values, values_adapter
+
+
+class CursorSerializer:
+    """
+    JSON serializer for the signed cursor, able to encode dates and decimals of the ordering key.
+    """
+
+    def dumps(self, obj):
+        return DjangoJSONEncoder(separators=(',', ':')).encode(obj).encode('latin-1')
+
+    def loads(self, data):
+        return signing.JSONSerializer().loads(data)
 
 
 class AsyncPageNumberPagination(AsyncPaginationBase):
+    """
+    Page number pagination with an optional keyset (cursor) mode.
+
+    Without `cursor` the page is sliced with OFFSET and the total is counted. When the view returns a
+    queryset, every page also exposes `next_cursor`: passing it back as `cursor` fetches the following
+    rows with a `WHERE (ordering key, pk) > last seen` filter, so deep pages cost the same as the first
+    one and the count is skipped unless `count=true` is asked for.
+
+    With `values_schema` the items of a queryset are read as dicts shaped like that schema instead of model
+    instances, see paginate_values.
+    """
+    cursor_salt = 'BookBearApi.pagination.cursor'
+
+    def __init__(self, *, values_schema: Optional[Type[BaseModel]] = None, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.values_schema = values_schema
+
     def paginate_queryset(self, queryset: QuerySet, pagination: Any, **params: Any) -> Any:
         pass
 
     class Input(Schema):
         page: int = Field(1, ge=1)
         page_size: int = Field(10, ge=1, le=50)
+        cursor: Optional[str] = Field(
+            None, description='Opaque cursor returned as next_cursor, empty to start from the first item'
+        )
+        count: bool = Field(False, description='Count the items when paginating with a cursor')
 
     class Output(Schema):
-        nb_items: int = Field(ge=0)
-        nb_pages: int = Field(ge=0)
+        nb_items: Optional[int] = Field(None, ge=0)
+        nb_pages: Optional[int] = Field(None, ge=0)
         page_size: int = Field(ge=1)
-        page: int = Field(ge=1)
+        page: Optional[int] = Field(None, ge=1)
+        next_cursor: Optional[str] = None
 
     async def apaginate_queryset(self, queryset, pagination: Input, **params) -> Any:
+        if pagination.cursor is not None:
+            return await self._apaginate_cursor(queryset, pagination)
+
         offset = (pagination.page - 1) * pagination.page_size
         nb_items = await self._aitems_count(queryset)
+        next_cursor = None
+
+        if isinstance(queryset, QuerySet):
+            queryset, ordering = self._keyset_ordering(queryset)
+            items, keys = await self._afetch(queryset[offset: offset + pagination.page_size], ordering)
+            if items and offset + pagination.page_size < nb_items:
+                next_cursor = self._encode_cursor(ordering, keys[-1])
+        else:
+            items = queryset[offset: offset + pagination.page_size]
 
         return {
             "nb_items": nb_items,
             "nb_pages": (nb_items + pagination.page_size - 1) // pagination.page_size,
             "page_size": pagination.page_size,
             "page": pagination.page,
-            "items": queryset[offset: offset + pagination.page_size],
+            "next_cursor": next_cursor,
+            "items": items,
+        }
+
+    async def _apaginate_cursor(self, queryset, pagination: Input) -> Any:
+        if not isinstance(queryset, QuerySet):
+            raise InvalidCursorException(detail="Cursor pagination is not available for this resource.")
+
+        queryset, ordering = self._keyset_ordering(queryset)
+        nb_items = await queryset.acount() if pagination.count else None
+
+        if pagination.cursor:
+            values = self._decode_cursor(ordering, pagination.cursor)
+            queryset = queryset.filter(self._keyset_filter(ordering, values))
+
+        items, keys = await self._afetch(queryset[:pagination.page_size + 1], ordering)
+        next_cursor = None
+        if len(items) > pagination.page_size:
+            items = items[:pagination.page_size]
+            next_cursor = self._encode_cursor(ordering, keys[pagination.page_size - 1])
+
+        return {
+            "nb_items": nb_items,
+            "nb_pages": None if nb_items is None else (nb_items + pagination.page_size - 1) // pagination.page_size,
+            "page_size": pagination.page_size,
+            "page": None,
+            "next_cursor": next_cursor,
+            "items": items,
         }
+
+    async def _afetch(self, queryset: QuerySet, ordering: List[str]) -> Tuple[List[Any], List[Any]]:
+        """
+        Fetch the items of a page, model instances or rows of `values_schema`, and the values of the ordering key
+        of each of them.
+        """
+        if self.values_schema is None:
+            items = [item async for item in queryset]
+            return items, [self._ordering_values(ordering, item) for item in items]
+        return await aload_values(queryset, self.values_schema, [field.lstrip('-') for field in ordering])
+
+    @staticmethod
+    def _keyset_ordering(queryset: QuerySet) -> Tuple[QuerySet, List[str]]:
+        """
+        Return the queryset ordered by its current ordering plus the primary key as a tiebreaker.
+        """
+        ordering = [str(field) for field in (queryset.query.order_by or queryset.model._meta.ordering)]
+        pk_names = {'pk', queryset.model._meta.pk.name}
+        if not any(field.lstrip('-') in pk_names for field in ordering):
+            ordering.append('pk')
+        fields, deferred = queryset.query.deferred_loading
+        if fields and not deferred:
+            # The cursor is read from the last item: its ordering columns must not be left out by only()
+            columns = {field.name for field in queryset.model._meta.concrete_fields}
+            names = [field.lstrip('-') for field in ordering]
+            queryset = queryset.only(*fields, *(name for name in names if name in columns))
+        return queryset.order_by(*ordering), ordering
+
+    @staticmethod
+    def _keyset_filter(ordering: List[str], values: List[Any]) -> Q:
+        """
+        Build `(a > x) OR (a = x AND b > y) OR ...` for the given ordering, honouring descending fields.
+        """
+        condition = Q()
+        for index, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            term = Q(**{f'{name}__{lookup}': values[index]})
+            for previous, value in zip(ordering[:index], values[:index]):
+                term &= Q(**{previous.lstrip('-'): value})
+            condition |= term
+        return condition
+
+    @classmethod
+    def _encode_cursor(cls, ordering: List[str], values: List[Any]) -> str:
+        return signing.dumps({'o': ordering, 'v': values}, salt=cls.cursor_salt, serializer=CursorSerializer,
+                             compress=True)
+
+    @staticmethod
+    def _ordering_values(ordering: List[str], item: Any) -> List[Any]:
+        values = []
+        for field in ordering:
+            name = field.lstrip('-')
+            if name == 'pk':
+                values.append(item.pk)
+                continue
+            try:
+                values.append(getattr(item, item._meta.get_field(name).attname))
+            except FieldDoesNotExist:
+                # Annotations such as the rank of a search
+                values.append(getattr(item, name))
+        return values
+
+    @classmethod
+    def _decode_cursor(cls, ordering: List[str], cursor: str) -> List[Any]:
+        try:
+            payload = signing.loads(cursor, salt=cls.cursor_salt, serializer=CursorSerializer)
+        except signing.BadSignature:
+            raise InvalidCursorException()
+        if payload.get('o') != ordering or len(payload.get('v', [])) != len(ordering):
+            raise InvalidCursorException(detail="Cursor does not match the requested ordering.")
+        return payload['v']
+
+
+class AsyncCursorPagination(AsyncPageNumberPagination):
+    """
+    Keyset only pagination, for feeds and other lists read from their newest item and never jumped into.
+    """
+
+    class Input(Schema):
+        page_size: int = Field(10, ge=1, le=50)
+        cursor: str = Field('', description='Opaque cursor returned as next_cursor, empty for the first page')
+        count: bool = Field(False, description='Count the items')
+
+    async def apaginate_queryset(self, queryset, pagination: Input, **params) -> Any:
+        return await self._apaginate_cursor(queryset, pagination)
+
+
+def paginate_values(schema: Type[ModelSchema],
+                    pagination_class: Type[AsyncPageNumberPagination] = AsyncPageNumberPagination,
+                    conditional: bool = False, **params: Any) -> Callable:
+    """
+    Paginate a controller route returning a queryset of `schema` items like `paginate(pagination_class)`, reading
+    the page with `.values()` and rendering it with a precompiled TypeAdapter and orjson.
+
+    The response is returned as is rather than validated again by ninja, which reads every attribute of every item
+    through its DjangoGetter. The route keeps its `response` for the OpenAPI schema. With `conditional`, the
+    queryset is first checked against the `If-None-Match`/`If-Modified-Since` of the request, see
+    aconditional_response.
+    """
+    paginator = pagination_class(values_schema=schema, **params)
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        async def view_with_values(controller, **kwargs: Any) -> HttpResponse:
+            pagination = kwargs.pop('ninja_pagination')
+            request = controller.context.request
+            queryset = await func(controller, **kwargs)
+
+            async def render() -> HttpResponse:
+                page = await paginator.apaginate_queryset(queryset, pagination=pagination, request=request)
+                page['items'] = values_adapter(schema.Meta.model, schema).validate_python(page['items'])
+                return HttpResponse(dumps(page), content_type='application/json; charset=utf-8')
+
+            if conditional:
+                return await aconditional_response(request, queryset, render)
+            return await render()
+
+        contribute_operation_args(view_with_values, 'ninja_pagination', paginator.Input, paginator.InputSource)
+        contribute_operation_callback(view_with_values, partial(make_response_paginated, paginator))
+        return view_with_values
+    return decorator
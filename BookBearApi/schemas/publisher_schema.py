@@ -1,15 +1,20 @@
 from typing import Optional, List
 
-from ninja import FilterSchema, ModelSchema
+from django.db.models import Q
+from ninja import ModelSchema
 from pydantic import Field
 
 from BookBearApi.models import Publisher
 from BookBearApi.schemas.relationship_schema import BookRelationshipSchema
+from BookBearApi.schemas.rendition_schema import RenditionUrls
+from BookBearApi.schemas.text_filter import TextFilterSchema
 from BookBearApi.schemas.validators_mixin import UniqueNameMixin
 
 
 class PublisherSchema(ModelSchema):
     logo: Optional[str] = None
+    logo_thumb: Optional[str] = None
+    logo_renditions: RenditionUrls = None
     books: List['BookRelationshipSchema'] = None
 
     class Meta:
@@ -30,8 +35,10 @@ class UpdatePublisherSchema(ModelSchema):
         fields_optional = 'name'
 
 
-class FilterPublisherSchema(FilterSchema):
+class FilterPublisherSchema(TextFilterSchema):
     name: Optional[str] = Field(
-        None, description='Filter by publishers name',
-        q='name__icontains'
+        None, description='Filter by publishers name'
     )
+
+    def filter_name(self, value: Optional[str]) -> Q:
+        return self.text_filter('name', value)
@@ -8,19 +8,19 @@ from BookBearApi.models import User, Author, Publisher, Book, Genre
 class UserRelationshipSchema(ModelSchema):
     class Meta:
         model = User
-        fields = ('id', 'username', 'avatar')
+        fields = ('id', 'username', 'avatar', 'avatar_thumb')
 
 
 class AuthorRelationshipSchema(ModelSchema):
     class Meta:
         model = Author
-        fields = ('id', 'name', 'avatar')
+        fields = ('id', 'name', 'avatar', 'avatar_thumb')
 
 
 class PublisherRelationshipSchema(ModelSchema):
     class Meta:
         model = Publisher
-        fields = ('id', 'name', 'logo')
+        fields = ('id', 'name', 'logo', 'logo_thumb')
 
 
 class GenreRelationshipSchema(ModelSchema):
@@ -35,4 +35,4 @@ class BookRelationshipSchema(ModelSchema):
 
     class Meta:
         model = Book
-        fields = ('id', 'title', 'score', 'age_rating', 'cover')
+        fields = ('id', 'title', 'score', 'age_rating', 'cover', 'cover_thumb')
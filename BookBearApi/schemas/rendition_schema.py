@@ -0,0 +1,15 @@
+from typing import Annotated, Dict
+
+from django.core.files.storage import default_storage
+from pydantic import AfterValidator
+
+
+def _rendition_urls(renditions: Dict[str, Dict[str, str]]) -> Dict[str, Dict[str, str]]:
+    return {
+        size: {file_format: default_storage.url(path) for file_format, path in formats.items()}
+        for size, formats in renditions.items()
+    }
+
+
+# Stored paths of the renditions of an image by size and format (see BookBearApi.images), rendered as URLs
+RenditionUrls = Annotated[Dict[str, Dict[str, str]], AfterValidator(_rendition_urls)]
@@ -0,0 +1,23 @@
+from typing import Dict, List, Optional
+
+from ninja import Schema
+
+
+class RankedItemSchema(Schema):
+    id: int
+    name: str
+    count: int
+
+
+class UserStatsSchema(Schema):
+    total: int
+    reading: int
+    stopped: int
+    completed: int
+    pending: int
+    abandoned: int
+    rating_count: int
+    average_rating: Optional[float]
+    rating_histogram: Dict[int, int]
+    top_genres: List[RankedItemSchema]
+    top_authors: List[RankedItemSchema]
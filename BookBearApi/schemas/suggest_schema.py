@@ -0,0 +1,11 @@
+from typing import Literal
+
+from ninja import Schema
+
+SuggestionKind = Literal['author', 'publisher', 'genre', 'book']
+
+
+class SuggestionSchema(Schema):
+    kind: SuggestionKind
+    id: int
+    name: str
@@ -0,0 +1,48 @@
+from enum import Enum
+from typing import Optional
+
+from django.contrib.postgres.lookups import TrigramSimilar
+from django.db import connection
+from django.db.models import Q
+from django.db.models.functions import Upper
+from ninja import FilterSchema
+from pydantic import Field
+
+
+class TextMatch(str, Enum):
+    CONTAINS = 'contains'
+    PREFIX = 'prefix'
+    SIMILAR = 'similar'
+
+
+def text_filter(lookup: str, value: Optional[str], match: TextMatch = TextMatch.CONTAINS) -> Q:
+    """
+    Build the Q matching the text column `lookup` against `value`.
+
+    On PostgreSQL the name and title columns have a pg_trgm GIN index over UPPER(column), the expression
+    compared by icontains and istartswith, and `similar` uses the trigram similarity operator. Other databases
+    fall back to icontains for `similar`.
+    """
+    if value is None:
+        return Q()
+    if match == TextMatch.PREFIX:
+        return Q(**{f'{lookup}__istartswith': value})
+    if match == TextMatch.SIMILAR and connection.vendor == 'postgresql':
+        # Compared in upper case to use the same index as icontains
+        return Q(TrigramSimilar(Upper(lookup), value.upper()))
+    return Q(**{f'{lookup}__icontains': value})
+
+
+class TextFilterSchema(FilterSchema):
+    """
+    Filter schema whose text filters share the `match` mode, see `text_filter`.
+    """
+    match: TextMatch = Field(
+        TextMatch.CONTAINS, description='How text filters match: contains, prefix or similar (typo tolerant)'
+    )
+
+    def filter_match(self, value: TextMatch) -> Q:
+        return Q()
+
+    def text_filter(self, lookup: str, value: Optional[str]) -> Q:
+        return text_filter(lookup, value, self.match)
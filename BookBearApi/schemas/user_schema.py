@@ -1,21 +1,28 @@
-from typing import Optional, List
+from datetime import date
+from typing import Annotated, Literal, Optional, List, Union
 
-from ninja import ModelSchema, FilterSchema
+from django.db.models import Q
+from ninja import FilterSchema, ModelSchema, Schema
 from pydantic import Field
 
 from BookBearApi.models import User, UserBook
-from BookBearApi.schemas.relationship_schema import BookRelationshipSchema, UserRelationshipSchema, \
-    AuthorRelationshipSchema, PublisherRelationshipSchema, GenreRelationshipSchema
+from BookBearApi.schemas.relationship_schema import BookRelationshipSchema, UserRelationshipSchema
+from BookBearApi.schemas.rendition_schema import RenditionUrls
+from BookBearApi.schemas.text_filter import TextFilterSchema
 from BookBearApi.schemas.validators_mixin import UniqueEmailMixin
 
 
 class UserSchema(ModelSchema):
-    reviewed_books: List['UserBookSchema'] = None
-    followed_authors: List[AuthorRelationshipSchema] = None
-    followed_publishers: List[PublisherRelationshipSchema] = None
-    favorite_genres: List[GenreRelationshipSchema] = None
+    # Annotated by BookBearApi.users.with_counts, the collections are paginated from /me/books, /me/authors,
+    # /me/publishers and /me/genres
+    books_count: int
+    followed_authors_count: int
+    followed_publishers_count: int
+    favorite_genres_count: int
 
     avatar: Optional[str] = None
+    avatar_thumb: Optional[str] = None
+    avatar_renditions: RenditionUrls = None
 
     class Meta:
         model = User
@@ -58,16 +65,84 @@ class UpdateUserBookSchema(ModelSchema):
         fields_optional = '__all__'
 
 
+# Operations accepted by a single /me/books/batch request
+MAX_LIBRARY_BATCH_OPERATIONS = 1000
+
+
+class CreateUserBookOperationSchema(CreateUserBookSchema):
+    op: Literal['create']
+    book: int
+
+
+class UpdateUserBookOperationSchema(UpdateUserBookSchema):
+    op: Literal['update']
+    book: int
+
+
+class DeleteUserBookOperationSchema(Schema):
+    op: Literal['delete']
+    book: int
+
+
+class UserBookBatchSchema(Schema):
+    operations: List[Annotated[
+        Union[CreateUserBookOperationSchema, UpdateUserBookOperationSchema, DeleteUserBookOperationSchema],
+        Field(discriminator='op'),
+    ]] = Field(..., min_length=1, max_length=MAX_LIBRARY_BATCH_OPERATIONS)
+
+
+class UserBookBatchResultSchema(Schema):
+    created: int
+    updated: int
+    deleted: int
+
+
 class ReviewBookSchema(ModelSchema):
     user: UserRelationshipSchema
 
     class Meta:
         model = UserBook
-        fields = ('situation', 'rating', 'review')
+        fields = ('situation', 'rating', 'review', 'date_added')
 
 
-class FilterUserSchema(FilterSchema):
+class FilterUserSchema(TextFilterSchema):
     username: Optional[str] = Field(
-        None, description='Filter by user name',
-        q='username__icontains'
+        None, description='Filter by user name'
+    )
+
+    def filter_username(self, value: Optional[str]) -> Q:
+        return self.text_filter('username', value)
+
+
+class FilterUserBookSchema(FilterSchema):
+    situation: Optional[str] = Field(
+        None, description='Filter books by situation: R, S, C, P or A'
+    )
+
+    rating: Optional[float] = Field(
+        None, description='Filter books by rating'
+    )
+
+    min_rating: Optional[float] = Field(
+        None, description='Filter books rated at least this',
+        q='rating__gte'
+    )
+
+    max_rating: Optional[float] = Field(
+        None, description='Filter books rated at most this',
+        q='rating__lte'
+    )
+
+    date_added: Optional[date] = Field(
+        None, description='Filter books added on this date'
+    )
+
+    added_after: Optional[date] = Field(
+        None, description='Filter books added on or after this date',
+        q='date_added__gte'
+    )
+
+    added_before: Optional[date] = Field(
+        None, description='Filter books added on or before this date',
+        q='date_added__lte'
     )
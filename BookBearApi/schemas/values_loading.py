@@ -0,0 +1,168 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache, partial
+from typing import Annotated, Any, Dict, List, Optional, Sequence, Tuple, Type, Union, get_args, get_origin
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models import F, QuerySet
+from pydantic import AfterValidator, BaseModel, TypeAdapter
+from typing_extensions import TypedDict
+
+from .eager_loading import _nested_schema
+
+
+@dataclass(frozen=True)
+class ValuesPlan:
+    """
+    The .values() columns and related queries needed to build the rows of a schema without model instances.
+    """
+    columns: Tuple[str, ...] = ()
+    # Forward foreign keys rendered with a nested schema, read from the same row
+    joined: Tuple[Tuple[str, 'ValuesPlan'], ...] = ()
+    # Many-to-many and reverse relations, read in one query per relation: name, related model, lookup of the
+    # parent from the related model, plan of the related rows
+    related: Tuple[Tuple[str, Type[models.Model], str, 'ValuesPlan'], ...] = ()
+
+    def lookups(self, prefix: str = '') -> List[str]:
+        lookups = [f'{prefix}{column}' for column in self.columns]
+        for name, plan in self.joined:
+            # The foreign key itself tells a missing relation apart from a related row of NULLs
+            lookups.append(f'{prefix}{name}')
+            lookups.extend(plan.lookups(f'{prefix}{name}__'))
+        return lookups
+
+    def build(self, row: Dict[str, Any], prefix: str = '') -> Dict[str, Any]:
+        item = {column: row[f'{prefix}{column}'] for column in self.columns}
+        for name, plan in self.joined:
+            item[name] = None if row[f'{prefix}{name}'] is None else plan.build(row, f'{prefix}{name}__')
+        return item
+
+
+@lru_cache(maxsize=None)
+def build_values_plan(model: Type[models.Model], schema: Type[BaseModel]) -> ValuesPlan:
+    """
+    Walk the fields of a ninja schema and map them onto the columns and relations of `model`, like
+    build_loading_plan does for model instances.
+
+    Only schemas made of model fields can be read from .values(): resolvers, computed fields and attributes that
+    are not model fields raise TypeError.
+    """
+    if getattr(schema, '_ninja_resolvers', None) or schema.model_computed_fields:
+        raise TypeError(f'{schema.__name__} has resolvers or computed fields and cannot be built from values')
+    columns: List[str] = []
+    joined: List[Tuple[str, ValuesPlan]] = []
+    related: List[Tuple[str, Type[models.Model], str, ValuesPlan]] = []
+
+    for name, schema_field in schema.model_fields.items():
+        if schema_field.exclude:
+            continue
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            raise TypeError(f'{schema.__name__}.{name} is not a field of {model.__name__}')
+
+        nested = _nested_schema(schema, schema_field.annotation)
+
+        if not model_field.is_relation or (nested is None and model_field.concrete and not model_field.many_to_many):
+            columns.append(name)
+        elif nested is None:
+            raise TypeError(f'{schema.__name__}.{name} must be rendered with a nested schema to be built from values')
+        elif model_field.many_to_one or (model_field.one_to_one and model_field.concrete):
+            plan = build_values_plan(model_field.related_model, nested)
+            if plan.related:
+                raise TypeError(f'{nested.__name__} is joined from {schema.__name__} and cannot have relations')
+            joined.append((name, plan))
+        else:
+            parent = model_field.related_query_name() if model_field.concrete else model_field.field.name
+            related.append((name, model_field.related_model, parent, build_values_plan(model_field.related_model,
+                                                                                         nested)))
+
+    return ValuesPlan(columns=tuple(columns), joined=tuple(joined), related=tuple(related))
+
+
+def _load(plan: ValuesPlan, queryset: QuerySet, keys: Sequence[str] = (),
+          **expressions: Any) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Return the .values() rows of `queryset` and the items built from them, with their related lists.
+    """
+    lookups = dict.fromkeys(('pk', *plan.lookups(), *keys))
+    rows = list(queryset.prefetch_related(None).values(*lookups, **expressions))
+    items = [plan.build(row) for row in rows]
+    if rows and plan.related:
+        pks = [row['pk'] for row in rows]
+        for name, related_model, parent, related_plan in plan.related:
+            related_rows, related_items = _load(
+                related_plan, related_model._default_manager.filter(**{f'{parent}__in': pks}), parent_pk=F(parent)
+            )
+            children = defaultdict(list)
+            for row, item in zip(related_rows, related_items):
+                children[row['parent_pk']].append(item)
+            for pk, item in zip(pks, items):
+                item[name] = children[pk]
+    return rows, items
+
+
+def load_values(queryset: QuerySet, schema: Type[BaseModel],
+                keys: Sequence[str] = ()) -> Tuple[List[Dict[str, Any]], List[List[Any]]]:
+    """
+    Read the rows of `queryset` as dicts shaped like `schema`, ready for `values_adapter(model, schema)`, in one
+    query plus one per many-to-many or reverse relation, without building model instances. The values of the
+    lookups `keys` of every row, e.g. its ordering key, are returned next to them.
+    """
+    rows, items = _load(build_values_plan(queryset.model, schema), queryset, keys)
+    return items, [[row[key] for key in keys] for row in rows]
+
+
+aload_values = sync_to_async(load_values)
+
+
+def _file_url(field: models.FileField, name: Optional[str]) -> Optional[str]:
+    # Like the FieldFile of a model instance, which ninja renders as its URL
+    return field.storage.url(name) if name else None
+
+
+def _replace_schema(schema: Type[BaseModel], annotation: Any, row_type: type) -> Any:
+    """
+    Replace the nested schema found by _nested_schema in `annotation` with `row_type`, e.g.
+    List[AuthorRelationshipSchema] by List[AuthorRelationshipSchemaRow].
+    """
+    arguments = get_args(annotation)
+    if not arguments:
+        return row_type if _nested_schema(schema, annotation) is not None else annotation
+    arguments = tuple(_replace_schema(schema, argument, row_type) for argument in arguments)
+    origin = get_origin(annotation)
+    return Union[arguments] if origin is Union else origin[arguments]
+
+
+@lru_cache(maxsize=None)
+def _row_type(model: Type[models.Model], schema: Type[BaseModel]) -> type:
+    """
+    Build a TypedDict with the fields of `schema`: validating plain dicts against it runs in pydantic-core, without
+    the per-attribute lookups ninja does on model instances.
+    """
+    fields = {}
+    for name, schema_field in schema.model_fields.items():
+        if schema_field.exclude:
+            continue
+        model_field = model._meta.get_field(name)
+        nested = _nested_schema(schema, schema_field.annotation)
+        if nested is not None:
+            annotation = _replace_schema(schema, schema_field.annotation, _row_type(model_field.related_model, nested))
+        elif isinstance(model_field, models.FileField):
+            annotation = Annotated[Optional[str], AfterValidator(partial(_file_url, model_field))]
+        elif schema_field.metadata:
+            annotation = Annotated[(schema_field.annotation, *schema_field.metadata)]
+        else:
+            annotation = schema_field.annotation
+        fields[name] = annotation
+    return TypedDict(f'{schema.__name__}Row', fields)
+
+
+@lru_cache(maxsize=None)
+def values_adapter(model: Type[models.Model], schema: Type[BaseModel]) -> TypeAdapter:
+    """
+    Return the TypeAdapter validating a list of `load_values` rows of `schema`, built once per schema.
+    """
+    return TypeAdapter(List[_row_type(model, schema)])
@@ -0,0 +1,202 @@
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection as default_connection
+from django.db.models import F, FloatField, Q, QuerySet, Value
+from django.db.models.functions import Cast
+from django.db.models.expressions import RawSQL
+
+from .models import Author, Book, Publisher
+
+
+class BookSearchIndex:
+    """
+    Full-text index of the books over their title, synopsis, author names and publisher name.
+
+    This base class is the fallback for databases without a supported full-text engine: it keeps no index and
+    searches with icontains, every term having to match one of the indexed columns. The subclasses keep a real
+    index that is updated in the transaction of the write, through the receivers in signals.py.
+    """
+    # Number of books reindexed per statement
+    batch_size = 500
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def quote(self, name: str) -> str:
+        return self.connection.ops.quote_name(name)
+
+    @property
+    def tables(self) -> Dict[str, str]:
+        return {
+            'book': self.quote(Book._meta.db_table),
+            'book_authors': self.quote(Book.authors.through._meta.db_table),
+            'author': self.quote(Author._meta.db_table),
+            'publisher': self.quote(Publisher._meta.db_table),
+        }
+
+    def install(self) -> None:
+        pass
+
+    def uninstall(self) -> None:
+        pass
+
+    def update(self, book_ids: Iterable[int]) -> None:
+        """
+        Reindex the given books, after they or their authors and publisher changed.
+        """
+        book_ids = sorted(set(book_ids))
+        for start in range(0, len(book_ids), self.batch_size):
+            self._index_books(book_ids[start:start + self.batch_size])
+
+    def delete(self, book_ids: Iterable[int]) -> None:
+        pass
+
+    def rebuild(self) -> int:
+        """
+        Reindex every book, returning the number of books indexed.
+        """
+        book_ids = list(Book.objects.using(self.connection.alias).order_by('pk').values_list('pk', flat=True))
+        self.update(book_ids)
+        return len(book_ids)
+
+    def _index_books(self, book_ids: List[int]) -> None:
+        pass
+
+    @staticmethod
+    def terms(query: str) -> List[str]:
+        return re.findall(r'\w+', query)
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        """
+        Filter `queryset` to the books matching `query`, annotated with their `rank` and best matches first.
+        """
+        condition = Q()
+        for term in self.terms(query):
+            condition &= (Q(title__icontains=term) | Q(synopsis__icontains=term) | Q(authors__name__icontains=term)
+                          | Q(publisher__name__icontains=term))
+        if not condition:
+            return queryset.none()
+        matches = Book.objects.filter(condition).values('pk')
+        return queryset.filter(pk__in=matches).annotate(rank=Value(0.0)).order_by('-rank', 'pk')
+
+
+class PostgresBookSearchIndex(BookSearchIndex):
+    """
+    Weighted tsvector stored in Book.search_vector and indexed with GIN, ranked with ts_rank.
+
+    The GIN index is declared with the model, see Book.Meta.indexes.
+    """
+
+    @property
+    def config(self) -> str:
+        return settings.BOOK_SEARCH_CONFIG
+
+    def _index_books(self, book_ids: List[int]) -> None:
+        tables = self.tables
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'''
+                UPDATE {tables["book"]} AS b SET {self.quote("search_vector")} =
+                    setweight(to_tsvector(%(config)s::regconfig, b.title), 'A')
+                    || setweight(to_tsvector(%(config)s::regconfig, coalesce((
+                        SELECT string_agg(a.name, ' ') FROM {tables["book_authors"]} ba
+                        JOIN {tables["author"]} a ON a.id = ba.author_id WHERE ba.book_id = b.id
+                    ), '')), 'B')
+                    || setweight(to_tsvector(%(config)s::regconfig, coalesce((
+                        SELECT p.name FROM {tables["publisher"]} p WHERE p.id = b.publisher_id
+                    ), '')), 'B')
+                    || setweight(to_tsvector(%(config)s::regconfig, b.synopsis), 'C')
+                WHERE b.id = ANY(%(ids)s)
+                ''',
+                {'config': self.config, 'ids': book_ids},
+            )
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        if not self.terms(query):
+            return queryset.none()
+        search_query = SearchQuery(query, config=self.config, search_type='websearch')
+        # ts_rank is a real: the cursor holds it as a double, which only compares equal to the rank cast to one
+        return queryset.filter(search_vector=search_query).annotate(
+            rank=Cast(SearchRank(F('search_vector'), search_query), FloatField())
+        ).order_by('-rank', 'pk')
+
+
+class SQLiteBookSearchIndex(BookSearchIndex):
+    """
+    FTS5 table whose rowid is the book id, ranked with bm25.
+    """
+    table_name = 'BookBearApi_book_fts'
+    # bm25 weights of the title, synopsis, authors and publisher columns
+    weights = (10.0, 1.0, 5.0, 5.0)
+
+    def install(self) -> None:
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.quote(self.table_name)} '
+                f"USING fts5(title, synopsis, authors, publisher, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+
+    def uninstall(self) -> None:
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {self.quote(self.table_name)}')
+
+    def delete(self, book_ids: Iterable[int]) -> None:
+        book_ids = sorted(set(book_ids))
+        for start in range(0, len(book_ids), self.batch_size):
+            self._delete_books(book_ids[start:start + self.batch_size])
+
+    def _delete_books(self, book_ids: List[int]) -> None:
+        placeholders = ', '.join(['%s'] * len(book_ids))
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.quote(self.table_name)} WHERE rowid IN ({placeholders})', book_ids)
+
+    def _index_books(self, book_ids: List[int]) -> None:
+        tables = self.tables
+        placeholders = ', '.join(['%s'] * len(book_ids))
+        self._delete_books(book_ids)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'''
+                INSERT INTO {self.quote(self.table_name)} (rowid, title, synopsis, authors, publisher)
+                SELECT b.id, b.title, b.synopsis, coalesce((
+                    SELECT group_concat(a.name, ' ') FROM {tables["book_authors"]} ba
+                    JOIN {tables["author"]} a ON a.id = ba.author_id WHERE ba.book_id = b.id
+                ), ''), coalesce(p.name, '')
+                FROM {tables["book"]} b LEFT JOIN {tables["publisher"]} p ON p.id = b.publisher_id
+                WHERE b.id IN ({placeholders})
+                ''',
+                book_ids,
+            )
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        terms = self.terms(query)
+        if not terms:
+            return queryset.none()
+        # Every term is quoted, so the input cannot use the FTS5 query syntax
+        match = ' '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+        table = self.quote(self.table_name)
+        weights = ', '.join(str(weight) for weight in self.weights)
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [match])
+        ).annotate(rank=RawSQL(
+            f'SELECT -bm25({table}, {weights}) FROM {table} '
+            f'WHERE {table} MATCH %s AND rowid = {self.tables["book"]}.{self.quote("id")}',
+            [match], output_field=FloatField(),
+        )).order_by('-rank', 'pk')
+
+
+SEARCH_INDEXES = {
+    'postgresql': PostgresBookSearchIndex,
+    'sqlite': SQLiteBookSearchIndex,
+}
+
+
+def get_search_index(connection: Optional[Any] = None) -> BookSearchIndex:
+    """
+    Return the search index of the database behind `connection`, the default one if omitted.
+    """
+    connection = connection or default_connection
+    return SEARCH_INDEXES.get(connection.vendor, BookSearchIndex)(connection)
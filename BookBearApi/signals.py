@@ -1,17 +1,366 @@
-from asgiref.sync import sync_to_async
-from django.db.models import Avg
-from django.db.models.signals import post_save, post_delete
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
+from django.utils import timezone
+
+from .async_auth import user_cache
+from .cache import detail_cache
+from .images import IMAGE_FIELDS, delete_image
+from .jobs import enqueue
+from .models import Author, Book, Genre, Publisher, User, UserBook, UserStats
+from .ratings import rating_bucket
+from .search import get_search_index
+from .stats import update_user_stats
+from .suggest import suggestion_index
+from .titles import title_key
+
+
+def _rating_delta(rating):
+    """
+    Return the (sum, count, histogram) contribution of a review rating to the totals of its book.
+    """
+    if rating is None:
+        return 0.0, 0, Counter()
+    return rating, 1, Counter({rating_bucket(rating): 1})
+
+
+def _negated(histogram):
+    return {bucket: -count for bucket, count in histogram.items()}
+
+
+@receiver(pre_save, sender=UserBook)
+def remember_previous_review(sender, instance, raw=False, **kwargs):
+    """
+    Keep the stored book, situation and rating of an existing UserBook so post_save can apply only the difference.
+    """
+    instance._previous_review = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._previous_review = (
+        UserBook.objects.filter(pk=instance.pk).values('book_id', 'situation', 'rating').first()
+    )
+
+
+@receiver(post_save, sender=UserBook)
+def update_book_score(sender, instance, created, raw=False, **kwargs):
+    """
+    Increment the rating totals and histogram of the book with the difference introduced by the saved UserBook.
+    """
+    if raw:
+        return
+    previous = getattr(instance, '_previous_review', None)
+    rating_sum, rating_count, histogram = _rating_delta(instance.rating)
+
+    if previous is not None:
+        previous_sum, previous_count, previous_histogram = _rating_delta(previous['rating'])
+        if previous['book_id'] != instance.book_id:
+            if previous_count:
+                Book.objects.filter(pk=previous['book_id']).add_ratings(
+                    -previous_sum, -previous_count, _negated(previous_histogram)
+                )
+        else:
+            rating_sum, rating_count = rating_sum - previous_sum, rating_count - previous_count
+            histogram.subtract(previous_histogram)
+
+    if rating_sum or rating_count or any(histogram.values()):
+        Book.objects.filter(pk=instance.book_id).add_ratings(rating_sum, rating_count, histogram)
+
+
+@receiver(post_delete, sender=UserBook)
+def remove_book_score(sender, instance, **kwargs):
+    """
+    Remove the rating of the deleted UserBook from the totals and histogram of its book.
+    """
+    rating_sum, rating_count, histogram = _rating_delta(instance.rating)
+    if rating_count:
+        Book.objects.filter(pk=instance.book_id).add_ratings(-rating_sum, -rating_count, _negated(histogram))
+
+
+def book_detail_keys(book_ids):
+    """
+    Return the details showing the books: the books themselves and their authors, publisher and genres.
+    """
+    book_ids = set(book_ids)
+    if not book_ids:
+        return set()
+    keys = {('book', pk) for pk in book_ids}
+    keys.update(
+        ('author', pk)
+        for pk in Book.authors.through.objects.filter(book_id__in=book_ids).values_list('author_id', flat=True)
+    )
+    keys.update(
+        ('genre', pk)
+        for pk in Book.genres.through.objects.filter(book_id__in=book_ids).values_list('genre_id', flat=True)
+    )
+    keys.update(
+        ('publisher', pk)
+        for pk in Book.objects.filter(pk__in=book_ids, publisher__isnull=False).values_list('publisher_id', flat=True)
+    )
+    return keys
+
+
+def book_keys(book_ids):
+    return {('book', pk) for pk in book_ids}
+
+
+def _related_detail_keys(instance):
+    """
+    Return the author, publisher or genre with the books showing it.
+    """
+    return {(instance._meta.model_name, instance.pk)} | book_keys(instance.books.values_list('pk', flat=True))
+
+
+# Model of the objects of every detail resource
+DETAIL_MODELS = {'book': Book, 'author': Author, 'publisher': Publisher, 'genre': Genre}
+
+
+def touch_details(keys):
+    """
+    Record a change of the objects `(resource, pk)`: bump the `updated_at` the ETag and Last-Modified of their
+    responses are read from and invalidate their cached details once the transaction commits.
+
+    The author, publisher and genre details also read the `updated_at` of their books, see
+    BookBearApi.conditional, so a change shown in a book only touches the book. The cached details embedding it
+    are still invalidated. The authors, publishers and genres themselves are touched when their own columns or
+    their set of books change.
+    """
+    keys = set(keys)
+    if not keys:
+        return
+    now = timezone.now()
+    pks = defaultdict(set)
+    for resource, pk in keys:
+        pks[resource].add(pk)
+    for resource, resource_pks in pks.items():
+        DETAIL_MODELS[resource].objects.filter(pk__in=resource_pks).update(updated_at=now)
+    if detail_cache.enabled:
+        keys |= book_detail_keys(pks['book'])
+        transaction.on_commit(lambda: detail_cache.invalidate(keys))
+
+
+@receiver(pre_save, sender=Book)
+def set_book_title_key(sender, instance, **kwargs):
+    instance.title_key = title_key(instance.title)
+
+
+@receiver(pre_save, sender=Book)
+def collect_book_details(sender, instance, raw=False, **kwargs):
+    """
+    Collect the previous publisher of the book, which loses it if it changes.
+    """
+    instance._detail_keys = set()
+    if raw or instance.pk is None:
+        return
+    previous = Book.objects.filter(pk=instance.pk).values_list('publisher_id', flat=True).first()
+    if previous is not None and previous != instance.publisher_id:
+        instance._detail_keys.add(('publisher', previous))
+
+
+@receiver(pre_delete, sender=Book)
+def collect_deleted_book_details(sender, instance, **kwargs):
+    """
+    Collect the authors, publisher and genres losing the book before its relations are deleted.
+    """
+    instance._detail_keys = book_detail_keys([instance.pk])
 
-from .models import UserBook
+
+@receiver(post_save, sender=Book)
+def invalidate_book_details(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    touch_details(instance.__dict__.pop('_detail_keys', set()) | book_keys([instance.pk]))
+
+
+@receiver(post_delete, sender=Book)
+def invalidate_deleted_book_details(sender, instance, **kwargs):
+    touch_details(instance.__dict__.pop('_detail_keys', set()))
+
+
+@receiver(pre_delete, sender=Author)
+@receiver(pre_delete, sender=Publisher)
+@receiver(pre_delete, sender=Genre)
+def collect_related_details(sender, instance, **kwargs):
+    instance._detail_keys = _related_detail_keys(instance)
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=Publisher)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=Publisher)
+@receiver(post_delete, sender=Genre)
+def invalidate_related_details(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    keys = instance.__dict__.pop('_detail_keys', None)
+    touch_details(keys if keys is not None else _related_detail_keys(instance))
+
+
+@receiver(m2m_changed, sender=Book.authors.through)
+@receiver(m2m_changed, sender=Book.genres.through)
+def invalidate_book_relation_details(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """
+    Touch both sides when books are linked to or unlinked from authors and genres.
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        # author.books / genre.books, cleared books are read before the clear
+        book_ids = pk_set if pk_set is not None else set(instance.books.values_list('pk', flat=True))
+        keys = {(instance._meta.model_name, instance.pk)}
+    else:
+        # book.authors / book.genres, cleared relations are read before the clear
+        if pk_set is None:
+            pk_set = model.objects.filter(books=instance.pk).values_list('pk', flat=True)
+        book_ids = {instance.pk}
+        keys = {(model._meta.model_name, pk) for pk in pk_set}
+    touch_details(keys | book_keys(book_ids))
+
+
+@receiver(post_save, sender=UserBook)
+@receiver(post_delete, sender=UserBook)
+def invalidate_user_book_details(sender, instance, raw=False, **kwargs):
+    """
+    Scores and rating histograms are shown in the book details and scores in every detail embedding the book, the
+    reviews themselves are paginated apart.
+    """
+    if raw:
+        return
+    previous = getattr(instance, '_previous_review', None)
+    if kwargs.get('signal') is post_delete or previous is None:
+        book_ids = {instance.book_id} if instance.rating is not None else set()
+    elif (previous['book_id'], previous['rating']) != (instance.book_id, instance.rating):
+        book_ids = {instance.book_id, previous['book_id']}
+    else:
+        book_ids = set()
+    touch_details(book_keys(book_ids))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def evict_authenticated_user(sender, instance, update_fields=None, **kwargs):
+    """
+    Drop the cached user so the next request sees its new password, activity flag and profile.
+    """
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    user_cache.evict(instance.pk)
+
+
+@receiver(post_save, sender=Book)
+def index_book(sender, instance, raw=False, **kwargs):
+    """
+    Keep the search index in the transaction of the write, so a rolled back change is not searchable.
+    """
+    if not raw:
+        get_search_index().update([instance.pk])
+
+
+@receiver(post_delete, sender=Book)
+def unindex_book(sender, instance, **kwargs):
+    get_search_index().delete([instance.pk])
+
+
+@receiver(m2m_changed, sender=Book.authors.through)
+def index_book_authors(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        # author.books.clear(), the books are read before their links are removed
+        instance._search_book_ids = set(instance.books.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        get_search_index().update(pk_set if reverse else [instance.pk])
+    elif action == 'post_clear':
+        get_search_index().update(instance.__dict__.pop('_search_book_ids', set()) if reverse else [instance.pk])
+
+
+@receiver(pre_delete, sender=Author)
+@receiver(pre_delete, sender=Publisher)
+def collect_indexed_books(sender, instance, **kwargs):
+    instance._search_book_ids = set(instance.books.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=Publisher)
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=Publisher)
+def index_related_books(sender, instance, raw=False, created=False, **kwargs):
+    """
+    Author and publisher names are indexed with their books.
+    """
+    if raw or created:
+        return
+    book_ids = instance.__dict__.pop('_search_book_ids', None)
+    get_search_index().update(book_ids if book_ids is not None else instance.books.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=Publisher)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Book)
+def add_suggestion(sender, instance, raw=False, **kwargs):
+    # Not skipped when the index is not loaded, a load may start before the commit
+    if raw:
+        return
+    kind = sender._meta.model_name
+    row = (instance.pk, instance.title if sender is Book else instance.name)
+    transaction.on_commit(lambda: suggestion_index.add(kind, [row]))
+
+
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=Publisher)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Book)
+def remove_suggestion(sender, instance, **kwargs):
+    kind, pk = sender._meta.model_name, instance.pk
+    transaction.on_commit(lambda: suggestion_index.remove(kind, [pk]))
+
+
+def _library_entry(instance):
+    return {'book_id': instance.book_id, 'situation': instance.situation, 'rating': instance.rating}
+
+
+@receiver(post_save, sender=UserBook)
+def update_saved_user_stats(sender, instance, raw=False, **kwargs):
+    if not raw:
+        update_user_stats(instance.user_id, getattr(instance, '_previous_review', None), _library_entry(instance))
+
+
+@receiver(post_delete, sender=UserBook)
+def update_deleted_user_stats(sender, instance, **kwargs):
+    update_user_stats(instance.user_id, _library_entry(instance), None)
+
+
+@receiver(m2m_changed, sender=Book.authors.through)
+@receiver(m2m_changed, sender=Book.genres.through)
+def rebuild_book_readers_stats(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    The top genres and authors of the users having the books in their library depend on the book relations.
+
+    Their statistics are rebuilt by a job, as a book can be in many libraries.
+    """
+    if action == 'pre_clear' and reverse:
+        instance._stats_book_ids = set(instance.books.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        book_ids = {instance.pk}
+    elif action == 'post_clear':
+        book_ids = instance.__dict__.pop('_stats_book_ids', set())
+    else:
+        book_ids = pk_set
+    if UserStats.objects.filter(user__reviewed_books__book_id__in=book_ids).exists():
+        enqueue('stats.rebuild_readers', book_ids=sorted(book_ids))
 
 
-@receiver([post_save, post_delete], sender=UserBook)
-async def update_book_score(sender, instance, **kwargs):
+@receiver(pre_delete, sender=Author)
+@receiver(pre_delete, sender=Publisher)
+@receiver(pre_delete, sender=Book)
+@receiver(pre_delete, sender=User)
+def delete_image_files(sender, instance, **kwargs):
     """
-    Recalculate and persist the average rating whenever a UserBook is saved or deleted.
+    Delete the image and renditions of a deleted row once the deletion commits. Collected before the deletion,
+    while the stored renditions can still be read.
     """
-    book = await sync_to_async(lambda: instance.book)()
-    agg = await book.reviews.aaggregate(avg=Avg('rating'))
-    book.score = agg['avg'] or 0
-    await book.asave(update_fields=['score'])
+    delete_image(instance, dict(IMAGE_FIELDS)[sender])
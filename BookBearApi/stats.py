@@ -0,0 +1,173 @@
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .jobs import job
+from .models import Author, Book, Genre, Job, User, UserAuthorCount, UserBook, UserGenreCount, UserStats
+from .ratings import RATING_BUCKETS, bucket_condition, rating_bucket
+
+SITUATION_FIELDS = {
+    UserBook.READING: 'reading',
+    UserBook.STOPPED: 'stopped',
+    UserBook.COMPLETED: 'completed',
+    UserBook.PENDING: 'pending',
+    UserBook.ABANDONED: 'abandoned',
+}
+# Number of genres and authors kept in UserStats.top_genres and top_authors
+TOP_SIZE = 5
+# (count model, book relation, column) of the library counts behind the top lists
+LIBRARY_COUNTS = (
+    (UserGenreCount, Book.genres.through, 'genre_id', 'top_genres'),
+    (UserAuthorCount, Book.authors.through, 'author_id', 'top_authors'),
+)
+
+
+def _entry_deltas(entry: Dict[str, Any], sign: int) -> Dict[str, float]:
+    deltas = {SITUATION_FIELDS[entry['situation']]: sign}
+    bucket = rating_bucket(entry['rating'])
+    if bucket is not None:
+        deltas.update({f'rating_{bucket}': sign, 'rating_count': sign, 'rating_sum': sign * entry['rating']})
+    return deltas
+
+
+def update_user_stats(user_id: int, previous: Optional[Dict[str, Any]], current: Optional[Dict[str, Any]]) -> None:
+    """
+    Apply the change of a library entry to the statistics of its user. `previous` and `current` are the
+    book_id, situation and rating of the entry before and after the change, None when it was created or deleted.
+
+    Users whose statistics were never built are skipped: they are built in full by `get_user_stats`.
+    """
+    deltas = Counter()
+    for entry, sign in ((previous, -1), (current, 1)):
+        if entry is not None:
+            deltas.update(_entry_deltas(entry, sign))
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    stats = UserStats.objects.filter(user_id=user_id)
+
+    previous_book = previous['book_id'] if previous is not None else None
+    current_book = current['book_id'] if current is not None else None
+    if deltas:
+        if not stats.update(**{name: F(name) + delta for name, delta in deltas.items()}):
+            return
+    elif previous_book == current_book or not stats.exists():
+        return
+
+    if previous_book != current_book:
+        if previous_book is not None:
+            _adjust_library_counts(user_id, previous_book, -1)
+        if current_book is not None:
+            _adjust_library_counts(user_id, current_book, 1)
+        refresh_top_lists(user_id)
+
+
+def _adjust_library_counts(user_id: int, book_id: int, delta: int) -> None:
+    for model, through, column, _ in LIBRARY_COUNTS:
+        ids = list(through.objects.filter(book_id=book_id).values_list(column, flat=True))
+        if not ids:
+            continue
+        if delta > 0:
+            model.objects.bulk_create([model(user_id=user_id, **{column: pk}) for pk in ids], ignore_conflicts=True)
+        model.objects.filter(user_id=user_id, **{f'{column}__in': ids}).update(count=F('count') + delta)
+        if delta < 0:
+            model.objects.filter(user_id=user_id, count=0).delete()
+
+
+def refresh_top_lists(user_id: int) -> None:
+    """
+    Store the genres and authors with the most books in the library of the user in their statistics.
+    """
+    UserStats.objects.filter(user_id=user_id).update(**{
+        field: [
+            {'id': pk, 'count': count}
+            for pk, count in model.objects.filter(user_id=user_id).order_by('-count', column)
+            .values_list(column, 'count')[:TOP_SIZE]
+        ]
+        for model, _, column, field in LIBRARY_COUNTS
+    })
+
+
+def rebuild_user_stats(user_ids: Iterable[int]) -> int:
+    """
+    Recompute the statistics of the given users from their libraries, returning the number of users rebuilt.
+
+    Rows inserted meanwhile by a concurrent rebuild of the same users, like two first reads, are kept as they are.
+    """
+    user_ids = list(User.objects.filter(pk__in=list(user_ids)).values_list('pk', flat=True))
+    if not user_ids:
+        return 0
+    with transaction.atomic():
+        UserStats.objects.filter(user_id__in=user_ids).delete()
+        stats = {pk: UserStats(user_id=pk) for pk in user_ids}
+        totals = UserBook.objects.filter(user_id__in=user_ids).values('user_id').annotate(
+            rating_count=Count('rating'),
+            rating_sum=Coalesce(Sum('rating'), Value(0.0), output_field=FloatField()),
+            **{field: Count('pk', filter=Q(situation=situation)) for situation, field in SITUATION_FIELDS.items()},
+            **{f'rating_{bucket}': Count('pk', filter=bucket_condition(bucket)) for bucket in RATING_BUCKETS},
+        ).order_by()
+        for row in totals:
+            user_stats = stats[row.pop('user_id')]
+            for name, value in row.items():
+                setattr(user_stats, name, value)
+
+        for model, through, column, field in LIBRARY_COUNTS:
+            model.objects.filter(user_id__in=user_ids).delete()
+            counts = (
+                through.objects.filter(book__reviews__user_id__in=user_ids)
+                .values_list('book__reviews__user_id', column).annotate(count=Count('pk')).order_by()
+            )
+            rows = [model(user_id=user_id, **{column: pk}, count=count) for user_id, pk, count in counts]
+            model.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+            top = defaultdict(list)
+            for row in sorted(rows, key=lambda row: (-row.count, getattr(row, column))):
+                if len(top[row.user_id]) < TOP_SIZE:
+                    top[row.user_id].append({'id': getattr(row, column), 'count': row.count})
+            for user_id, user_stats in stats.items():
+                setattr(user_stats, field, top[user_id])
+
+        UserStats.objects.bulk_create(stats.values(), batch_size=1000, ignore_conflicts=True)
+    return len(user_ids)
+
+
+@job('stats.rebuild_readers')
+def rebuild_readers_stats(current: Job, book_ids: List[int]) -> None:
+    """
+    Rebuild the statistics of the users having any of the books in their library.
+    """
+    user_ids = UserStats.objects.filter(user__reviewed_books__book_id__in=book_ids).values_list('pk', flat=True)
+    rebuild_user_stats(set(user_ids))
+
+
+def _ranked(model, entries: List[Dict[str, int]]) -> List[Dict[str, Any]]:
+    names = dict(model.objects.filter(pk__in=[entry['id'] for entry in entries]).values_list('pk', 'name'))
+    # Objects deleted since the list was stored are left out
+    return [{**entry, 'name': names[entry['id']]} for entry in entries if entry['id'] in names]
+
+
+def get_user_stats(user_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Return the statistics of the user, shaped like UserStatsSchema, or None if the user does not exist.
+
+    They are read from the single UserStats row of the user, built from the library on first read.
+    """
+    stats = UserStats.objects.filter(user_id=user_id).first()
+    if stats is None:
+        if not rebuild_user_stats([user_id]):
+            return None
+        stats = UserStats.objects.get(user_id=user_id)
+    situations = {field: getattr(stats, field) for field in SITUATION_FIELDS.values()}
+    return {
+        **situations,
+        'total': sum(situations.values()),
+        'rating_count': stats.rating_count,
+        'average_rating': stats.rating_sum / stats.rating_count if stats.rating_count else None,
+        'rating_histogram': {bucket: getattr(stats, f'rating_{bucket}') for bucket in RATING_BUCKETS},
+        'top_genres': _ranked(Genre, stats.top_genres),
+        'top_authors': _ranked(Author, stats.top_authors),
+    }
+
+
+aget_user_stats = sync_to_async(get_user_stats)
@@ -0,0 +1,142 @@
+import asyncio
+import functools
+import hashlib
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Optional
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, Storage
+from django.db import transaction
+from django.utils.deconstruct import deconstructible
+
+logger = logging.getLogger(__name__)
+
+# Hex digits of the SHA-256 of the content inserted in the stored file names
+HASH_LENGTH = 16
+# Characters kept from the original file name, so the hash always fits in the 100 characters of a FileField
+MAX_STEM_LENGTH = 40
+# `<stem>.<hash>.<ext>`, with the random suffix added by the storage when the same content is stored twice
+HASHED_NAME_RE = re.compile(r'\.(?P<hash>[0-9a-f]{%d})(?:_[0-9A-Za-z]{7})?(?:\.[0-9A-Za-z]+)?$' % HASH_LENGTH)
+
+
+def content_hash(content) -> str:
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(name: str, digest: str) -> str:
+    """
+    Return `name` with `digest` inserted before its extension, e.g. covers/dune.0123456789abcdef.png.
+    """
+    directory, filename = os.path.split(name)
+    stem, extension = os.path.splitext(filename)
+    return os.path.join(directory, f'{stem[:MAX_STEM_LENGTH]}.{digest}{extension.lower()}')
+
+
+def name_hash(name: str) -> Optional[str]:
+    """
+    Return the content hash of a name stored by HashedFileSystemStorage, None for the other names.
+    """
+    match = HASHED_NAME_RE.search(name)
+    return match.group('hash') if match else None
+
+
+@deconstructible
+class HashedFileSystemStorage(FileSystemStorage):
+    """
+    File system storage naming every file after the hash of its content.
+
+    Files are never overwritten, so the content behind a hashed name never changes and the media view can let
+    clients cache it forever.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        return super().save(hashed_name(name, content_hash(content)), content, max_length)
+
+
+class StorageWorkers:
+    """
+    Per-process pool of STORAGE_WORKERS threads writing and deleting the media files, so the event loop and the
+    single thread of the sync_to_async calls never wait for the disk. 0 runs the operations in the calling thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> Optional[ThreadPoolExecutor]:
+        if settings.STORAGE_WORKERS <= 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=settings.STORAGE_WORKERS, thread_name_prefix='storage')
+        return self._executor
+
+    async def run(self, function: Callable, *args: Any) -> Any:
+        """
+        Run `function` in the pool and return its result.
+        """
+        executor = self._get_executor()
+        if executor is None:
+            return function(*args)
+        return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(function, *args))
+
+    def submit(self, function: Callable, *args: Any) -> None:
+        """
+        Run `function` in the pool without waiting for it.
+        """
+        executor = self._get_executor()
+        if executor is None:
+            function(*args)
+        else:
+            executor.submit(function, *args)
+
+
+storage_workers = StorageWorkers()
+
+
+async def asave_file(storage: Storage, name: str, content, max_length: Optional[int] = None) -> str:
+    """
+    Save `content` as `name` in `storage` from the storage thread pool, returning the name it was stored as.
+    """
+    return await storage_workers.run(storage.save, name, content, max_length)
+
+
+def _delete_files(storage: Storage, names: Iterable[str]) -> None:
+    for name in names:
+        try:
+            storage.delete(name)
+        except OSError as e:
+            # Left to the sweep of the orphaned media
+            logger.warning('Cannot delete %s: %s', name, e)
+
+
+def delete_files(storage: Storage, names: Iterable[str]) -> None:
+    """
+    Delete the files `names` of `storage` from the storage thread pool.
+    """
+    names = [name for name in names if name]
+    if names:
+        storage_workers.submit(_delete_files, storage, names)
+
+
+def delete_on_commit(storage: Storage, names: Iterable[str]) -> None:
+    """
+    Delete the files `names` of `storage` once the current transaction commits, so a rolled back change still
+    finds its files.
+    """
+    names = [name for name in names if name]
+    if names:
+        transaction.on_commit(functools.partial(delete_files, storage, names))
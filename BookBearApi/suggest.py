@@ -0,0 +1,233 @@
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from .models import Author, Book, Genre, Publisher
+
+SUGGESTION_SOURCES = {
+    'author': (Author, 'name'),
+    'publisher': (Publisher, 'name'),
+    'genre': (Genre, 'name'),
+    'book': (Book, 'title'),
+}
+
+# (normalized name, offset of a word in it, pk), ordered by the text starting at the word
+Entry = Tuple[str, int, int]
+
+
+def normalize(text: str) -> str:
+    """
+    Lower case `text`, strip its accents and punctuation and collapse its whitespace.
+    """
+    text = ''.join(char for char in unicodedata.normalize('NFKD', text) if not unicodedata.combining(char))
+    return ' '.join(re.findall(r'\w+', text.casefold()))
+
+
+def _suffix(entry: Entry) -> str:
+    return entry[0][entry[1]:]
+
+
+def _word_offsets(key: str) -> List[int]:
+    return [0] + [index + 1 for index, char in enumerate(key) if char == ' ']
+
+
+class _KindIndex:
+    """
+    Sorted entries of one kind: `starts` holds the whole names, `words` the names read from their other words.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[int, str]] = ()):
+        self.names: Dict[int, Tuple[str, str]] = {}
+        self.starts: List[Entry] = []
+        self.words: List[Entry] = []
+        for pk, name in rows:
+            self._append(pk, name)
+        self.starts.sort(key=_suffix)
+        self.words.sort(key=_suffix)
+
+    def _entries(self, pk: int, key: str) -> Iterable[Tuple[List[Entry], Entry]]:
+        for offset in _word_offsets(key):
+            yield (self.starts if offset == 0 else self.words), (key, offset, pk)
+
+    def _append(self, pk: int, name: str) -> None:
+        key = normalize(name)
+        self.names[pk] = (name, key)
+        for entries, entry in self._entries(pk, key):
+            entries.append(entry)
+
+    def add(self, pk: int, name: str) -> None:
+        self.remove(pk)
+        key = normalize(name)
+        self.names[pk] = (name, key)
+        for entries, entry in self._entries(pk, key):
+            insort(entries, entry, key=_suffix)
+
+    def remove(self, pk: int) -> None:
+        if pk not in self.names:
+            return
+        _, key = self.names.pop(pk)
+        for entries, entry in self._entries(pk, key):
+            index = bisect_left(entries, _suffix(entry), key=_suffix)
+            while index < len(entries) and entries[index] != entry and _suffix(entries[index]) == _suffix(entry):
+                index += 1
+            if index < len(entries) and entries[index] == entry:
+                del entries[index]
+
+    def match(self, prefix: str, limit: int) -> List[Tuple[int, int]]:
+        """
+        Return up to `limit` (rank, pk) of the names starting with `prefix`, then of the names having a word
+        starting with it. The rank is 0 for the former and 1 for the latter.
+        """
+        matches: Dict[int, int] = {}
+        for rank, entries in enumerate((self.starts, self.words)):
+            index = bisect_left(entries, prefix, key=_suffix)
+            while len(matches) < limit and index < len(entries) and _suffix(entries[index]).startswith(prefix):
+                matches.setdefault(entries[index][2], rank)
+                index += 1
+        return [(rank, pk) for pk, rank in matches.items()]
+
+
+class SuggestionIndex:
+    """
+    In-process prefix index of the author, publisher and genre names and of the book titles.
+
+    Names are normalized with `normalize` and kept in sorted lists, once from their start and once from each of
+    their other words, so "Machado de Assis" is suggested for "mach", "assis" or "de as". A query is a binary
+    search followed by a walk over at most `limit` entries per kind, without touching the database.
+
+    The index is loaded on first use and updated by the receivers in signals.py once the writes are committed.
+    Other workers see those writes when they reload it, after SUGGEST_INDEX_TIMEOUT seconds. One reload runs at a
+    time and the expired index keeps answering meanwhile. The changes committed while the names are read are
+    replayed on the new index before it is swapped in, and a reset during a load discards it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._kinds: Optional[Dict[str, _KindIndex]] = None
+        self._loaded_at = 0.0
+        # Changes received while a load reads the names, None when no load runs
+        self._pending: Optional[List[Callable[[Dict[str, _KindIndex]], None]]] = None
+        self._resets = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._kinds is not None
+
+    @property
+    def expired(self) -> bool:
+        timeout = settings.SUGGEST_INDEX_TIMEOUT
+        return not self.loaded or (timeout > 0 and time.monotonic() - self._loaded_at > timeout)
+
+    def load(self) -> None:
+        with self._load_lock:
+            self._load()
+
+    def load_if_expired(self) -> None:
+        with self._load_lock:
+            # Another thread may have reloaded it while this one waited
+            if self.expired:
+                self._load()
+
+    def _load(self) -> None:
+        with self._lock:
+            self._pending = []
+            resets = self._resets
+        try:
+            kinds = {
+                kind: _KindIndex(model.objects.values_list('pk', field).iterator(chunk_size=10000))
+                for kind, (model, field) in SUGGESTION_SOURCES.items()
+            }
+        finally:
+            with self._lock:
+                pending, self._pending = self._pending, None
+        with self._lock:
+            if resets != self._resets:
+                return
+            for change in pending:
+                change(kinds)
+            self._kinds = kinds
+            self._loaded_at = time.monotonic()
+
+    async def aload_if_expired(self) -> None:
+        """
+        Load the index if it expired. Only the first request reloads it, the others answer from the expired index
+        meanwhile, or wait for the reload if no index was loaded yet.
+        """
+        if not self.expired:
+            return
+        if self._load_lock.acquire(blocking=False):
+            try:
+                if self.expired:
+                    await sync_to_async(self._load)()
+            finally:
+                self._load_lock.release()
+        elif not self.loaded:
+            await sync_to_async(self.load_if_expired)()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._kinds = None
+            self._resets += 1
+
+    def _change(self, change: Callable[[Dict[str, _KindIndex]], None]) -> None:
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(change)
+            if self._kinds is not None:
+                change(self._kinds)
+
+    def add(self, kind: str, rows: Iterable[Tuple[int, str]]) -> None:
+        """
+        Add or rename the objects of `kind` given as (pk, name), if the index is loaded or being loaded.
+        """
+        rows = list(rows)
+
+        def change(kinds: Dict[str, _KindIndex]) -> None:
+            for pk, name in rows:
+                kinds[kind].add(pk, name)
+
+        self._change(change)
+
+    def remove(self, kind: str, pks: Iterable[int]) -> None:
+        pks = list(pks)
+
+        def change(kinds: Dict[str, _KindIndex]) -> None:
+            for pk in pks:
+                kinds[kind].remove(pk)
+
+        self._change(change)
+
+    def suggest(self, query: str, kinds: Optional[Iterable[str]] = None, limit: int = 10) -> List[Dict]:
+        """
+        Return up to `limit` suggestions for `query`, whole name matches first, then the shortest names.
+        """
+        prefix = normalize(query)
+        if not prefix or self._kinds is None:
+            return []
+        candidates = []
+        with self._lock:
+            for kind in kinds or SUGGESTION_SOURCES:
+                index = self._kinds[kind]
+                for rank, pk in index.match(prefix, limit):
+                    name, key = index.names[pk]
+                    candidates.append((rank, len(key), key, kind, pk, name))
+        candidates.sort()
+        return [{'kind': kind, 'id': pk, 'name': name} for _, _, _, kind, pk, name in candidates[:limit]]
+
+
+suggestion_index = SuggestionIndex()
+
+
+@receiver(setting_changed)
+def reset_suggestion_index(setting, **kwargs):
+    if setting.startswith('SUGGEST_INDEX_'):
+        suggestion_index.reset()
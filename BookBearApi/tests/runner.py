@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        # Test cases roll their writes back without sending signals, so the per-process caches would keep
+        # serving rows of previous tests. Tests of the caches enable them with override_settings.
+        self._detail_cache_backend = settings.DETAIL_CACHE_BACKEND
+        self._auth_user_cache_timeout = settings.AUTH_USER_CACHE_TIMEOUT
+        self._job_workers = settings.JOB_WORKERS
+        self._storage_workers = settings.STORAGE_WORKERS
+        settings.DETAIL_CACHE_BACKEND = 'dummy'
+        settings.AUTH_USER_CACHE_TIMEOUT = 0
+        # Queued jobs are run by the tests with run_pending_jobs, in the test transaction
+        settings.JOB_WORKERS = 0
+        # Media files are written and deleted before the calls return, so the tests can check them
+        settings.STORAGE_WORKERS = 0
+
+    def teardown_test_environment(self, **kwargs):
+        settings.DETAIL_CACHE_BACKEND = self._detail_cache_backend
+        settings.AUTH_USER_CACHE_TIMEOUT = self._auth_user_cache_timeout
+        settings.JOB_WORKERS = self._job_workers
+        settings.STORAGE_WORKERS = self._storage_workers
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,72 @@
+from django.test import TestCase
+
+from BookBearApi.models import Author, Book, Genre, Publisher, User, UserBook
+
+
+class TestEagerLoading(TestCase):
+    """
+    The detail and list endpoints must issue a fixed number of queries, whatever the number of related rows.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.publisher = Publisher.objects.create(name='Publisher')
+        cls.authors = Author.objects.bulk_create(
+            Author(name=f'Author {i}', birth_date='2000-01-01') for i in range(3)
+        )
+        cls.genres = Genre.objects.bulk_create(Genre(name=f'Genre {i}') for i in range(3))
+        cls.users = [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@gmail.com', password=f'user{i}',
+                                     birth_date='2000-01-01')
+            for i in range(3)
+        ]
+        cls.books = []
+        for i in range(10):
+            book = Book.objects.create(title=f'Book {i}', publication_date='2000-01-01', publisher=cls.publisher)
+            book.authors.add(*cls.authors)
+            book.genres.add(*cls.genres)
+            cls.books.append(book)
+        for user in cls.users:
+            UserBook.objects.bulk_create(UserBook(user=user, book=book, rating=5) for book in cls.books)
+            user.followed_authors.add(*cls.authors)
+            user.followed_publishers.add(cls.publisher)
+            user.favorite_genres.add(*cls.genres)
+        # bulk_create skips the signals keeping the ratings of the books
+        Book.objects.rebuild_ratings()
+
+    def test_get_books(self):
+        # validators, count, books joined with their publisher, authors
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/v1/book/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['items'][0]['authors']), 3)
+
+    def test_get_book(self):
+        # validators, book joined with its publisher, authors, genres
+        with self.assertNumQueries(4):
+            response = self.client.get(f'/api/v1/book/{self.books[0].id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['rating_histogram']['5'], 3)
+        self.assertEqual(response.json()['publisher']['name'], 'Publisher')
+
+    def test_get_book_reviews(self):
+        # count, reviews joined with their users
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/v1/book/{self.books[0].id}/reviews')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['items']), 3)
+
+    def test_get_author(self):
+        # validators, author, books joined with their publisher, authors of those books
+        with self.assertNumQueries(4):
+            response = self.client.get(f'/api/v1/author/{self.authors[0].id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['books']), 10)
+
+    def test_get_user(self):
+        # user with the counts of its collections, which are paginated from their own endpoints
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/v1/user/{self.users[0].id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['books_count'], 10)
+        self.assertEqual(response.json()['followed_authors_count'], 3)
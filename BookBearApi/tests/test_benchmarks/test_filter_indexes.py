@@ -0,0 +1,130 @@
+import re
+
+from django.db import connection
+from django.test import TestCase
+
+from BookBearApi.models import Author, Book, Genre, Publisher, User, UserBook
+from BookBearApi.schemas import FilterAuthorSchema, FilterBookSchema, FilterGenreSchema, FilterPublisherSchema, \
+    FilterUserSchema, FilterUserBookSchema
+
+
+class TestFilterIndexes(TestCase):
+    """
+    Every filter must be answered through an index, EXPLAIN must not show a sequential scan of the filtered table.
+
+    Text filters can only use an index on PostgreSQL, where the planner is told to avoid sequential scans so that
+    the small test tables do not hide a missing index.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        publisher = Publisher.objects.create(name='Publisher')
+        Book.objects.bulk_create(
+            Book(title=f'Book {i}', publication_date=f'{1900 + i}-01-01', score=i % 5, publisher=publisher)
+            for i in range(100)
+        )
+
+    def setUp(self):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertIndexScan(self, queryset, table):
+        plan = queryset.explain()
+        if connection.vendor == 'postgresql':
+            self.assertNotIn(f'Seq Scan on "{table}"', plan)
+        else:
+            self.assertIsNone(re.search(rf'\bSCAN "?{table}"?( |$)', plan, re.MULTILINE), plan)
+
+    def test_book_filters(self):
+        for params in (
+            {'score': 3},
+            {'min_score': 4},
+            {'max_score': 1},
+            {'publication_date': '1950-01-01'},
+            {'publication_year': 1950},
+            {'published_after': '1990-01-01'},
+            {'published_before': '1910-01-01'},
+            {'age_rating': 'T'},
+        ):
+            with self.subTest(**params):
+                queryset = FilterBookSchema(**params).filter(Book.objects.all())
+                self.assertIndexScan(queryset, 'BookBearApi_book')
+
+    def test_user_book_filters(self):
+        user = User.objects.create_user(username='user', email='user@gmail.com', password='user',
+                                        birth_date='2000-01-01')
+        UserBook.objects.bulk_create(UserBook(user=user, book=book, situation='RC'[book.pk % 2])
+                                     for book in Book.objects.all())
+        for params in (
+            {},
+            {'situation': 'R'},
+            {'situation': 'C', 'added_after': '2000-01-01'},
+            {'min_rating': 4},
+        ):
+            with self.subTest(**params):
+                # The library of a user in the default order of GET /me/books
+                queryset = FilterUserBookSchema(**params).filter(UserBook.objects.filter(user=user))
+                queryset = queryset.order_by('situation', 'date_added', 'pk')
+                self.assertIndexScan(queryset, 'BookBearApi_userbook')
+                if connection.vendor == 'sqlite':
+                    # Read in the order of the index, without sorting the library
+                    self.assertNotIn('TEMP B-TREE', queryset.explain())
+
+    def test_book_reviews(self):
+        book = Book.objects.first()
+        # The reviews of a book in the default order of GET /book/{id}/reviews
+        queryset = UserBook.objects.filter(book=book).order_by('-date_added', '-pk')
+        self.assertIndexScan(queryset, 'BookBearApi_userbook')
+        self.assertIn('user_book_date_added_idx', queryset.explain())
+
+    def test_book_text_filters(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest('Text filters are only indexed on PostgreSQL')
+        for params, table in (
+            ({'title': 'Book 1'}, 'BookBearApi_book'),
+            ({'title': 'Book', 'match': 'prefix'}, 'BookBearApi_book'),
+            ({'title': 'Bok', 'match': 'similar'}, 'BookBearApi_book'),
+            ({'publisher': 'Pub'}, 'BookBearApi_publisher'),
+            ({'authors': 'Author'}, 'BookBearApi_author'),
+            ({'genres': 'Genre'}, 'BookBearApi_genre'),
+        ):
+            with self.subTest(**params):
+                queryset = FilterBookSchema(**params).filter(Book.objects.all())
+                self.assertIndexScan(queryset, table)
+
+    def test_name_filters(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest('Text filters are only indexed on PostgreSQL')
+        for schema, model, field in (
+            (FilterAuthorSchema, Author, 'name'),
+            (FilterPublisherSchema, Publisher, 'name'),
+            (FilterGenreSchema, Genre, 'name'),
+            (FilterUserSchema, User, 'username'),
+        ):
+            for match in ('contains', 'prefix', 'similar'):
+                with self.subTest(schema=schema.__name__, match=match):
+                    queryset = schema(**{field: 'abc', 'match': match}).filter(model.objects.all())
+                    self.assertIndexScan(queryset, model._meta.db_table)
+
+
+class TestBookFilters(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(name='Machado de Assis', birth_date='1839-06-21')
+        cls.other_author = Author.objects.create(name='Machado Filho', birth_date='1900-01-01')
+        cls.book = Book.objects.create(title='Dom Casmurro', publication_date='1899-01-01', score=4.5)
+        cls.book.authors.add(cls.author, cls.other_author)
+        Book.objects.create(title='Other', publication_date='2000-01-01', score=2)
+
+    def get_titles(self, **params):
+        return list(FilterBookSchema(**params).filter(Book.objects.all()).values_list('title', flat=True))
+
+    def test_filters(self):
+        self.assertEqual(self.get_titles(authors='machado'), ['Dom Casmurro'])
+        self.assertEqual(self.get_titles(title='casm'), ['Dom Casmurro'])
+        self.assertEqual(self.get_titles(title='casm', match='prefix'), [])
+        self.assertEqual(self.get_titles(title='dom', match='prefix'), ['Dom Casmurro'])
+        self.assertEqual(self.get_titles(min_score=3), ['Dom Casmurro'])
+        self.assertEqual(self.get_titles(publication_year=2000), ['Other'])
+        self.assertEqual(self.get_titles(published_before='1900-01-01', max_score=5), ['Dom Casmurro'])
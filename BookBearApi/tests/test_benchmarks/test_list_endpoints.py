@@ -0,0 +1,70 @@
+from django.db import connection
+from django.db.models.signals import post_init
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from BookBearApi.models import Author, Book, Genre, Publisher, User
+
+
+class TestListEndpointsScale(TestCase):
+    """
+    Regression benchmark for the paginated list endpoints: the number of queries and of model instances
+    built per request must depend on the page size only, never on the size of the table.
+    """
+    page_size = 10
+    small_size = 25
+    large_size = 500
+
+    def measure(self, url, model):
+        instances = []
+
+        def count_instance(sender, instance, **kwargs):
+            instances.append(instance.pk)
+
+        post_init.connect(count_instance, sender=model)
+        try:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, {'page_size': self.page_size, 'page': 2})
+        finally:
+            post_init.disconnect(count_instance, sender=model)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['items']), self.page_size)
+        return len(queries), len(instances)
+
+    def assert_scales(self, url, model, create):
+        create(0, self.small_size)
+        small_queries, small_instances = self.measure(url, model)
+
+        create(self.small_size, self.large_size)
+        large_queries, large_instances = self.measure(url, model)
+
+        self.assertEqual(small_queries, large_queries)
+        self.assertEqual(small_instances, large_instances)
+        self.assertLessEqual(large_instances, self.page_size)
+
+    def test_books(self):
+        self.assert_scales('/api/v1/book/', Book, lambda start, stop: Book.objects.bulk_create(
+            Book(title=f'Book {i}', publication_date='2000-01-01') for i in range(start, stop)
+        ))
+
+    def test_authors(self):
+        self.assert_scales('/api/v1/author/', Author, lambda start, stop: Author.objects.bulk_create(
+            Author(name=f'Author {i}', birth_date='2000-01-01') for i in range(start, stop)
+        ))
+
+    def test_publishers(self):
+        self.assert_scales('/api/v1/publisher/', Publisher, lambda start, stop: Publisher.objects.bulk_create(
+            Publisher(name=f'Publisher {i}') for i in range(start, stop)
+        ))
+
+    def test_genres(self):
+        self.assert_scales('/api/v1/genre/', Genre, lambda start, stop: Genre.objects.bulk_create(
+            Genre(name=f'Genre {i}') for i in range(start, stop)
+        ))
+
+    def test_users(self):
+        self.assert_scales('/api/v1/user/', User, lambda start, stop: User.objects.bulk_create(
+            User(username=f'user{i}', email=f'user{i}@gmail.com', birth_date='2000-01-01')
+            for i in range(start, stop)
+        ))
@@ -0,0 +1,71 @@
+import json
+import os
+import time
+from unittest import skipUnless
+
+from django.test import TestCase
+from ninja.responses import NinjaJSONEncoder
+
+from BookBearApi.models import Author, Book, Publisher
+from BookBearApi.renderers import dumps
+from BookBearApi.schemas import BookRelationshipSchema, eager_load
+from BookBearApi.schemas.values_loading import load_values, values_adapter
+
+
+class TestSerialization(TestCase):
+    """
+    Lists rendered from .values() rows with a precompiled TypeAdapter must match the ninja schemas rendered from
+    model instances, and cost less. Wall-clock timings depend on the machine, they are only compared when the
+    BENCHMARKS environment variable is set.
+    """
+    BOOKS = 10000
+
+    @classmethod
+    def setUpTestData(cls):
+        publishers = Publisher.objects.bulk_create(
+            Publisher(name=f'Publisher {i}', logo=f'publishers/logo{i}.png' if i % 2 else None) for i in range(10)
+        )
+        authors = Author.objects.bulk_create(
+            Author(name=f'Author {i}', birth_date='2000-01-01', avatar_thumb=f'authors/renditions/a{i}.webp')
+            for i in range(50)
+        )
+        books = Book.objects.bulk_create(
+            Book(title=f'Book {i}', publication_date='2000-01-01', score=i % 5,
+                 publisher=publishers[i % 10] if i % 7 else None, cover=f'covers/cover{i}.png' if i % 3 else '')
+            for i in range(cls.BOOKS)
+        )
+        Book.authors.through.objects.bulk_create(
+            Book.authors.through(book_id=book.pk, author_id=authors[(book.pk + offset) % 50].pk)
+            for book in books for offset in range(book.pk % 3)
+        )
+
+    @staticmethod
+    def render_instances(queryset) -> bytes:
+        books = eager_load(queryset, BookRelationshipSchema)
+        items = [BookRelationshipSchema.from_orm(book).model_dump() for book in books]
+        return json.dumps(items, cls=NinjaJSONEncoder).encode()
+
+    @staticmethod
+    def render_values(queryset) -> bytes:
+        items, _ = load_values(queryset, BookRelationshipSchema)
+        return dumps(values_adapter(Book, BookRelationshipSchema).validate_python(items))
+
+    def test_same_output(self):
+        queryset = Book.objects.order_by('pk')
+        self.assertEqual(json.loads(self.render_values(queryset)), json.loads(self.render_instances(queryset)))
+
+    @skipUnless(os.getenv('BENCHMARKS'), 'Set BENCHMARKS=1 to time the serialization')
+    def test_values_faster(self):
+        queryset = Book.objects.order_by('pk')
+        # Build the adapter and warm the caches before timing
+        self.render_values(queryset[:10])
+        self.render_instances(queryset[:10])
+
+        start = time.perf_counter()
+        self.render_instances(queryset)
+        instances = time.perf_counter() - start
+        start = time.perf_counter()
+        self.render_values(queryset)
+        values = time.perf_counter() - start
+
+        self.assertLess(values, instances, f'{self.BOOKS} books: instances {instances:.3f}s, values {values:.3f}s')
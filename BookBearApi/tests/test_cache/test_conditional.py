@@ -0,0 +1,108 @@
+from django.test import TestCase
+
+from BookBearApi.models import Author, Book, Genre, Publisher, User, UserBook
+
+
+class TestConditionalRequests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.publisher = Publisher.objects.create(name='Publisher 1')
+        cls.author = Author.objects.create(name='Author 1', birth_date='2000-01-01')
+        cls.genre = Genre.objects.create(name='Genre 1')
+        cls.book = Book.objects.create(title='Book 1', publication_date='2000-01-01', publisher=cls.publisher)
+        cls.book.authors.add(cls.author)
+        cls.other_book = Book.objects.create(title='Book 2', publication_date='2000-01-01')
+        cls.user = User.objects.create_user(username='user1', email='user1@gmail.com', password='user1',
+                                            birth_date='2000-01-01')
+
+    def etag(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Last-Modified', response.headers)
+        return response.headers['ETag']
+
+    def assertNotModified(self, url, etag):
+        # Only the validators are read
+        with self.assertNumQueries(1):
+            response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def test_detail(self):
+        url = f'/api/v1/book/{self.book.id}'
+        etag = self.etag(url)
+        self.assertNotModified(url, etag)
+
+        self.book.title = 'Book 100'
+        self.book.save()
+        self.assertNotEqual(self.etag(url), etag)
+
+    def test_if_modified_since(self):
+        url = f'/api/v1/publisher/{self.publisher.id}'
+        last_modified = self.client.get(url).headers['Last-Modified']
+        response = self.client.get(url, headers={'If-Modified-Since': last_modified})
+        self.assertEqual(response.status_code, 304)
+
+    def test_list(self):
+        url = '/api/v1/book/?page_size=1'
+        etag = self.etag(url)
+        self.assertNotModified(url, etag)
+        self.assertNotEqual(self.etag('/api/v1/book/?title=Book 1'), etag)
+
+        # Shown in the list of books
+        self.author.name = 'Author 100'
+        self.author.save()
+        renamed = self.etag(url)
+        self.assertNotEqual(renamed, etag)
+
+        self.other_book.delete()
+        self.assertNotEqual(self.etag(url), renamed)
+
+    def test_relations(self):
+        book_url, genre_url = f'/api/v1/book/{self.book.id}', '/api/v1/genre/'
+        book_etag, genre_etag = self.etag(book_url), self.etag(genre_url)
+        self.assertNotModified(genre_url, genre_etag)
+
+        self.book.genres.add(self.genre)
+        self.assertNotEqual(self.etag(book_url), book_etag)
+        self.assertNotEqual(self.etag(genre_url), genre_etag)
+
+    def test_ratings(self):
+        self.book.genres.add(self.genre)
+        book_url, author_url = f'/api/v1/book/{self.book.id}', f'/api/v1/author/{self.author.id}'
+        genre_url, genres_url = f'/api/v1/genre/{self.genre.id}', '/api/v1/genre/'
+        book_etag, author_etag = self.etag(book_url), self.etag(author_url)
+        genre_etag, genres_etag = self.etag(genre_url), self.etag(genres_url)
+
+        entry = UserBook.objects.create(user=self.user, book=self.book, situation=UserBook.READING)
+        # The situations of the readers are not shown
+        self.assertEqual(self.etag(book_url), book_etag)
+
+        entry.rating = 4
+        entry.save()
+        self.assertNotEqual(self.etag(book_url), book_etag)
+        # Embedding the score of the book
+        self.assertNotEqual(self.etag(author_url), author_etag)
+        self.assertNotEqual(self.etag(genre_url), genre_etag)
+        # Only showing the names of the genres
+        self.assertEqual(self.etag(genres_url), genres_etag)
+
+    def test_embedded_books(self):
+        url = f'/api/v1/publisher/{self.publisher.id}'
+        etag = self.etag(url)
+        self.assertNotModified(url, etag)
+
+        # Shown in the books of the publisher
+        self.author.name = 'Author 100'
+        self.author.save()
+        renamed = self.etag(url)
+        self.assertNotEqual(renamed, etag)
+
+        self.book.publisher = None
+        self.book.save()
+        self.assertNotEqual(self.etag(url), renamed)
+
+    def test_not_found(self):
+        response = self.client.get('/api/v1/book/1000', headers={'If-None-Match': '*'})
+        self.assertEqual(response.status_code, 404)
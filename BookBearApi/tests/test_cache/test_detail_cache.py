@@ -0,0 +1,108 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from BookBearApi.cache import LRUCacheBackend, detail_cache
+from BookBearApi.models import Author, Book, Genre, Publisher, User, UserBook
+
+
+class TestLRUCacheBackend(SimpleTestCase):
+    def test_eviction(self):
+        backend = LRUCacheBackend(max_entries=2, timeout=None)
+        backend.set('a', 1)
+        backend.set('b', 2)
+        backend.get('a')
+        backend.set('c', 3)
+        self.assertEqual(backend.get('a'), 1)
+        self.assertIsNone(backend.get('b'))
+        self.assertEqual(backend.get('c'), 3)
+
+    def test_timeout(self):
+        backend = LRUCacheBackend(max_entries=2, timeout=None)
+        with mock.patch('BookBearApi.cache.time.monotonic', return_value=100):
+            backend.set('a', 1, timeout=10)
+            self.assertFalse(backend.add('a', 2))
+        with mock.patch('BookBearApi.cache.time.monotonic', return_value=110):
+            self.assertIsNone(backend.get('a'))
+            self.assertTrue(backend.add('a', 2))
+
+
+@override_settings(DETAIL_CACHE_BACKEND='lru')
+class TestDetailCache(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.publisher = Publisher.objects.create(name='Publisher 1')
+        cls.author = Author.objects.create(name='Author 1', birth_date='2000-01-01')
+        cls.genre = Genre.objects.create(name='Genre 1')
+        cls.book = Book.objects.create(title='Book 1', publication_date='2000-01-01', publisher=cls.publisher)
+        cls.book.authors.add(cls.author)
+        cls.user = User.objects.create_user(username='user1', email='user1@gmail.com', password='user1',
+                                            birth_date='2000-01-01')
+
+    def setUp(self):
+        detail_cache.reset()
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_read_through(self):
+        book = self.get(f'/api/v1/book/{self.book.id}')
+        # Only the validators of the book are read
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get(f'/api/v1/book/{self.book.id}'), book)
+
+    def test_not_found(self):
+        response = self.client.get('/api/v1/book/1000')
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalidate_on_update(self):
+        self.get(f'/api/v1/book/{self.book.id}')
+        self.get(f'/api/v1/author/{self.author.id}')
+        self.get(f'/api/v1/publisher/{self.publisher.id}')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.title = 'Book 100'
+            self.book.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.name = 'Author 100'
+            self.author.save()
+
+        book = self.get(f'/api/v1/book/{self.book.id}')
+        self.assertEqual(book['title'], 'Book 100')
+        self.assertEqual(book['authors'][0]['name'], 'Author 100')
+        self.assertEqual(self.get(f'/api/v1/author/{self.author.id}')['books'][0]['title'], 'Book 100')
+        self.assertEqual(self.get(f'/api/v1/publisher/{self.publisher.id}')['books'][0]['title'], 'Book 100')
+
+    def test_invalidate_on_relations(self):
+        self.get(f'/api/v1/book/{self.book.id}')
+        self.get(f'/api/v1/genre/{self.genre.id}')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.genres.add(self.genre)
+        self.assertEqual(self.get(f'/api/v1/book/{self.book.id}')['genres'][0]['name'], 'Genre 1')
+        self.assertEqual(self.get(f'/api/v1/genre/{self.genre.id}')['books'][0]['title'], 'Book 1')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.genre.books.clear()
+        self.assertEqual(self.get(f'/api/v1/book/{self.book.id}')['genres'], [])
+        self.assertEqual(self.get(f'/api/v1/genre/{self.genre.id}')['books'], [])
+
+    def test_invalidate_on_review(self):
+        self.get(f'/api/v1/book/{self.book.id}')
+        self.get(f'/api/v1/author/{self.author.id}')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserBook.objects.create(user=self.user, book=self.book, rating=4)
+
+        book = self.get(f'/api/v1/book/{self.book.id}')
+        self.assertEqual(book['score'], 4)
+        self.assertEqual((book['rating_count'], book['rating_histogram']['4']), (1, 1))
+        self.assertEqual(self.get(f'/api/v1/author/{self.author.id}')['books'][0]['score'], 4)
+
+    def test_invalidate_on_delete(self):
+        self.get(f'/api/v1/author/{self.author.id}')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.delete()
+        self.assertEqual(self.get(f'/api/v1/author/{self.author.id}')['books'], [])
@@ -0,0 +1,49 @@
+from datetime import timedelta
+from unittest import mock
+
+from dj_ninja_auth.jwt.backends import TokenBackend
+from dj_ninja_auth.jwt.tokens import AccessToken, RefreshToken
+from django.test import override_settings
+
+from BookBearApi.async_auth import token_cache
+from BookBearApi.tests.config import TestCaseWithData
+
+
+class TestTokenCache(TestCaseWithData):
+    def setUp(self):
+        token_cache.reset()
+
+    def get_me(self, token):
+        return self.client.get('/api/v1/me/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_cache_hit(self):
+        with mock.patch.object(TokenBackend, 'decode', autospec=True, side_effect=TokenBackend.decode) as decode:
+            self.assertEqual(self.get_me(self.access_token).status_code, 200)
+            verified_decodes = len([call for call in decode.call_args_list if call.kwargs.get('verify')])
+            self.assertEqual(verified_decodes, 1)
+
+            self.assertEqual(self.get_me(self.access_token).status_code, 200)
+            verified_decodes = len([call for call in decode.call_args_list if call.kwargs.get('verify')])
+            self.assertEqual(verified_decodes, 1)
+
+    @override_settings(AUTH_TOKEN_CACHE_MAX_ENTRIES=0)
+    def test_disabled(self):
+        self.assertEqual(self.get_me(self.access_token).status_code, 200)
+        self.assertEqual(self.get_me(self.access_token).status_code, 200)
+        self.assertIsNone(token_cache.get(self.access_token))
+
+    def test_expired_token(self):
+        token = AccessToken.for_user(self.user)
+        token.set_exp(lifetime=-timedelta(minutes=5))
+        self.assertEqual(self.get_me(str(token)).status_code, 401)
+        self.assertIsNone(token_cache.get(str(token)))
+
+    def test_invalid_token(self):
+        self.assertEqual(self.get_me(self.access_token[:-2]).status_code, 401)
+        self.assertEqual(self.get_me(str(RefreshToken.for_user(self.user))).status_code, 401)
+
+    def test_inactive_user(self):
+        self.assertEqual(self.get_me(self.access_token).status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get_me(self.access_token).status_code, 401)
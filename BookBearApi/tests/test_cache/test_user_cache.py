@@ -0,0 +1,99 @@
+import json
+
+from dj_ninja_auth.jwt.tokens import RefreshToken
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from BookBearApi.async_auth import user_cache
+from BookBearApi.models import User
+from BookBearApi.tests.config import TestCaseWithData
+
+
+@override_settings(AUTH_USER_CACHE_TIMEOUT=30)
+class TestUserCache(TestCaseWithData):
+    def setUp(self):
+        user_cache.reset()
+
+    def get_me(self, access_token=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/me/',
+                                       HTTP_AUTHORIZATION=f'Bearer {access_token or self.access_token}')
+        return response, len(queries)
+
+    def login(self, password):
+        response = self.client.post('/api/v1/auth/login', content_type='application/json',
+                                    data=json.dumps({'username': 'user1@gmail.com', 'password': password}))
+        self.assertEqual(response.status_code, 200)
+        return response.json()['access']
+
+    def test_cache_hit(self):
+        response, miss_queries = self.get_me()
+        self.assertEqual(response.status_code, 200)
+        response, hit_queries = self.get_me()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['username'], 'user1')
+        self.assertEqual(hit_queries, miss_queries - 1)
+        self.assertEqual(user_cache.stats()['hits'], 1)
+        self.assertEqual(user_cache.stats()['misses'], 1)
+
+    def test_profile_update(self):
+        self.get_me()
+        response = self.client.patch('/api/v1/me/', data={'username': 'user100'}, content_type='application/json',
+                                     HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+        self.assertEqual(response.status_code, 200)
+        response, _ = self.get_me()
+        self.assertEqual(response.json()['username'], 'user100')
+
+    def test_deactivation(self):
+        self.get_me()
+        self.user.is_active = False
+        self.user.save()
+        response, _ = self.get_me()
+        self.assertEqual(response.status_code, 401)
+
+    def test_password_change(self):
+        self.get_me()
+        self.user.set_password('new password')
+        self.user.save()
+        # The tokens issued before the change stay valid
+        response, _ = self.get_me()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(user_cache.stats()['misses'], 2)
+        response, _ = self.get_me(self.login('new password'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_stale_entry(self):
+        self.get_me()
+        # Changed by another worker: the entry of this one is not evicted
+        User.objects.filter(pk=self.user.pk).update(password=make_password('new password'))
+        access_token = self.login('new password')
+        response, _ = self.get_me(access_token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(user_cache.stats()['misses'], 2)
+        # The tokens issued before the change stay valid, the entry only serves the tokens of its fingerprint
+        response, _ = self.get_me()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(user_cache.stats()['misses'], 3)
+
+    def test_token_without_fingerprint(self):
+        access_token = str(RefreshToken.for_user(self.user).access_token)
+        self.get_me(access_token)
+        response, _ = self.get_me(access_token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(user_cache.stats()['hits'], 0)
+
+    def test_stats(self):
+        self.get_me()
+        response = self.client.get('/api/v1/admin/stats/user-cache',
+                                   HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+        self.assertEqual(response.status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get('/api/v1/admin/stats/user-cache',
+                                   HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['misses'], 2)
+        self.assertEqual(response.json()['size'], 1)
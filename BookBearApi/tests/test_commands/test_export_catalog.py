@@ -0,0 +1,42 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from BookBearApi.models import Author, Book, User, UserBook
+
+
+class TestExportCatalog(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(name='Author', birth_date='1900-01-01')
+        cls.books = Book.objects.bulk_create(
+            Book(title=f'Book {i}', publication_date='2000-01-01') for i in range(25)
+        )
+        for book in cls.books:
+            book.authors.add(cls.author)
+        cls.user = User.objects.create_user(username='user', email='user@gmail.com', password='user',
+                                            birth_date='2000-01-01')
+        UserBook.objects.create(user=cls.user, book=cls.books[0], rating=4)
+
+    def export(self, **options):
+        out = StringIO()
+        call_command('export_catalog', stdout=out, **options)
+        return [json.loads(line) for line in out.getvalue().splitlines()]
+
+    def test_export_catalog(self):
+        with CaptureQueriesContext(connection) as queries:
+            rows = self.export(chunk_size=10)
+        self.assertEqual([row['id'] for row in rows], [book.id for book in self.books])
+        self.assertEqual(rows[0]['authors'][0]['name'], 'Author')
+        self.assertEqual(rows[0]['reviews'][0]['rating'], 4)
+        # one query per chunk for the books and for each prefetched relation
+        self.assertLessEqual(len(queries), 3 * 5)
+
+    def test_export_user_books(self):
+        rows = self.export(user=self.user.id)
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['book']['id'], self.books[0].id)
@@ -0,0 +1,67 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from BookBearApi.models import Author, Book, Genre, Publisher
+from BookBearApi.search import get_search_index
+
+
+class TestImportCatalog(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(name='Existing Author', birth_date='1900-01-01')
+        cls.publisher = Publisher.objects.create(name='Existing Publisher')
+
+    def import_file(self, content, suffix, **options):
+        with tempfile.NamedTemporaryFile('w', suffix=suffix, delete=False, encoding='utf-8') as file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        out, err = StringIO(), StringIO()
+        call_command('import_catalog', file.name, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_csv(self):
+        content = (
+            'title,publication_date,synopsis,age_rating,publisher,authors,author_birth_dates,genres\n'
+            'Book 1,2001-01-01,"A synopsis, with a comma",T,Existing Publisher,Existing Author|New Author,'
+            '|1950-01-01,Fantasy|Horror\n'
+            'Book 2,2002-01-01,,E,New Publisher,New Author,,Fantasy\n'
+            'Book 3,2003-01-01,,E,,Unknown Author,,\n'
+            'Book 4,not a date,,E,,,,\n'
+        )
+        out, err = self.import_file(content, '.csv', batch_size=2)
+
+        self.assertIn('Imported 2 books (1 new authors, 1 new publishers, 2 new genres), 2 rows skipped.', out)
+        self.assertIn('Line 4: Unknown authors without a birth_date: Unknown Author', err)
+        self.assertIn('Line 5: publication_date', err)
+
+        book = Book.objects.get(title='Book 1')
+        self.assertEqual(book.synopsis, 'A synopsis, with a comma')
+        self.assertEqual(book.age_rating, 'T')
+        self.assertEqual(book.publisher, self.publisher)
+        self.assertEqual(set(book.authors.values_list('name', flat=True)), {'Existing Author', 'New Author'})
+        self.assertEqual(set(book.genres.values_list('name', flat=True)), {'Fantasy', 'Horror'})
+        self.assertEqual(str(Author.objects.get(name='New Author').birth_date), '1950-01-01')
+        self.assertEqual(Book.objects.get(title='Book 2').publisher.name, 'New Publisher')
+        self.assertEqual(Genre.objects.filter(name='Fantasy').count(), 1)
+
+    def test_import_ndjson(self):
+        content = (
+            '{"title": "Book 1", "publication_date": "2001-01-01", "authors": ["Existing Author"]}\n'
+            '\n'
+            '{"title": "Book 2", "publication_date": "2001-01-01", "age_rating": "X"}\n'
+            'not json\n'
+        )
+        out, err = self.import_file(content, '.ndjson')
+
+        self.assertIn('Imported 1 books', out)
+        self.assertIn('Line 3: age_rating', err)
+        self.assertIn('Line 4: ', err)
+        self.assertEqual(list(Book.objects.get(title='Book 1').authors.all()), [self.author])
+        self.assertEqual(
+            list(get_search_index().search(Book.objects.all(), 'existing author').values_list('title', flat=True)),
+            ['Book 1']
+        )
@@ -0,0 +1,35 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from BookBearApi.models import Book, User, UserBook
+
+
+class TestRebuildBookScores(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.books = Book.objects.bulk_create(
+            Book(title=f'Book {i}', publication_date='2000-01-01') for i in range(3)
+        )
+        cls.users = [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@gmail.com', password=f'user{i}',
+                                     birth_date='2000-01-01')
+            for i in range(2)
+        ]
+        UserBook.objects.bulk_create([
+            UserBook(user=cls.users[0], book=cls.books[0], rating=4),
+            UserBook(user=cls.users[1], book=cls.books[0], rating=1),
+            UserBook(user=cls.users[0], book=cls.books[1]),
+        ])
+        Book.objects.update(score=3, rating_sum=10, rating_count=7)
+
+    def test_rebuild(self):
+        out = StringIO()
+        call_command('rebuild_book_scores', batch_size=2, stdout=out)
+        self.assertIn('Rebuilt the score of 3 books.', out.getvalue())
+
+        scores = {book.id: (book.score, book.rating_sum, book.rating_count) for book in Book.objects.all()}
+        self.assertEqual(scores[self.books[0].id], (2.5, 5, 2))
+        self.assertEqual(scores[self.books[1].id], (0, 0, 0))
+        self.assertEqual(scores[self.books[2].id], (0, 0, 0))
@@ -1,8 +1,10 @@
 import json
 
 from asgiref.sync import async_to_sync
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import AsyncClient
 
+from BookBearApi.models import Book, Job
 from BookBearApi.tests.config import TestCaseWithData
 
 
@@ -30,6 +32,7 @@ class TestAdminController(TestCaseWithData):
     async def test_create_book(self):
         payload = json.dumps({
             'title': 'Book',
+            'isbn': '0-441-17271-7',
             'publication_date': '2000-01-01',
             'age_rating': 'E',
             'publisher': 1,
@@ -46,6 +49,7 @@ class TestAdminController(TestCaseWithData):
         )
         self.assertEqual(response.status_code, 201)
         self.assertEqual(response.json()['title'], 'Book')
+        self.assertEqual(response.json()['isbn'], '9780441172719')
         self.assertEqual(response.json()['publication_date'], '2000-01-01')
         self.assertEqual(response.json()['age_rating'], 'E')
         self.assertEqual(response.json()['publisher']['id'], 1)
@@ -54,6 +58,8 @@ class TestAdminController(TestCaseWithData):
         self.assertEqual(response.json()['authors'][0]['name'], 'Author 1')
         self.assertEqual(response.json()['genres'][0]['id'], 1)
         self.assertEqual(response.json()['genres'][0]['name'], 'Genre 1')
+        job = await Job.objects.aget(name='feed.publish')
+        self.assertEqual(job.payload, {'book_id': response.json()['id']})
 
     async def test_update_book(self):
         response = await self.client_auth_admin.patch(
@@ -169,3 +175,67 @@ class TestAdminController(TestCaseWithData):
             path=self.url + 'genre/1',
         )
         self.assertEqual(response.status_code, 204)
+
+    async def test_import_catalog(self):
+        content = '\n'.join([
+            json.dumps({'title': 'Imported', 'publication_date': '2001-01-01', 'publisher': 'Publisher 1',
+                        'authors': ['Author 1', {'name': 'New Author', 'birth_date': '1950-01-01'}],
+                        'genres': ['Genre 1', 'New Genre']}),
+            json.dumps({'title': 'No date'}),
+        ])
+        response = await self.client_auth_admin.post(
+            path=self.url + 'import/catalog',
+            data={'file': SimpleUploadedFile('catalog.ndjson', content.encode())},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['imported_books'], 1)
+        self.assertEqual(response.json()['created_authors'], 1)
+        self.assertEqual(response.json()['created_genres'], 1)
+        self.assertEqual(response.json()['error_count'], 1)
+        self.assertEqual(response.json()['errors'][0]['line'], 2)
+
+        book = await Book.objects.aget(title='Imported')
+        self.assertEqual(book.publisher_id, 1)
+        self.assertEqual({author.name async for author in book.authors.all()}, {'Author 1', 'New Author'})
+
+    async def test_import_catalog_format(self):
+        response = await self.client_auth_admin.post(
+            path=self.url + 'import/catalog',
+            data={'file': SimpleUploadedFile('catalog.txt', b'')},
+        )
+        self.assertEqual(response.status_code, 400)
+
+    async def test_import_catalog_encoding(self):
+        content = json.dumps({'title': 'Imported', 'publication_date': '2001-01-01'}).encode()
+        response = await self.client_auth_admin.post(
+            path=self.url + 'import/catalog',
+            data={'file': SimpleUploadedFile('catalog.ndjson', content + b'\n{"title": "Caf\xe9"}')},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['detail'], 'Line 2 is not valid UTF-8.')
+        self.assertFalse(await Book.objects.filter(title='Imported').aexists())
+
+    async def test_export_books(self):
+        response = await self.client_auth_admin.get(
+            path=self.url + 'export/books'
+        )
+        self.assertEqual(response.status_code, 200)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), await Book.objects.acount())
+        self.assertEqual(rows[0]['id'], 1)
+        self.assertIn('authors', rows[0])
+        self.assertIn('reviews', rows[0])
+
+        response = await self.client_auth.get(
+            path=self.url + 'export/books'
+        )
+        self.assertEqual(response.status_code, 403)
+
+    async def test_export_user_books(self):
+        response = await self.client_auth_admin.get(
+            path=self.url + f'export/user/{self.user.id}/books'
+        )
+        self.assertEqual(response.status_code, 200)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(content.splitlines()), 2)
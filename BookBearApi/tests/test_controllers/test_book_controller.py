@@ -1,6 +1,8 @@
+from datetime import date
+
 from django.test import AsyncClient, TestCase
 
-from BookBearApi.models import Book
+from BookBearApi.models import Book, BookSimilarity, User, UserBook
 
 
 class TestBookController(TestCase):
@@ -42,3 +44,79 @@ class TestBookController(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json()['id'], 1)
         self.assertEqual(response.json()['title'], 'Book 1')
+
+    async def test_get_book_reviews(self):
+        users = [
+            await User.objects.acreate_user(username=f'user{i}', email=f'user{i}@gmail.com', password=f'user{i}',
+                                            birth_date='2000-01-01')
+            for i in range(4)
+        ]
+        await UserBook.objects.abulk_create([
+            UserBook(user=users[0], book=self.book1, rating=2),
+            UserBook(user=users[1], book=self.book1, rating=5),
+            UserBook(user=users[2], book=self.book1, review='No rating'),
+            # Neither rated nor reviewed
+            UserBook(user=users[3], book=self.book1),
+        ])
+        await UserBook.objects.filter(user=users[1]).aupdate(date_added=date(2020, 1, 1))
+        client = AsyncClient()
+
+        response = await client.get(path=self.url + '1/reviews')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([review['user']['username'] for review in response.json()['items']],
+                         ['user2', 'user0', 'user1'])
+
+        usernames = []
+        data = {'order': 'rating', 'page_size': 1, 'cursor': ''}
+        while data['cursor'] is not None:
+            response = await client.get(path=self.url + '1/reviews', data=data)
+            usernames += [review['user']['username'] for review in response.json()['items']]
+            data['cursor'] = response.json()['next_cursor']
+        self.assertEqual(usernames, ['user1', 'user0', 'user2'])
+
+    async def test_get_similar_books(self):
+        await BookSimilarity.objects.abulk_create([
+            BookSimilarity(book=self.book1, similar_book=self.book2, score=0.2),
+            BookSimilarity(book=self.book1, similar_book=self.book3, score=0.5),
+        ])
+        client = AsyncClient()
+        response = await client.get(path=self.url + '1/similar')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([book['id'] for book in response.json()['items']], [3, 2])
+
+    async def test_get_books_cursor(self):
+        client = AsyncClient()
+        response = await client.get(path=self.url, data={'page_size': 2, 'cursor': '', 'ordering': '-title'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()['nb_items'])
+        self.assertEqual([book['title'] for book in response.json()['items']], ['Book 3', 'Book 2'])
+        self.assertIsNotNone(response.json()['next_cursor'])
+
+        response = await client.get(path=self.url, data={
+            'page_size': 2, 'cursor': response.json()['next_cursor'], 'ordering': '-title', 'count': True
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['nb_items'], 3)
+        self.assertEqual([book['title'] for book in response.json()['items']], ['Book 1'])
+        self.assertIsNone(response.json()['next_cursor'])
+
+    async def test_get_books_next_cursor_from_page(self):
+        client = AsyncClient()
+        response = await client.get(path=self.url, data={'page_size': 1, 'page': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['items'][0]['id'], 2)
+
+        response = await client.get(path=self.url, data={'page_size': 1, 'cursor': response.json()['next_cursor']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['items'][0]['id'], 3)
+
+    async def test_get_books_invalid_cursor(self):
+        client = AsyncClient()
+        response = await client.get(path=self.url, data={'cursor': 'invalid'})
+        self.assertEqual(response.status_code, 400)
+
+        response = await client.get(path=self.url, data={'page_size': 1})
+        response = await client.get(path=self.url, data={
+            'cursor': response.json()['next_cursor'], 'ordering': 'score'
+        })
+        self.assertEqual(response.status_code, 400)
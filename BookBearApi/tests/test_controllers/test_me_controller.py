@@ -0,0 +1,259 @@
+import json
+from datetime import date
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from BookBearApi.jobs import run_pending_jobs
+from BookBearApi.models import Book, FeedEntry, UserBook, UserRecommendation
+from BookBearApi.tests.config import TestCaseWithData
+
+
+class TestMeController(TestCaseWithData):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.url = '/api/v1/me/'
+
+    async def test_get_me(self):
+        response = await self.client_auth.get(
+            path=self.url
+        )
+        self.assertEqual(response.status_code, 200)
+        user = response.json()
+        self.assertEqual(user['username'], 'user1')
+        self.assertEqual(
+            (user['books_count'], user['followed_authors_count'], user['followed_publishers_count'],
+             user['favorite_genres_count']),
+            (2, 2, 2, 2)
+        )
+        self.assertNotIn('reviewed_books', user)
+
+    async def test_follow_returns_counts(self):
+        response = await self.client_auth.post(
+            path=self.url + f'authors/{self.author1.id}'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['followed_authors_count'], 3)
+        self.assertNotIn('followed_authors', response.json())
+        response = await self.client_auth.delete(
+            path=self.url + f'genres/{self.genre3.id}'
+        )
+        self.assertEqual(response.json()['favorite_genres_count'], 1)
+
+    async def test_get_user_books(self):
+        response = await self.client_auth.get(
+            path=self.url + 'books',
+            data={'page_size': 1}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['nb_items'], 2)
+        self.assertEqual([entry['book']['id'] for entry in response.json()['items']], [self.book2.id])
+        self.assertEqual(response.json()['items'][0]['review'], 'Review of the book')
+        response = await self.client_auth.get(
+            path=self.url + 'books',
+            data={'page_size': 1, 'cursor': response.json()['next_cursor']}
+        )
+        self.assertEqual([entry['book']['id'] for entry in response.json()['items']], [self.book3.id])
+
+    async def test_filter_user_books(self):
+        await UserBook.objects.filter(pk=self.user_book2.pk).aupdate(date_added=date(2020, 1, 1))
+        # Added last but read first, the pk order differs from the situation and date order
+        user_book3 = await UserBook.objects.acreate(user=self.user, book=self.book1, situation='C')
+        await UserBook.objects.filter(pk=user_book3.pk).aupdate(date_added=date(2019, 1, 1))
+
+        # By situation then date added, completed books first
+        book_ids, params = [], {'page_size': 1}
+        while True:
+            response = await self.client_auth.get(path=self.url + 'books', data=params)
+            book_ids.extend(entry['book']['id'] for entry in response.json()['items'])
+            if response.json()['next_cursor'] is None:
+                break
+            params['cursor'] = response.json()['next_cursor']
+        self.assertEqual(book_ids, [self.book1.id, self.book2.id, self.book3.id])
+
+        for filters, book_ids in (
+            ({'situation': 'R'}, [self.book3.id]),
+            ({'min_rating': 4}, [self.book2.id]),
+            ({'added_before': '2020-12-31'}, [self.book1.id, self.book3.id]),
+            ({'ordering': 'date_added'}, [self.book1.id, self.book3.id, self.book2.id]),
+            ({'ordering': '-date_added'}, [self.book2.id, self.book3.id, self.book1.id]),
+        ):
+            response = await self.client_auth.get(
+                path=self.url + 'books',
+                data=filters
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([entry['book']['id'] for entry in response.json()['items']], book_ids)
+
+    async def test_get_followed(self):
+        for resource, ids in (
+            ('authors', [self.author2.id, self.author3.id]),
+            ('publishers', [self.publisher2.id, self.publisher3.id]),
+            ('genres', [self.genre2.id, self.genre3.id]),
+        ):
+            response = await self.client_auth.get(
+                path=self.url + resource
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([item['id'] for item in response.json()['items']], ids)
+
+    async def test_export_user_books(self):
+        response = await self.client_auth.get(
+            path=self.url + 'books/export'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['situation'], 'C')
+        self.assertEqual(rows[0]['book']['id'], self.book2.id)
+        self.assertEqual(rows[1]['situation'], 'R')
+
+    async def test_batch_user_books(self):
+        # Builds the statistics, which the batch then keeps up to date
+        await self.client_auth.get(path=self.url + 'stats')
+        response = await self.client_auth.post(
+            path=self.url + 'books/batch',
+            data={'operations': [
+                {'op': 'create', 'book': self.book1.id, 'situation': 'C', 'rating': 3},
+                {'op': 'update', 'book': self.book3.id, 'situation': 'C', 'rating': 4},
+                {'op': 'delete', 'book': self.book2.id},
+            ]},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'created': 1, 'updated': 1, 'deleted': 1})
+
+        entries = UserBook.objects.filter(user=self.user).order_by('book_id').values_list(
+            'book_id', 'situation', 'rating'
+        )
+        self.assertEqual(
+            [entry async for entry in entries], [(self.book1.id, 'C', 3.0), (self.book3.id, 'C', 4.0)]
+        )
+        scores = Book.objects.order_by('pk').values_list('pk', 'score', 'rating_count')
+        self.assertEqual([score async for score in scores], [
+            (self.book1.id, 3.0, 1), (self.book2.id, 0.0, 0), (self.book3.id, 4.0, 1)
+        ])
+        stats = (await self.client_auth.get(path=self.url + 'stats')).json()
+        self.assertEqual((stats['total'], stats['completed'], stats['average_rating']), (2, 2, 3.5))
+
+    async def test_batch_user_books_invalid(self):
+        response = await self.client_auth.post(
+            path=self.url + 'books/batch',
+            data={'operations': [
+                {'op': 'delete', 'book': self.book3.id},
+                {'op': 'create', 'book': self.book2.id, 'situation': 'R'},
+                {'op': 'update', 'book': self.book1.id, 'rating': 1},
+                {'op': 'create', 'book': 999, 'situation': 'R'},
+                {'op': 'update', 'book': self.book3.id, 'rating': 1},
+            ]},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['operations'], {
+            '1': ['Book already in the library.'],
+            '2': ['Book not in the library.'],
+            '3': ['Book not found.'],
+            '4': ['Book already changed by a previous operation of the batch.'],
+        })
+        # Nothing is applied
+        self.assertEqual(await UserBook.objects.filter(user=self.user).acount(), 2)
+
+        response = await self.client_auth.post(
+            path=self.url + 'books/batch',
+            data={'operations': [{'op': 'move', 'book': self.book1.id}]},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 422)
+
+    async def test_batch_user_books_concurrent(self):
+        # The book is added by another request once the batch has been checked against the library
+        with mock.patch('BookBearApi.library._library_entries', return_value={self.book2.id: None}):
+            response = await self.client_auth.post(
+                path=self.url + 'books/batch',
+                data={'operations': [{'op': 'create', 'book': self.book2.id, 'situation': 'R'}]},
+                content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(await UserBook.objects.filter(user=self.user).acount(), 2)
+
+    async def test_import_library(self):
+        export = (
+            'Title,Authors,ISBN/UID,Read Status,Star Rating,Review\n'
+            'Book 1,Author 1,,read,4,\n'
+            'Unknown,Nobody,,to-read,,\n'
+        )
+        response = await self.client_auth.post(
+            path=self.url + 'import',
+            data={'file': SimpleUploadedFile('export.csv', export.encode())}
+        )
+        self.assertEqual(response.status_code, 202)
+        library_import = response.json()
+        self.assertEqual((library_import['source'], library_import['status']), ('storygraph', 'P'))
+        self.assertEqual(library_import['total_rows'], 2)
+
+        await sync_to_async(run_pending_jobs)()
+        response = await self.client_auth.get(path=self.url + f'import/{library_import["id"]}')
+        self.assertEqual(response.status_code, 200)
+        library_import = response.json()
+        self.assertEqual(library_import['status'], 'D')
+        self.assertEqual((library_import['imported_books'], library_import['unmatched_rows']), (1, 1))
+        self.assertEqual(library_import['errors'], [{'line': 3, 'message': "No book matching 'Unknown'"}])
+        self.assertTrue(await UserBook.objects.filter(user=self.user, book=self.book1, rating=4).aexists())
+
+        response = await self.client_auth.post(
+            path=self.url + 'import',
+            data={'file': SimpleUploadedFile('export.csv', b'title\nBook 1\n')}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    async def test_get_stats(self):
+        response = await self.client_auth.get(
+            path=self.url + 'stats'
+        )
+        self.assertEqual(response.status_code, 200)
+        stats = response.json()
+        self.assertEqual((stats['total'], stats['completed'], stats['reading']), (2, 1, 1))
+        self.assertEqual(stats['average_rating'], 5)
+        self.assertEqual(stats['rating_histogram']['5'], 1)
+        self.assertEqual([genre['id'] for genre in stats['top_genres']], [self.genre2.id])
+
+    async def test_get_recommendations(self):
+        # Without recommendations, the best scored books outside the library
+        response = await self.client_auth.get(
+            path=self.url + 'recommendations'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([book['id'] for book in response.json()['items']], [self.book1.id])
+
+        await UserRecommendation.objects.abulk_create([
+            UserRecommendation(user=self.user, book=self.book3, score=2),
+            UserRecommendation(user=self.user, book=self.book1, score=1),
+        ])
+        response = await self.client_auth.get(
+            path=self.url + 'recommendations'
+        )
+        # Books of the library are left out
+        self.assertEqual([book['id'] for book in response.json()['items']], [self.book1.id])
+
+    async def test_get_feed(self):
+        await FeedEntry.objects.abulk_create([
+            FeedEntry(user=self.user, book=self.book1),
+            FeedEntry(user=self.user, book=self.book3),
+            FeedEntry(user=self.user2, book=self.book2),
+        ])
+        response = await self.client_auth.get(
+            path=self.url + 'feed',
+            data={'page_size': 1}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([book['id'] for book in response.json()['items']], [self.book3.id])
+        response = await self.client_auth.get(
+            path=self.url + 'feed',
+            data={'page_size': 1, 'cursor': response.json()['next_cursor']}
+        )
+        self.assertEqual([book['id'] for book in response.json()['items']], [self.book1.id])
+        self.assertIsNone(response.json()['next_cursor'])
@@ -25,6 +25,17 @@ class TestUserController(TestCaseWithData):
         self.assertEqual(response.json()['username'], 'user2')
         self.assertEqual(response.json()['email'], 'user2@gmail.com')
 
+    async def test_get_user_stats(self):
+        response = await self.async_client.get(
+            path=self.url + f'{self.user.id}/stats',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total'], 2)
+        response = await self.async_client.get(
+            path=self.url + '1000/stats',
+        )
+        self.assertEqual(response.status_code, 404)
+
     async def test_update_user(self):
         response = await self.client_auth.patch(
             path=self.url + 'me',
@@ -144,3 +155,15 @@ class TestUserController(TestCaseWithData):
         self.assertEqual(len(response.json()['followed_publishers']), 1)
         self.assertEqual(response.json()['followed_publishers'][0]['id'], 2)
         self.assertEqual(response.json()['followed_publishers'][0]['name'], 'Publisher 2')
+
+    async def test_get_user_library(self):
+        response = await self.async_client.get(
+            path=self.url + f'{self.user.id}'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['books_count'], 2)
+        response = await self.async_client.get(
+            path=self.url + f'{self.user.id}/books'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([entry['book']['id'] for entry in response.json()['items']], [self.book2.id, self.book3.id])
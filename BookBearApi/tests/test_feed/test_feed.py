@@ -0,0 +1,73 @@
+from asgiref.sync import async_to_sync
+from django.test import TestCase, override_settings
+
+from BookBearApi.feed import afeed_books, publish_book
+from BookBearApi.jobs import run_pending_jobs
+from BookBearApi.models import Author, Book, FeedEntry, FeedSource, Job, Publisher, User
+
+
+class TestFeed(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(name='Author', birth_date='1950-01-01')
+        cls.famous = Author.objects.create(name='Famous', birth_date='1950-01-01')
+        cls.publisher = Publisher.objects.create(name='Publisher')
+        cls.users = [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@gmail.com', password=f'user{i}',
+                                     birth_date='2000-01-01')
+            for i in range(5)
+        ]
+        for user in cls.users[:3]:
+            user.followed_authors.add(cls.author)
+        cls.users[3].followed_publishers.add(cls.publisher)
+        for user in cls.users[2:]:
+            user.followed_authors.add(cls.famous)
+
+    def create_book(self, title, authors, publisher=None):
+        book = Book.objects.create(title=title, publication_date='2000-01-01', publisher=publisher)
+        book.authors.add(*authors)
+        publish_book(book.pk)
+        return book
+
+    def feed(self, user):
+        return list(async_to_sync(afeed_books)(user.pk).values_list('title', flat=True))
+
+    @override_settings(FEED_FANOUT_BATCH_SIZE=2)
+    def test_fan_out_in_batches(self):
+        book = self.create_book('Book', [self.author], self.publisher)
+        self.assertEqual(run_pending_jobs(limit=1), 1)
+        # Followers 0, 1 and 2 of the author and 3 of the publisher, two per delivery job
+        deliveries = Job.objects.filter(name='feed.deliver', status=Job.PENDING)
+        self.assertEqual(deliveries.count(), 2)
+        self.assertEqual(run_pending_jobs(), 2)
+        self.assertEqual(
+            set(FeedEntry.objects.filter(book=book).values_list('user_id', flat=True)),
+            {user.pk for user in self.users[:4]}
+        )
+        self.assertEqual(self.feed(self.users[0]), ['Book'])
+        self.assertEqual(self.feed(self.users[4]), [])
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=2)
+    def test_pull_large_sources(self):
+        self.create_book('Famous book', [self.famous])
+        self.create_book('Shared book', [self.famous, self.author])
+        run_pending_jobs()
+        self.assertEqual(FeedSource.objects.filter(author=self.famous).count(), 2)
+        # The author has 3 followers too, so nothing is pushed
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(self.feed(self.users[4]), ['Shared book', 'Famous book'])
+        self.assertEqual(self.feed(self.users[0]), ['Shared book'])
+
+    def test_newest_first(self):
+        for title in ('First', 'Second', 'Third'):
+            self.create_book(title, [self.author])
+        run_pending_jobs()
+        self.assertEqual(self.feed(self.users[1]), ['Third', 'Second', 'First'])
+
+    def test_deleted_book(self):
+        book = self.create_book('Book', [self.author])
+        run_pending_jobs(limit=1)
+        book.delete()
+        run_pending_jobs()
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertFalse(Job.objects.exclude(status=Job.DONE).exists())
@@ -0,0 +1,167 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError
+from django.test import AsyncClient, TestCase, override_settings
+from PIL import Image
+
+from BookBearApi.images import (
+    RENDITION_FORMATS, RENDITION_SIZES, areplace_image, delete_image, rehash_image, render, replace_image, sweep_media
+)
+from BookBearApi.jobs import run_pending_jobs
+from BookBearApi.models import Book, Job
+
+
+def image_file(name='cover.png', size=(2000, 1000), mode='RGBA', file_format='PNG', **options):
+    output = BytesIO()
+    Image.new(mode, size, (200, 100, 50, 128)[:len(mode)]).save(output, file_format, **options)
+    return SimpleUploadedFile(name, output.getvalue())
+
+
+class TestRenditions(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.book = Book.objects.create(title='Book', publication_date='2000-01-01')
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.media_root = media_root
+
+    def media_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(directory, name), self.media_root)
+            for directory, _, names in os.walk(self.media_root) for name in names
+        )
+
+    def test_render(self):
+        with Image.open(image_file()) as image:
+            data = render(image, 160, 'jpeg')
+        with Image.open(BytesIO(data)) as rendition:
+            self.assertEqual((rendition.format, rendition.mode, rendition.size), ('JPEG', 'RGB', (160, 80)))
+
+        with Image.open(image_file(size=(100, 50))) as image:
+            data = render(image, 480, 'webp')
+        with Image.open(BytesIO(data)) as rendition:
+            # Never upscaled
+            self.assertEqual((rendition.format, rendition.size), ('WEBP', (100, 50)))
+
+    def test_render_strips_metadata(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Rotated 90 degrees
+        exif[0x010F] = 'Camera'
+        upload = image_file('photo.jpg', size=(400, 200), mode='RGB', file_format='JPEG', exif=exif.tobytes())
+        with Image.open(upload) as image:
+            data = render(image, 160, 'jpeg')
+        with Image.open(BytesIO(data)) as rendition:
+            self.assertEqual(rendition.size, (80, 160))
+            self.assertEqual(dict(rendition.getexif()), {})
+
+    def test_render_job(self):
+        replace_image(self.book, 'cover', image_file())
+        self.assertEqual(Job.objects.filter(name='images.render').count(), 1)
+        self.assertEqual(self.book.cover_thumb.name, None)
+        run_pending_jobs()
+
+        self.book.refresh_from_db()
+        self.assertEqual(set(self.book.cover_renditions), set(RENDITION_SIZES))
+        self.assertEqual(self.book.cover_thumb.name, self.book.cover_renditions['thumb']['webp'])
+        self.assertEqual(len(self.media_files()), 1 + len(RENDITION_SIZES) * len(RENDITION_FORMATS))
+        with Image.open(self.book.cover_thumb.path) as thumb:
+            self.assertEqual(thumb.size, (160, 80))
+
+        response = async_to_sync(AsyncClient().get)('/api/v1/book/')
+        self.assertTrue(response.json()['items'][0]['cover_thumb'].endswith(self.book.cover_thumb.name))
+        response = async_to_sync(AsyncClient().get)(f'/api/v1/book/{self.book.pk}')
+        self.assertRegex(
+            response.json()['cover_renditions']['medium']['webp'], r'/covers/renditions/cover_medium\.[0-9a-f]{16}\.webp$'
+        )
+
+        # Replacing the cover drops the previous renditions
+        with self.captureOnCommitCallbacks(execute=True):
+            replace_image(self.book, 'cover', image_file('other.png'))
+            run_pending_jobs()
+        self.assertEqual(len(self.media_files()), 1 + len(RENDITION_SIZES) * len(RENDITION_FORMATS))
+        self.assertTrue(all('other' in name for name in self.media_files()))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            delete_image(self.book, 'cover')
+            self.book.save()
+        self.assertEqual(self.media_files(), [])
+        self.assertEqual(self.book.cover_renditions, {})
+
+    def test_replaced_before_rendering(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            replace_image(self.book, 'cover', image_file('first.png'))
+            replace_image(self.book, 'cover', image_file('second.png'))
+            run_pending_jobs()
+        self.assertTrue(all('second' in name for name in self.media_files()))
+        self.assertFalse(Job.objects.exclude(status=Job.DONE).exists())
+
+    def test_unreadable_image(self):
+        replace_image(self.book, 'cover', SimpleUploadedFile('cover.png', b'not an image'))
+        run_pending_jobs()
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.cover_renditions, {})
+        self.assertEqual(Job.objects.get(name='images.render').status, Job.DONE)
+
+    def test_rehash_image(self):
+        replace_image(self.book, 'cover', image_file())
+        run_pending_jobs()
+        self.assertFalse(rehash_image(self.book, 'cover'))
+
+        # An image stored before the names were hashed
+        with open(os.path.join(self.media_root, 'covers', 'legacy.png'), 'wb') as file:
+            file.write(image_file().read())
+        Book.objects.filter(pk=self.book.pk).update(cover='covers/legacy.png')
+        self.book.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(rehash_image(self.book, 'cover'))
+            run_pending_jobs()
+
+        self.book.refresh_from_db()
+        self.assertRegex(self.book.cover.name, r'^covers/legacy\.[0-9a-f]{16}\.png$')
+        self.assertTrue(self.book.cover_thumb.name.startswith('covers/renditions/legacy_thumb.'))
+        self.assertNotIn('covers/legacy.png', self.media_files())
+
+    def test_files_deleted_on_commit(self):
+        replace_image(self.book, 'cover', image_file('first.png'))
+        with self.captureOnCommitCallbacks() as callbacks:
+            async_to_sync(areplace_image)(self.book, 'cover', image_file('second.png'))
+        # Until the change commits the previous cover is kept
+        self.assertEqual(len(self.media_files()), 2)
+        for callback in callbacks:
+            callback()
+        self.assertEqual([os.path.basename(name)[:7] for name in self.media_files()], ['second.'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            run_pending_jobs()
+            self.book.delete()
+        self.assertEqual(self.media_files(), [])
+
+    def test_failed_save_deletes_upload(self):
+        with mock.patch('BookBearApi.images.set_image', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                async_to_sync(areplace_image)(self.book, 'cover', image_file())
+            with self.assertRaises(DatabaseError):
+                replace_image(self.book, 'cover', image_file())
+        self.assertEqual(self.media_files(), [])
+
+    def test_sweep_media(self):
+        replace_image(self.book, 'cover', image_file())
+        run_pending_jobs()
+        with open(os.path.join(self.media_root, 'covers', 'orphan.png'), 'wb') as file:
+            file.write(b'orphan')
+
+        self.assertEqual(sweep_media(timedelta(hours=1)), [])
+        self.assertEqual(sweep_media(timedelta(0)), ['covers/orphan.png'])
+        self.assertEqual(len(self.media_files()), 1 + len(RENDITION_SIZES) * len(RENDITION_FORMATS))
@@ -0,0 +1,106 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from BookBearApi.jobs import JOBS, claim_next_job, enqueue, job, run_job, run_pending_jobs
+from BookBearApi.models import Job
+
+calls = []
+
+
+@job('test.record')
+def record(current, value):
+    calls.append((current.pk, value))
+
+
+@job('test.fail')
+def fail(current):
+    raise RuntimeError('Broken')
+
+
+class TestJobs(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_run_in_order(self):
+        first = enqueue('test.record', value=1)
+        second = enqueue('test.record', value=2)
+        self.assertEqual(run_pending_jobs(), 2)
+        self.assertEqual(calls, [(first.pk, 1), (second.pk, 2)])
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.attempts), (Job.DONE, 1))
+        self.assertIsNotNone(first.finished_at)
+        self.assertEqual(run_pending_jobs(), 0)
+
+    @override_settings(JOB_MAX_ATTEMPTS=2, JOB_RETRY_DELAY=0)
+    def test_retry_then_fail(self):
+        failing = enqueue('test.fail')
+        self.assertEqual(run_pending_jobs(), 2)
+        failing.refresh_from_db()
+        self.assertEqual((failing.status, failing.attempts), (Job.FAILED, 2))
+        self.assertIn('RuntimeError: Broken', failing.error)
+
+    @override_settings(JOB_RETRY_DELAY=60)
+    def test_retry_delay(self):
+        failing = enqueue('test.fail')
+        self.assertEqual(run_pending_jobs(), 1)
+        failing.refresh_from_db()
+        self.assertEqual(failing.status, Job.PENDING)
+        self.assertGreater(failing.available_at, timezone.now() + timedelta(seconds=50))
+        self.assertEqual(run_pending_jobs(), 0)
+
+        # The delay doubles with every attempt
+        Job.objects.filter(pk=failing.pk).update(available_at=timezone.now())
+        self.assertEqual(run_pending_jobs(), 1)
+        failing.refresh_from_db()
+        self.assertGreater(failing.available_at, timezone.now() + timedelta(seconds=110))
+
+    @override_settings(JOB_LEASE_SECONDS=60, JOB_MAX_ATTEMPTS=2)
+    def test_expired_lease(self):
+        stopped = enqueue('test.record', value=1)
+        self.assertEqual(claim_next_job().pk, stopped.pk)
+        # The worker stopped before finishing it
+        self.assertIsNone(claim_next_job())
+
+        Job.objects.filter(pk=stopped.pk).update(started_at=timezone.now() - timedelta(seconds=61))
+        self.assertEqual(run_pending_jobs(), 1)
+        stopped.refresh_from_db()
+        self.assertEqual((stopped.status, stopped.attempts), (Job.DONE, 2))
+        self.assertEqual(calls, [(stopped.pk, 1)])
+
+        # Stopped its worker every time
+        Job.objects.filter(pk=stopped.pk).update(status=Job.RUNNING,
+                                                 started_at=timezone.now() - timedelta(seconds=61))
+        self.assertIsNone(claim_next_job())
+        stopped.refresh_from_db()
+        self.assertEqual(stopped.status, Job.FAILED)
+
+    def test_replaced_worker(self):
+        replaced = enqueue('test.fail')
+        claimed = claim_next_job()
+        # Claimed again by another worker after its lease expired
+        Job.objects.filter(pk=replaced.pk).update(started_at=timezone.now())
+        run_job(claimed)
+        replaced.refresh_from_db()
+        self.assertEqual((replaced.status, replaced.error), (Job.RUNNING, ''))
+
+    def test_limit(self):
+        for value in range(3):
+            enqueue('test.record', value=value)
+        self.assertEqual(run_pending_jobs(limit=2), 2)
+        self.assertEqual(Job.objects.filter(status=Job.PENDING).count(), 1)
+
+    def test_unknown_job(self):
+        self.assertNotIn('test.unknown', JOBS)
+        with self.assertRaises(ValueError):
+            enqueue('test.unknown')
+
+    def test_command(self):
+        enqueue('test.record', value=1)
+        out = StringIO()
+        call_command('run_jobs', once=True, stdout=out)
+        self.assertIn('Ran 1 jobs.', out.getvalue())
+        self.assertEqual(len(calls), 1)
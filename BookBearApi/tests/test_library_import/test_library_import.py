@@ -0,0 +1,102 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+
+from BookBearApi.isbn import normalize_isbn
+from BookBearApi.jobs import run_pending_jobs
+from BookBearApi.library_import import BookLookup, LibraryRow, start_library_import
+from BookBearApi.models import Author, Book, Job, LibraryImport, User, UserBook
+
+GOODREADS_HEADER = (
+    'Book Id,Title,Author,Author l-f,Additional Authors,ISBN,ISBN13,My Rating,Average Rating,Publisher,'
+    'Exclusive Shelf,My Review\n'
+)
+
+
+def goodreads_row(title, author='', isbn='', isbn13='', rating='0', shelf='read', review=''):
+    return f'1,"{title}",{author},,,"=""{isbn}""","=""{isbn13}""",{rating},4.1,Publisher,{shelf},"{review}"\n'
+
+
+class TestLibraryImport(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user', email='user@gmail.com', password='user',
+                                            birth_date='2000-01-01')
+        suzanne = Author.objects.create(name='Suzanne Collins', birth_date='1962-08-10')
+        cls.hunger_games = Book.objects.create(title='The Hunger Games', publication_date='2008-09-14')
+        cls.hunger_games.authors.add(suzanne)
+        cls.dune = Book.objects.create(title='Dune', isbn='9780441172719', publication_date='1965-08-01')
+        cls.other_dune = Book.objects.create(title='Dune', publication_date='1984-12-14')
+        cls.other_dune.authors.add(Author.objects.create(name='Someone Else', birth_date='1950-01-01'))
+        cls.emma = Book.objects.create(title='Émma', publication_date='1815-12-23')
+        UserBook.objects.create(user=cls.user, book=cls.emma, situation=UserBook.PENDING, rating=2)
+
+    def start(self, content):
+        return start_library_import(self.user.pk, SimpleUploadedFile('export.csv', content.encode()))
+
+    def test_normalize_isbn(self):
+        self.assertEqual(normalize_isbn('0-441-17271-7'), '9780441172719')
+        self.assertEqual(normalize_isbn('="9780441172719"'), '9780441172719')
+        self.assertIsNone(normalize_isbn('0441172718'))
+        self.assertIsNone(normalize_isbn(''))
+
+    def test_lookup_by_title_key(self):
+        self.assertEqual(Book.objects.get(pk=self.emma.pk).title_key, 'emma')
+        row = LibraryRow(line=2, title='The Hunger Games (The Hunger Games, #1)', authors=['Suzanne Collins'],
+                         isbns=[], situation=UserBook.COMPLETED)
+        # The candidate books are read by their title keys, whatever the size of the catalog
+        with self.assertNumQueries(2):
+            lookup = BookLookup.build([row])
+        self.assertEqual(lookup.match(row), self.hunger_games.pk)
+
+    def test_goodreads_import(self):
+        library_import = self.start(
+            GOODREADS_HEADER
+            + goodreads_row('The Hunger Games (The Hunger Games, #1)', 'Suzanne Collins', rating='5',
+                            review='Great')
+            + goodreads_row('Dune (Dune #1)', 'Frank Herbert', isbn='0441172717', shelf='currently-reading')
+            + goodreads_row('Emma', 'Jane Austen', shelf='to-read')
+            + goodreads_row('Unknown Book', 'Nobody')
+            + goodreads_row('Bad Rating', rating='7')
+        )
+        self.assertEqual((library_import.source, library_import.total_rows), (LibraryImport.GOODREADS, 5))
+        self.assertEqual(library_import.job.status, Job.PENDING)
+        run_pending_jobs()
+
+        library_import.refresh_from_db()
+        self.assertIsNotNone(library_import.finished_at)
+        self.assertEqual(library_import.content, '')
+        self.assertEqual(
+            (library_import.processed_rows, library_import.imported_books, library_import.unmatched_rows,
+             library_import.error_count),
+            (5, 2, 2, 3)
+        )
+        self.assertEqual([error['line'] for error in library_import.errors], [6, 4, 5])
+
+        entries = dict(UserBook.objects.filter(user=self.user).values_list('book_id', 'situation'))
+        self.assertEqual(entries, {
+            self.hunger_games.pk: UserBook.COMPLETED,
+            self.dune.pk: UserBook.READING,
+            self.emma.pk: UserBook.PENDING,
+        })
+        self.hunger_games.refresh_from_db()
+        self.assertEqual((self.hunger_games.score, self.hunger_games.rating_count), (5.0, 1))
+        # "Emma" without the author of the catalog book is not matched, its entry keeps its rating
+        self.assertEqual(UserBook.objects.get(user=self.user, book=self.emma).rating, 2)
+
+    def test_storygraph_import(self):
+        library_import = self.start(
+            'Title,Authors,Contributors,ISBN/UID,Format,Read Status,Star Rating,Review\n'
+            'Emma,,,,paperback,did-not-finish,3.5,\n'
+            'Dune,"Frank Herbert, Someone Else",,,paperback,paused,,\n'
+        )
+        self.assertEqual(library_import.source, LibraryImport.STORYGRAPH)
+        run_pending_jobs()
+
+        entries = dict(UserBook.objects.filter(user=self.user).values_list('book_id', 'situation'))
+        self.assertEqual(entries, {self.emma.pk: UserBook.ABANDONED, self.other_dune.pk: UserBook.STOPPED})
+        self.assertEqual(UserBook.objects.get(user=self.user, book=self.emma).rating, 3.5)
+
+    def test_unsupported_export(self):
+        with self.assertRaisesMessage(ValueError, 'Unsupported export'):
+            self.start('title,authors\nDune,Frank Herbert\n')
+        self.assertFalse(LibraryImport.objects.exists())
@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import SimpleTestCase, override_settings
+
+from BookBearApi.storage import name_hash
+from BookBearApi.views import IMMUTABLE_CACHE_CONTROL
+
+CONTENT = bytes(range(256)) * 4
+
+
+class TestServeMedia(SimpleTestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root, MEDIA_URL='/media/')
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.media_root = media_root
+        self.name = default_storage.save('covers/cover.png', ContentFile(CONTENT))
+
+    def get(self, name, **headers):
+        return self.client.get(f'/media/{name}', headers=headers)
+
+    def test_hashed_name(self):
+        self.assertRegex(self.name, r'^covers/cover\.[0-9a-f]{16}\.png$')
+        # The same content stored twice gets its own file
+        duplicate = default_storage.save('covers/cover.png', ContentFile(CONTENT))
+        self.assertNotEqual(duplicate, self.name)
+        self.assertEqual(name_hash(duplicate), name_hash(self.name))
+        self.assertIsNone(name_hash('covers/cover.png'))
+
+    def test_serve(self):
+        response = self.get(self.name)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
+        self.assertEqual(response['ETag'], f'"{name_hash(self.name)}"')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+        self.assertEqual(self.get('covers/missing.png').status_code, 404)
+        self.assertEqual(self.get('../settings.py').status_code, 400)
+        self.assertEqual(self.client.post(f'/media/{self.name}').status_code, 405)
+
+    def test_not_modified(self):
+        etag = self.get(self.name)['ETag']
+        response = self.get(self.name, if_none_match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(self.get(self.name, if_none_match=f'"other", W/{etag}').status_code, 304)
+        self.assertEqual(self.get(self.name, if_none_match='"other"').status_code, 200)
+
+    def test_range(self):
+        response = self.get(self.name, range='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[10:20])
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(CONTENT)}')
+        self.assertEqual(response['Content-Length'], '10')
+
+        response = self.get(self.name, range='bytes=-16')
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[-16:])
+        response = self.get(self.name, range='bytes=1000-')
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[1000:])
+
+        response = self.get(self.name, range=f'bytes={len(CONTENT)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(CONTENT)}')
+
+        # Multiple ranges and ranges of another version of the file are answered with the whole file
+        self.assertEqual(self.get(self.name, range='bytes=0-1,4-5').status_code, 200)
+        self.assertEqual(self.get(self.name, range='bytes=0-1', if_range='"other"').status_code, 200)
+        etag = self.get(self.name)['ETag']
+        self.assertEqual(self.get(self.name, range='bytes=0-1', if_range=etag).status_code, 206)
+
+    def test_unhashed_name(self):
+        with open(os.path.join(self.media_root, 'covers', 'legacy.png'), 'wb') as file:
+            file.write(CONTENT)
+        response = self.get('covers/legacy.png')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+        self.assertTrue(response['ETag'].startswith('W/'))
+        self.assertEqual(self.get('covers/legacy.png', if_none_match=response['ETag']).status_code, 304)
+
+    @override_settings(MEDIA_ACCEL_REDIRECT='/protected-media/')
+    def test_accel_redirect(self):
+        response = self.get(self.name)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.name}')
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['Cache-Control'], IMMUTABLE_CACHE_CONTROL)
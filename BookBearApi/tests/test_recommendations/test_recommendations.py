@@ -0,0 +1,75 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from BookBearApi.models import Author, Book, BookSimilarity, User, UserBook, UserRecommendation
+from BookBearApi.recommendations import CoRatings, Recommender, preference
+
+
+class TestRecommendations(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.books = Book.objects.bulk_create(
+            Book(title=f'Book {i}', publication_date='2000-01-01') for i in range(5)
+        )
+        cls.author = Author.objects.create(name='Author', birth_date='1950-01-01')
+        cls.books[3].authors.add(cls.author)
+        cls.users = [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@gmail.com', password=f'user{i}',
+                                     birth_date='2000-01-01')
+            for i in range(4)
+        ]
+        # Readers of book 0 loved book 1 and disliked book 2
+        for user in cls.users[:3]:
+            UserBook.objects.create(user=user, book=cls.books[0], rating=5)
+            UserBook.objects.create(user=user, book=cls.books[1], rating=5)
+        UserBook.objects.create(user=cls.users[2], book=cls.books[2], rating=1)
+        cls.reader = cls.users[3]
+        UserBook.objects.create(user=cls.reader, book=cls.books[0], situation=UserBook.COMPLETED)
+        cls.reader.followed_authors.add(cls.author)
+
+    def test_preference(self):
+        self.assertEqual(preference(UserBook.PENDING, 4), 0.8)
+        self.assertEqual(preference(UserBook.PENDING, 9), 1)
+        self.assertEqual(preference(UserBook.ABANDONED, None), 0.1)
+
+    def test_similar_books(self):
+        matrix = CoRatings.load()
+        similar = matrix.similar_books(self.books[0].pk)
+        self.assertEqual([book_id for _, book_id in similar], [self.books[1].pk, self.books[2].pk])
+        self.assertGreater(similar[0][0], similar[1][0])
+        self.assertEqual(matrix.similar_books(self.books[4].pk), [])
+
+    def test_similarity_blocks(self):
+        matrix = CoRatings.load()
+        book_ids = [book.pk for book in self.books]
+        neighbours = matrix.neighbours(book_ids)
+        self.assertEqual(neighbours[self.books[0].pk], matrix.similar_books(self.books[0].pk))
+        self.assertNotIn(self.books[4].pk, neighbours)
+        # One book per block
+        with mock.patch('BookBearApi.recommendations.SIMILARITY_BLOCK_CELLS', 1):
+            self.assertEqual(matrix.neighbours(book_ids), neighbours)
+
+    def test_refresh(self):
+        recommender = Recommender(batch_size=2)
+        self.assertEqual(recommender.refresh_similarities(), 3)
+        self.assertEqual(recommender.refresh_users(), 4)
+        recommended = list(
+            UserRecommendation.objects.filter(user=self.reader).order_by('-score').values_list('book_id', flat=True)
+        )
+        self.assertEqual(recommended, [self.books[3].pk, self.books[1].pk, self.books[2].pk])
+        # Refreshing again replaces the rows
+        recommender.refresh_users([self.reader.pk])
+        self.assertEqual(UserRecommendation.objects.filter(user=self.reader).count(), 3)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('refresh_recommendations', stdout=out)
+        self.assertIn('Refreshed the recommendations of 4 users.', out.getvalue())
+        self.assertTrue(BookSimilarity.objects.exists())
+
+        out = StringIO()
+        call_command('refresh_recommendations', users_only=True, stdout=out)
+        self.assertNotIn('similar books', out.getvalue())
@@ -0,0 +1,107 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from BookBearApi.models import Author, Book, Publisher
+from BookBearApi.search import get_search_index
+
+
+class TestBookSearch(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.publisher = Publisher.objects.create(name='Rocco')
+        cls.author = Author.objects.create(name='Machado de Assis', birth_date='1839-06-21')
+        cls.casmurro = Book.objects.create(title='Dom Casmurro', publication_date='1899-01-01',
+                                           synopsis='Bentinho tells the story of his life.', publisher=cls.publisher)
+        cls.casmurro.authors.add(cls.author)
+        cls.memorias = Book.objects.create(title='Memórias Póstumas', publication_date='1881-01-01',
+                                           synopsis='Told by a dead narrator, a reader of Dom Casmurro.')
+        cls.memorias.authors.add(cls.author)
+        cls.other = Book.objects.create(title='Other', publication_date='2000-01-01')
+
+    def search(self, query):
+        return list(get_search_index().search(Book.objects.all(), query).values_list('pk', flat=True))
+
+    def test_search(self):
+        self.assertEqual(self.search('casmurro'), [self.casmurro.pk, self.memorias.pk])
+        self.assertEqual(self.search('machado'), [self.casmurro.pk, self.memorias.pk])
+        self.assertEqual(self.search('rocco'), [self.casmurro.pk])
+        self.assertEqual(self.search('memorias'), [self.memorias.pk])
+        self.assertEqual(self.search('dom bentinho'), [self.casmurro.pk])
+        self.assertEqual(self.search('"*'), [])
+
+    def test_book_changes(self):
+        self.other.title = 'Quincas Borba'
+        self.other.save()
+        self.assertEqual(self.search('quincas'), [self.other.pk])
+
+        self.casmurro.delete()
+        self.assertEqual(self.search('casmurro'), [self.memorias.pk])
+
+    def test_author_changes(self):
+        self.author.name = 'Joaquim Maria'
+        self.author.save()
+        self.assertEqual(self.search('machado'), [])
+        self.assertEqual(len(self.search('joaquim')), 2)
+
+        self.other.authors.add(self.author)
+        self.assertEqual(len(self.search('joaquim')), 3)
+        self.author.books.remove(self.casmurro)
+        self.assertEqual(len(self.search('joaquim')), 2)
+        self.author.books.clear()
+        self.assertEqual(self.search('joaquim'), [])
+
+        self.other.authors.add(self.author)
+        self.author.delete()
+        self.assertEqual(self.search('joaquim'), [])
+
+    def test_publisher_changes(self):
+        self.publisher.name = 'Penguin'
+        self.publisher.save()
+        self.assertEqual(self.search('penguin'), [self.casmurro.pk])
+        self.publisher.delete()
+        self.assertEqual(self.search('penguin'), [])
+
+    def test_search_endpoint(self):
+        response = self.client.get('/api/v1/book/search', {'q': 'machado', 'page_size': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['nb_items'], 2)
+        self.assertEqual(response.json()['items'][0]['id'], self.casmurro.pk)
+
+        response = self.client.get('/api/v1/book/search',
+                                    {'q': 'machado', 'page_size': 1, 'cursor': response.json()['next_cursor']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['items'][0]['id'], self.memorias.pk)
+        self.assertIsNone(response.json()['next_cursor'])
+
+        response = self.client.get('/api/v1/book/search', {'q': ''})
+        self.assertEqual(response.status_code, 422)
+
+    def test_search_cursor(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest('The ranks are only rounded by the database on PostgreSQL')
+        # Ranks without an exact decimal representation, many of them tied
+        for i in range(30):
+            book = Book.objects.create(title=f'Machado {i}', publication_date='2000-01-01',
+                                       synopsis=' '.join(['story'] * (i % 7)) + ' machado' * (i % 3))
+            book.authors.add(self.author)
+        expected = self.search('machado')
+
+        ids, params = [], {'q': 'machado', 'page_size': 4}
+        while True:
+            response = self.client.get('/api/v1/book/search', params)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(item['id'] for item in response.json()['items'])
+            if response.json()['next_cursor'] is None:
+                break
+            params['cursor'] = response.json()['next_cursor']
+        self.assertEqual(ids, expected)
+
+    def test_rebuild(self):
+        get_search_index().uninstall()
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Indexed 3 books.', out.getvalue())
+        self.assertEqual(len(self.search('machado')), 2)
@@ -0,0 +1,109 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from BookBearApi.models import Author, Book, Genre, Publisher
+from BookBearApi import suggest
+from BookBearApi.suggest import normalize, suggestion_index
+
+
+class TestSuggest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(name='Machado de Assis', birth_date='1839-06-21')
+        cls.other_author = Author.objects.create(name='Mário de Andrade', birth_date='1893-10-09')
+        cls.publisher = Publisher.objects.create(name='Martins Fontes')
+        cls.genre = Genre.objects.create(name='Romance')
+        cls.book = Book.objects.create(title='Memórias Póstumas de Brás Cubas', publication_date='1881-01-01')
+
+    def setUp(self):
+        suggestion_index.reset()
+        suggestion_index.load()
+        self.addCleanup(suggestion_index.reset)
+
+    def names(self, query, **kwargs):
+        return [suggestion['name'] for suggestion in suggestion_index.suggest(query, **kwargs)]
+
+    def test_normalize(self):
+        self.assertEqual(normalize('  Brás   Cubas! '), 'bras cubas')
+
+    def test_suggest(self):
+        self.assertEqual(self.names('ma'), ['Martins Fontes', 'Machado de Assis', 'Mário de Andrade'])
+        self.assertEqual(self.names('mar'), ['Martins Fontes', 'Mário de Andrade'])
+        self.assertEqual(self.names('assis'), ['Machado de Assis'])
+        self.assertEqual(self.names('de a'), ['Machado de Assis', 'Mário de Andrade'])
+        self.assertEqual(self.names('bras c'), ['Memórias Póstumas de Brás Cubas'])
+        self.assertEqual(self.names('m', kinds=['book', 'genre']), ['Memórias Póstumas de Brás Cubas'])
+        self.assertEqual(self.names('ma', limit=1), ['Martins Fontes'])
+        self.assertEqual(self.names('?'), [])
+
+    def test_incremental_updates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.name = 'Joaquim Maria'
+            self.author.save()
+            Genre.objects.create(name='Realism')
+            self.publisher.delete()
+
+        self.assertEqual(self.names('ma'), ['Mário de Andrade', 'Joaquim Maria'])
+        self.assertEqual(self.names('machado'), [])
+        self.assertEqual(self.names('rea'), ['Realism'])
+        self.assertEqual(self.names('martins'), [])
+
+    def load_with(self, change):
+        kind_index = suggest._KindIndex
+
+        def read_names(rows):
+            # The change is committed while the names are read
+            if read_names.calls == 0:
+                change()
+            read_names.calls += 1
+            return kind_index(rows)
+
+        read_names.calls = 0
+        with mock.patch.object(suggest, '_KindIndex', side_effect=read_names):
+            suggestion_index.reset()
+            suggestion_index.load()
+
+    def test_changes_during_load(self):
+        def change():
+            suggestion_index.add('genre', [(self.genre.pk, 'Realism')])
+            suggestion_index.remove('author', [self.other_author.pk])
+
+        self.load_with(change)
+        self.assertEqual(self.names('rea'), ['Realism'])
+        self.assertEqual(self.names('rom'), [])
+        self.assertEqual(self.names('mar'), ['Martins Fontes'])
+
+    def test_reset_during_load(self):
+        self.load_with(suggestion_index.reset)
+        self.assertFalse(suggestion_index.loaded)
+
+    def test_single_reload(self):
+        suggestion_index._loaded_at = 0.0
+        Genre.objects.create(name='Realism')
+        # Another request is reloading the index, this one answers from the expired index
+        with suggestion_index._load_lock:
+            async_to_sync(suggestion_index.aload_if_expired)()
+        self.assertTrue(suggestion_index.expired)
+        self.assertEqual(self.names('rea'), [])
+
+        async_to_sync(suggestion_index.aload_if_expired)()
+        self.assertFalse(suggestion_index.expired)
+        self.assertEqual(self.names('rea'), ['Realism'])
+
+    def test_endpoint(self):
+        suggestion_index.reset()
+        response = self.client.get('/api/v1/suggest/', {'q': 'mach'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [{'kind': 'author', 'id': self.author.id, 'name': 'Machado de Assis'}])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/suggest/', {'q': 'rom', 'kinds': ['genre']})
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(response.json()[0]['name'], 'Romance')
+
+        response = self.client.get('/api/v1/suggest/', {'q': 'rom', 'kinds': ['user']})
+        self.assertEqual(response.status_code, 422)
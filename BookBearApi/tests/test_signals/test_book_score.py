@@ -0,0 +1,83 @@
+from django.test import TestCase
+
+from BookBearApi.models import Book, User, UserBook
+
+
+class TestBookScoreSignals(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.book = Book.objects.create(title='Book 1', publication_date='2000-01-01')
+        cls.other_book = Book.objects.create(title='Book 2', publication_date='2000-01-01')
+        cls.users = [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@gmail.com', password=f'user{i}',
+                                     birth_date='2000-01-01')
+            for i in range(3)
+        ]
+
+    def assertScore(self, book, score, rating_sum, rating_count):
+        book.refresh_from_db()
+        self.assertEqual(book.score, score)
+        self.assertEqual(book.rating_sum, rating_sum)
+        self.assertEqual(book.rating_count, rating_count)
+
+    def test_create(self):
+        UserBook.objects.create(user=self.users[0], book=self.book, rating=5)
+        UserBook.objects.create(user=self.users[1], book=self.book, rating=2)
+        UserBook.objects.create(user=self.users[2], book=self.book)
+        self.assertScore(self.book, 3.5, 7, 2)
+
+    def test_update(self):
+        user_book = UserBook.objects.create(user=self.users[0], book=self.book)
+        UserBook.objects.create(user=self.users[1], book=self.book, rating=2)
+
+        user_book.rating = 4
+        user_book.save()
+        self.assertScore(self.book, 3, 6, 2)
+
+        user_book.rating = None
+        user_book.save()
+        self.assertScore(self.book, 2, 2, 1)
+
+        user_book.rating = 5
+        user_book.book = self.other_book
+        user_book.save()
+        self.assertScore(self.book, 2, 2, 1)
+        self.assertScore(self.other_book, 5, 5, 1)
+
+    def test_delete(self):
+        user_book = UserBook.objects.create(user=self.users[0], book=self.book, rating=5)
+        UserBook.objects.create(user=self.users[1], book=self.book, rating=2)
+
+        user_book.delete()
+        self.assertScore(self.book, 2, 2, 1)
+
+        self.users[1].delete()
+        self.assertScore(self.book, 0, 0, 0)
+
+    def assertHistogram(self, book, histogram):
+        book.refresh_from_db()
+        self.assertEqual([getattr(book, f'rating_{bucket}') for bucket in range(1, 6)], histogram)
+
+    def test_histogram(self):
+        user_book = UserBook.objects.create(user=self.users[0], book=self.book, rating=4.4)
+        UserBook.objects.create(user=self.users[1], book=self.book, rating=1)
+        self.assertHistogram(self.book, [1, 0, 0, 1, 0])
+
+        user_book.rating = 4.2
+        user_book.save()
+        self.assertHistogram(self.book, [1, 0, 0, 1, 0])
+        user_book.rating = 4.5
+        user_book.save()
+        self.assertHistogram(self.book, [1, 0, 0, 0, 1])
+
+        user_book.book = self.other_book
+        user_book.save()
+        self.assertHistogram(self.book, [1, 0, 0, 0, 0])
+        self.assertHistogram(self.other_book, [0, 0, 0, 0, 1])
+
+        user_book.delete()
+        self.assertHistogram(self.other_book, [0, 0, 0, 0, 0])
+
+        Book.objects.filter(pk=self.book.pk).update(rating_1=0, rating_3=7)
+        Book.objects.rebuild_ratings()
+        self.assertHistogram(self.book, [1, 0, 0, 0, 0])
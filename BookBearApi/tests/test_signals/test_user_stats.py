@@ -0,0 +1,108 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from BookBearApi.jobs import run_pending_jobs
+from BookBearApi.models import Author, Book, Genre, Job, User, UserBook, UserGenreCount, UserStats
+from BookBearApi.ratings import rating_bucket
+from BookBearApi.stats import get_user_stats, rebuild_user_stats
+
+
+class TestUserStatsSignals(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader', email='reader@gmail.com', password='reader',
+                                            birth_date='2000-01-01')
+        cls.genres = [Genre.objects.create(name=f'Genre {i}') for i in range(3)]
+        cls.authors = [Author.objects.create(name=f'Author {i}', birth_date='1950-01-01') for i in range(2)]
+        cls.books = [Book.objects.create(title=f'Book {i}', publication_date='2000-01-01') for i in range(4)]
+        for index, book in enumerate(cls.books):
+            book.genres.add(cls.genres[0], cls.genres[index % 3])
+            book.authors.add(cls.authors[index % 2])
+
+    def setUp(self):
+        # Built before the library changes, so they are maintained by the signals
+        rebuild_user_stats([self.user.pk])
+
+    def assertMatchesRebuild(self):
+        stats = get_user_stats(self.user.pk)
+        rebuild_user_stats([self.user.pk])
+        self.assertEqual(stats, get_user_stats(self.user.pk))
+        return stats
+
+    def test_rating_bucket(self):
+        self.assertIsNone(rating_bucket(None))
+        self.assertEqual([rating_bucket(rating) for rating in (0, 1.4, 1.5, 3, 4.49, 4.5, 5)], [1, 1, 2, 3, 4, 5, 5])
+
+    def test_create(self):
+        UserBook.objects.create(user=self.user, book=self.books[0], situation='C', rating=5)
+        UserBook.objects.create(user=self.user, book=self.books[1], situation='C', rating=3.6)
+        UserBook.objects.create(user=self.user, book=self.books[2], situation='R')
+        stats = self.assertMatchesRebuild()
+        self.assertEqual((stats['total'], stats['completed'], stats['reading'], stats['pending']), (3, 2, 1, 0))
+        self.assertEqual(stats['rating_count'], 2)
+        self.assertAlmostEqual(stats['average_rating'], 4.3)
+        self.assertEqual(stats['rating_histogram'], {1: 0, 2: 0, 3: 0, 4: 1, 5: 1})
+        self.assertEqual(stats['top_genres'][0], {'id': self.genres[0].pk, 'name': 'Genre 0', 'count': 3})
+        self.assertEqual(
+            [(author['id'], author['count']) for author in stats['top_authors']],
+            [(self.authors[0].pk, 2), (self.authors[1].pk, 1)]
+        )
+
+    def test_update(self):
+        user_book = UserBook.objects.create(user=self.user, book=self.books[0], rating=2)
+        user_book.situation = 'A'
+        user_book.rating = 1
+        user_book.save()
+        stats = self.assertMatchesRebuild()
+        self.assertEqual((stats['pending'], stats['abandoned']), (0, 1))
+        self.assertEqual(stats['rating_histogram'][1], 1)
+
+        user_book.book = self.books[1]
+        user_book.rating = None
+        user_book.save()
+        stats = self.assertMatchesRebuild()
+        self.assertEqual((stats['rating_count'], stats['average_rating']), (0, None))
+        self.assertEqual(stats['top_authors'], [{'id': self.authors[1].pk, 'name': 'Author 1', 'count': 1}])
+
+    def test_delete(self):
+        UserBook.objects.create(user=self.user, book=self.books[0], rating=4)
+        UserBook.objects.create(user=self.user, book=self.books[1]).delete()
+        stats = self.assertMatchesRebuild()
+        self.assertEqual((stats['total'], stats['rating_count']), (1, 1))
+        self.assertEqual(len(stats['top_genres']), 1)
+
+    def test_book_relations_changed(self):
+        UserBook.objects.create(user=self.user, book=self.books[1])
+        self.books[1].genres.clear()
+        self.assertEqual(list(Job.objects.values_list('name', 'payload')),
+                         [('stats.rebuild_readers', {'book_ids': [self.books[1].pk]})])
+        self.assertEqual(get_user_stats(self.user.pk)['top_genres'][0]['id'], self.genres[0].pk)
+        run_pending_jobs()
+        self.assertEqual(self.assertMatchesRebuild()['top_genres'], [])
+        self.genres[2].books.add(self.books[1])
+        run_pending_jobs()
+        self.assertEqual(self.assertMatchesRebuild()['top_genres'][0]['id'], self.genres[2].pk)
+
+    def test_built_on_first_read(self):
+        UserStats.objects.filter(user=self.user).delete()
+        UserBook.objects.create(user=self.user, book=self.books[0], situation='C')
+        self.assertFalse(UserStats.objects.filter(user=self.user).exists())
+        self.assertEqual(get_user_stats(self.user.pk)['completed'], 1)
+        self.assertIsNone(get_user_stats(0))
+
+    def test_concurrent_first_read(self):
+        UserStats.objects.filter(user=self.user).delete()
+        UserBook.objects.create(user=self.user, book=self.books[0], situation='C')
+        filter_library = UserBook.objects.filter
+
+        def built_meanwhile(*args, **kwargs):
+            # Another first read inserts its rows after this one has deleted the previous ones
+            if not UserStats.objects.filter(user=self.user).exists():
+                UserStats.objects.create(user=self.user, completed=1)
+                UserGenreCount.objects.create(user=self.user, genre=self.genres[0], count=1)
+            return filter_library(*args, **kwargs)
+
+        with mock.patch.object(UserBook.objects, 'filter', side_effect=built_meanwhile):
+            self.assertEqual(get_user_stats(self.user.pk)['completed'], 1)
+        self.assertEqual(UserGenreCount.objects.get(user=self.user, genre=self.genres[0]).count, 1)
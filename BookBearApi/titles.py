@@ -0,0 +1,28 @@
+import re
+import unicodedata
+from typing import Set
+
+# Goodreads appends the series to the titles, e.g. "The Hunger Games (The Hunger Games, #1)"
+SERIES_RE = re.compile(r'\s*\([^()]*#[^()]*\)\s*$')
+
+
+def text_key(value: str) -> str:
+    """
+    Return `value` folded for matching: accents, case, punctuation and repeated spaces are ignored.
+    """
+    value = unicodedata.normalize('NFKD', value).encode('ascii', 'ignore').decode().casefold()
+    return ' '.join(re.sub(r'[^\w\s]', ' ', value).split())
+
+
+def title_key(title: str) -> str:
+    """
+    Return the key of a title without its series, stored on every book as Book.title_key.
+    """
+    return text_key(SERIES_RE.sub('', title))
+
+
+def title_keys(title: str) -> Set[str]:
+    """
+    Return the keys a title is matched by, with and without its series.
+    """
+    return {key for key in (text_key(title), title_key(title)) if key}
@@ -0,0 +1,33 @@
+from django.db.models import Count, IntegerField, OuterRef, QuerySet, Subquery
+from django.db.models.functions import Coalesce
+from django.shortcuts import aget_object_or_404
+
+from .models import User, UserBook
+
+# Count annotation -> table with a `user_id` column of every collection summarized by UserSchema
+USER_COUNTS = {
+    'books_count': UserBook,
+    'followed_authors_count': User.followed_authors.through,
+    'followed_publishers_count': User.followed_publishers.through,
+    'favorite_genres_count': User.favorite_genres.through,
+}
+
+
+def _count(model) -> Coalesce:
+    rows = model.objects.filter(user_id=OuterRef('pk')).order_by().values('user_id').annotate(count=Count('pk'))
+    return Coalesce(Subquery(rows.values('count'), output_field=IntegerField()), 0)
+
+
+def with_counts(queryset: QuerySet) -> QuerySet:
+    """
+    Annotate the users of `queryset` with the size of their library and of their followed authors, publishers and
+    favorite genres, each counted in its own subquery rather than by joining the four relations together.
+    """
+    return queryset.annotate(**{name: _count(model) for name, model in USER_COUNTS.items()})
+
+
+async def aget_user(user_id: int) -> User:
+    """
+    Get the user `user_id` with its counts, as rendered by UserSchema, or raise Http404.
+    """
+    return await aget_object_or_404(with_counts(User.objects.all()), id=user_id)
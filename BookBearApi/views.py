@@ -1,3 +1,136 @@
-from django.shortcuts import render
+import mimetypes
+import os
+import re
+from typing import Optional, Tuple
 
-# Create your views here.
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+from .storage import name_hash
+
+RANGE_RE = re.compile(r'^bytes=(?P<start>\d*)-(?P<end>\d*)$')
+# Cache-Control of the files named after their content, whose URL never serves anything else
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+class RangeFile:
+    """
+    File object reading `length` bytes from `start`, streamed by FileResponse.
+    """
+
+    def __init__(self, file, start: int, length: int):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def _etag(path: str, stat: os.stat_result) -> str:
+    digest = name_hash(path)
+    if digest is not None:
+        return f'"{digest}"'
+    # Files stored before their names were hashed may be replaced in place: only a weak validator is known
+    return f'W/"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """
+    Weak comparison of If-None-Match against the ETag of the file.
+    """
+    if header.strip() == '*':
+        return True
+    opaque = etag.removeprefix('W/')
+    return any(tag.strip().removeprefix('W/') == opaque for tag in header.split(','))
+
+
+def _byte_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Return the first and last byte of a single `Range` header, or None if it cannot be satisfied.
+
+    Raises ValueError for the headers to ignore, such as multiple ranges, answered with the whole file.
+    """
+    match = RANGE_RE.match(header.strip())
+    if match is None or not (match['start'] or match['end']):
+        raise ValueError(header)
+    if not match['start']:
+        length = int(match['end'])
+        return (max(size - length, 0), size - 1) if length and size else None
+    start = int(match['start'])
+    if match['end'] and int(match['end']) < start:
+        raise ValueError(header)
+    end = min(int(match['end']), size - 1) if match['end'] else size - 1
+    return (start, end) if start < size else None
+
+
+@require_safe
+def serve_media(request, path: str):
+    """
+    Serve a file of MEDIA_ROOT with validators and caching headers.
+
+    Files named after their content are cacheable forever, the other ones for MEDIA_CACHE_MAX_AGE seconds.
+    If-None-Match is answered with a 304 and single byte ranges with a 206. When MEDIA_ACCEL_REDIRECT is set,
+    the body is left to the front web server through X-Accel-Redirect.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(full_path)
+    except (OSError, ValueError):
+        raise Http404(path)
+    if not os.path.isfile(full_path):
+        raise Http404(path)
+
+    etag = _etag(path, stat)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Cache-Control': (
+            IMMUTABLE_CACHE_CONTROL if not etag.startswith('W/') else f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+        ),
+        'Accept-Ranges': 'bytes',
+    }
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return HttpResponseNotModified(headers=headers)
+
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    if settings.MEDIA_ACCEL_REDIRECT:
+        # The front web server handles the ranges and streams the file with sendfile
+        response = HttpResponse(content_type=content_type, headers=headers)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT.rstrip('/') + '/' + path
+        return response
+
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    # A range of another version of the file than the one cached by the client would corrupt it
+    if range_header and (if_range is None or if_range == etag and not etag.startswith('W/')):
+        try:
+            byte_range = _byte_range(range_header, stat.st_size)
+        except ValueError:
+            pass
+        else:
+            if byte_range is None:
+                return HttpResponse(status=416, headers={'Content-Range': f'bytes */{stat.st_size}'})
+
+    file = open(full_path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type, headers=headers)
+    else:
+        start, end = byte_range
+        response = FileResponse(RangeFile(file, start, end - start + 1), status=206, content_type=content_type,
+                                headers=headers)
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = str(end - start + 1)
+    return response